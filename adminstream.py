@@ -0,0 +1,145 @@
+"""Coalesced event stream for the admin dashboard.
+
+Visitor joins and leaves, guestbook notes and game requests are queued and
+sent to the admin room as one ``admin_batch`` frame per interval instead of
+one event each, so a reconnect storm costs the dashboard a frame and a
+re-render per interval rather than thousands. Within a batch only the latest
+state of each socket is kept: a socket that joined and left again is
+dropped altogether, unless an admin loaded the list of connections in
+between (snapshot_sent()) and so has it on screen, and only the newest
+visitor count is sent. With several workers behind a message queue an admin
+may have loaded the list from any of them, so there every leave is sent.
+
+Dashboard sections that went stale (the guestbook, recent visits, ...) are
+refreshed the same way: any number of refresh() calls within an interval
+cost one snapshot, whose sections ride along in the next frame.
+
+Critical events (new access requests) are sent immediately, after whatever
+is queued so the dashboard still sees events in order.
+"""
+
+import threading
+import time
+
+
+class AdminStream:
+    """Queue admin-room events and flush them every ``interval`` seconds.
+
+    ``emit(event, data)`` sends one event to the admin room and
+    ``snapshot()`` returns the dashboard's data, a dict of sections. With an
+    interval of 0 nothing is coalesced and every event is sent as it comes.
+    Set ``shared`` when other workers serve admins too: their snapshots
+    never reach snapshot_sent() here, so no leave can be dropped.
+    """
+
+    def __init__(self, emit, interval=1.0, snapshot=None, shared=False):
+        self._emit = emit
+        self._snapshot = snapshot
+        self.interval = interval
+        self.shared = shared
+        self._lock = threading.Lock()
+        # sid -> ("joined", info, epoch) | ("left", info, epoch)
+        self._presence = {}
+        self._epoch = 0  # bumped each time an admin gets the connections
+        self._count = None
+        self._events = []
+        self._stale = set()
+        self.stats = {"events": 0, "frames": 0}
+
+    def joined(self, info, count):
+        """A visitor socket connected; ``count`` is the new visitor count"""
+        self.stats["events"] += 1
+        if self._send_now():
+            return self._send("visitor_joined", {**info, "count": count})
+        with self._lock:
+            self._presence[info["sid"]] = ("joined", info, self._epoch)
+            self._count = count
+
+    def left(self, info, count):
+        """A visitor socket disconnected; ``count`` is the new visitor count"""
+        self.stats["events"] += 1
+        if self._send_now():
+            return self._send("visitor_left", {**info, "count": count})
+        with self._lock:
+            previous = self._presence.get(info["sid"])
+            if (
+                not self.shared
+                and previous
+                and previous[0] == "joined"
+                and previous[2] == self._epoch
+            ):
+                # Never shown on the dashboard, so nothing to take back
+                del self._presence[info["sid"]]
+            else:
+                self._presence[info["sid"]] = ("left", info, self._epoch)
+            self._count = count
+
+    def snapshot_sent(self):
+        """An admin was just sent the current connections (join_admin), so
+        sockets that joined before now must have their leave sent"""
+        with self._lock:
+            self._epoch += 1
+
+    def emit(self, event, data, critical=False):
+        """Queue ``event``, or send it right away if it is ``critical``"""
+        self.stats["events"] += 1
+        if critical or self._send_now():
+            self.flush()
+            return self._send(event, data)
+        with self._lock:
+            self._events.append([event, data])
+
+    def refresh(self, *sections, critical=False):
+        """Resend dashboard ``sections`` with the next frame, or right away
+        if ``critical``"""
+        self.stats["events"] += 1
+        with self._lock:
+            self._stale.update(sections)
+        if critical or self._send_now():
+            self.flush()
+
+    def flush(self):
+        """Send everything queued as one admin_batch frame"""
+        with self._lock:
+            if (
+                not self._presence
+                and not self._events
+                and not self._stale
+                and self._count is None
+            ):
+                return
+            presence, self._presence = self._presence, {}
+            count, self._count = self._count, None
+            events, self._events = self._events, []
+            stale, self._stale = self._stale, set()
+        batch = {"joined": [], "left": [], "count": count, "events": events}
+        for state, info, _ in presence.values():
+            batch[state].append(info if state == "joined" else info["sid"])
+        if stale and self._snapshot is not None:
+            snapshot = self._snapshot()
+            batch["dashboard"] = {name: snapshot[name] for name in sorted(stale)}
+        self._send("admin_batch", batch)
+
+    def run(self, sleep=time.sleep):
+        """Background loop: flush every ``interval`` seconds"""
+        while True:
+            sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing admin events: {e}")
+
+    def metrics(self):
+        """Events handed in, frames sent and events per frame"""
+        events, frames = self.stats["events"], self.stats["frames"]
+        return {
+            **self.stats,
+            "events_per_frame": round(events / frames, 2) if frames else 0,
+        }
+
+    def _send_now(self):
+        return self.interval <= 0
+
+    def _send(self, event, data):
+        self.stats["frames"] += 1
+        self._emit(event, data)
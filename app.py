@@ -5,23 +5,184 @@ eventlet.monkey_patch()
 
 from flask import Flask, render_template, request, session, redirect, url_for, jsonify
 from flask_socketio import SocketIO, emit, join_room
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime
 import os
+import signal
+import sys
+import time
 from functools import wraps
 from config import Config
+import adminstream
+import assets
+import db
+import httpcache
+import instrument
 import models
-from games import sudoku_generator
-from games import wordsearch_generator
-from games import trivia_api
+import presence
+import ratelimit
+import retention
+import serializer
+import socketqueue
 
 app = Flask(__name__)
 app.config.from_object(Config)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
+app.json = serializer.JSONProvider(app)
+socketio = SocketIO(json=serializer)
 
-models.init_db()
 
-# Track active connections with their socket IDs
-active_connections = {}
+def dashboard_snapshot():
+    """The admin dashboard's data, read in one transaction, and visitor count"""
+    snapshot = db.get_dashboard()
+    snapshot["active_count"] = db.count_visitors()
+    return snapshot
+
+
+admin_events = adminstream.AdminStream(
+    lambda event, data: socketio.emit(event, data, room="admin"),
+    Config.ADMIN_EVENT_INTERVAL,
+    snapshot=dashboard_snapshot,
+)
+_created = False
+
+
+def _shutdown():
+    """Commit the queued writes (e.g. end_visit's) and exit"""
+    models.close()
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def _on_stop_signal(signum, frame):
+    # atexit hooks do not run when a signal ends the process, and the handler
+    # may interrupt any green thread, so flush from a fresh one
+    socketio.start_background_task(_shutdown)
+
+
+def _install_stop_handlers():
+    """Flush on SIGTERM (systemctl stop) and SIGINT, unless the server, e.g.
+    a gunicorn worker, has installed its own handlers"""
+    defaults = {
+        signal.SIGTERM: signal.SIG_DFL,
+        signal.SIGINT: signal.default_int_handler,
+    }
+    try:
+        for signum, default in defaults.items():
+            if signal.getsignal(signum) is default:
+                signal.signal(signum, _on_stop_signal)
+    except ValueError:  # not the main thread
+        pass
+
+
+def create_app():
+    """Set up storage, Socket.IO and the background tasks for this process,
+    once, and return the app.
+
+    Importing this module only defines the routes and handlers, so whatever
+    serves the app calls this first: ``python app.py``, gunicorn as
+    ``app:create_app()``, or a script. Settings in ``app.config`` may be
+    changed before the call.
+    """
+    global _created
+    if _created:
+        return app
+    _created = True
+
+    instrument.init_app(app)
+    assets.init_app(app)
+    instrument.configure(app.config["SLOW_REQUEST_SECONDS"])
+    ratelimit.configure(
+        app.config["RATE_LIMITS"],
+        app.config["RATE_LIMIT_MAX_DELAY"],
+        app.config["RATE_LIMIT_MAX_KEYS"],
+        app.config["TRUSTED_PROXIES"],
+    )
+
+    message_queue = app.config["SOCKETIO_MESSAGE_QUEUE"]
+    if message_queue and message_queue.startswith("sqlite:"):
+        manager = socketqueue.SQLiteQueueManager(message_queue, json=serializer)
+        queue_options = {"client_manager": manager}
+    elif message_queue:
+        queue_options = {"message_queue": message_queue}
+    else:
+        queue_options = {}
+    socketio.init_app(
+        app, cors_allowed_origins="*", async_mode="eventlet", **queue_options
+    )
+    if app.config["TRUSTED_PROXIES"]:
+        # Outside the Socket.IO middleware, so sockets see client addresses too
+        proxies = app.config["TRUSTED_PROXIES"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    storage_options = dict(app.config["STORAGE_OPTIONS"])
+    if app.config["STORAGE_BACKEND"] == "sqlite":
+        storage_options.setdefault("trace_sql", app.config["TRACE_SQL"])
+        if message_queue:
+            # Chat history buffers are per process and would miss other
+            # workers' writes
+            storage_options.setdefault("chat_history_buffer", 0)
+    models.configure(app.config["STORAGE_BACKEND"], **storage_options)
+    # Only reads the schema version unless a migration is pending
+    models.init_db()
+    _install_stop_handlers()
+
+    socketio.start_background_task(
+        presence.run_heartbeat, app.config["PRESENCE_HEARTBEAT"], socketio.sleep
+    )
+    admin_events.interval = app.config["ADMIN_EVENT_INTERVAL"]
+    # Admins on other workers load connections this process never hears of
+    admin_events.shared = bool(message_queue)
+    if admin_events.interval > 0:
+        socketio.start_background_task(admin_events.run, socketio.sleep)
+    if app.config["RETENTION_INTERVAL"] and app.config["STORAGE_BACKEND"] == "sqlite":
+        socketio.start_background_task(
+            retention.run_forever,
+            app.config["RETENTION"],
+            app.config["RETENTION_INTERVAL"],
+            app.config["RETENTION_BATCH_SIZE"],
+            socketio.sleep,
+        )
+    return app
+
+
+# Socket.IO rooms, so each event only reaches the sockets that need it:
+# "admin" (dashboards), "visitors" (every chat room, for admin replies and
+# clears), one room per visitor id (their own messages, in every tab) and one
+# per pending access request (its waiting room).
+def visitor_room(visitor_id):
+    return f"visitor:{visitor_id}"
+
+
+def pending_room(request_id):
+    return f"pending:{request_id}"
+
+
+def chat_rooms(message):
+    """Rooms allowed to see a chat message, the same ones that get it in
+    their history"""
+    if message["sender"] == "admin":
+        return ["admin", "visitors"]
+    if message.get("visitor_id"):
+        return ["admin", visitor_room(message["visitor_id"])]
+    return ["admin"]
+
+
+def chat_history(messages):
+    """Messages for a connect payload, packed unless COMPACT_CHAT_HISTORY is
+    off"""
+    if app.config["COMPACT_CHAT_HISTORY"]:
+        return serializer.pack_messages(messages)
+    return messages
+
+
+def connection_info(connection):
+    """A presence entry as the admin dashboard shows it"""
+    return {
+        "sid": connection["sid"],
+        "visitor_id": connection["visitor_id"] or "unknown",
+        "visitor_name": connection["visitor_name"],
+        "connected_at": datetime.fromtimestamp(connection["connected_at"]).isoformat(),
+    }
 
 
 def admin_required(f):
@@ -34,13 +195,37 @@ def admin_required(f):
     return decorated_function
 
 
+def approval_required(f):
+    """Only approved visitors, and only while the admin is available.
+
+    Both lookups are served from the storage engine's caches, so a page load
+    normally runs no queries.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if models.get_current_status()["status"] != "available":
+            return redirect(url_for("index"))
+        session_id = session.get("visitor_session")
+        if not session_id:
+            return redirect(url_for("index"))
+        visitor = models.get_visitor_by_session(session_id)
+        if not visitor or not visitor["approved"]:
+            return redirect(url_for("waiting_room"))
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
 @app.route("/")
+@httpcache.cached("status")
 def index():
     status = models.get_current_status()
     return render_template("index.html", status=status)
 
 
 @app.route("/request-access", methods=["POST"])
+@ratelimit.http_limit("request_access")
 def request_access():
     """Visitor requests access with name and email"""
     data = request.get_json()
@@ -57,6 +242,7 @@ def request_access():
             # Already pending, just update name/email and redirect
             session["visitor_name"] = name
             session["visitor_email"] = email
+            session["visitor_request_id"] = existing["id"]
             return jsonify({"success": True, "session_id": session["visitor_session"]})
 
     # Create new session
@@ -65,9 +251,10 @@ def request_access():
     visitor_id = models.create_pending_visitor(name, email, session["visitor_session"])
     session["visitor_name"] = name
     session["visitor_email"] = email
+    session["visitor_request_id"] = visitor_id
 
     # Notify admin in real-time
-    socketio.emit(
+    admin_events.emit(
         "new_visitor_request",
         {
             "id": visitor_id,
@@ -75,13 +262,14 @@ def request_access():
             "email": email,
             "requested_at": datetime.now().isoformat(),
         },
-        room="admin",
+        critical=True,
     )
 
     return jsonify({"success": True, "session_id": session["visitor_session"]})
 
 
 @app.route("/check-approval")
+@httpcache.conditional("pending", vary=lambda: session.get("visitor_session"))
 def check_approval():
     """Check if visitor has been approved"""
     session_id = session.get("visitor_session")
@@ -109,39 +297,15 @@ def waiting_room():
 
 
 @app.route("/choose")
+@approval_required
 def choose_connection():
-    status = models.get_current_status()
-    if status["status"] != "available":
-        return redirect(url_for("index"))
-
-    # Check if visitor is approved
-    session_id = session.get("visitor_session")
-    if session_id:
-        visitor = models.get_visitor_by_session(session_id)
-        if not visitor or not visitor["approved"]:
-            return redirect(url_for("waiting_room"))
-    else:
-        return redirect(url_for("index"))
-
     visitor_name = session.get("visitor_name", "Anonymous")
     return render_template("choose.html", visitor_name=visitor_name)
 
 
 @app.route("/room/chat")
+@approval_required
 def chat_room():
-    status = models.get_current_status()
-    if status["status"] != "available":
-        return redirect(url_for("index"))
-
-    # Check approval
-    session_id = session.get("visitor_session")
-    if session_id:
-        visitor = models.get_visitor_by_session(session_id)
-        if not visitor or not visitor["approved"]:
-            return redirect(url_for("waiting_room"))
-    else:
-        return redirect(url_for("index"))
-
     if "visitor_id" not in session:
         session["visitor_id"] = os.urandom(16).hex()
     visitor_name = session.get("visitor_name", "Anonymous")
@@ -149,20 +313,8 @@ def chat_room():
 
 
 @app.route("/room/video")
+@approval_required
 def video_room():
-    status = models.get_current_status()
-    if status["status"] != "available":
-        return redirect(url_for("index"))
-
-    # Check approval
-    session_id = session.get("visitor_session")
-    if session_id:
-        visitor = models.get_visitor_by_session(session_id)
-        if not visitor or not visitor["approved"]:
-            return redirect(url_for("waiting_room"))
-    else:
-        return redirect(url_for("index"))
-
     if "visitor_id" not in session:
         session["visitor_id"] = os.urandom(16).hex()
     visitor_name = session.get("visitor_name", "Anonymous")
@@ -173,6 +325,7 @@ def video_room():
 
 
 @app.route("/api/status")
+@httpcache.cached("status")
 def api_status():
     status = models.get_current_status()
     return jsonify(status)
@@ -181,6 +334,9 @@ def api_status():
 @app.route("/api/game/wordsearch")
 def api_wordsearch():
     """Generate a new word search puzzle"""
+    # The games load on first use, not at startup
+    from games import wordsearch_generator
+
     theme = request.args.get("theme", "general")
     size = int(request.args.get("size", 12))
     puzzle = wordsearch_generator.generate_wordsearch(theme, size)
@@ -190,6 +346,8 @@ def api_wordsearch():
 @app.route("/api/game/sudoku")
 def api_sudoku():
     """Generate a new sudoku puzzle"""
+    from games import sudoku_generator
+
     difficulty = request.args.get("difficulty", "medium")
     puzzle = sudoku_generator.generate_sudoku(difficulty)
     return jsonify(puzzle)
@@ -198,6 +356,8 @@ def api_sudoku():
 @app.route("/api/game/trivia")
 def api_trivia():
     """Get trivia questions from Open Trivia Database"""
+    from games import trivia_api
+
     amount = int(request.args.get("amount", 5))
     category = request.args.get("category")
     difficulty = request.args.get("difficulty")
@@ -206,6 +366,7 @@ def api_trivia():
 
 
 @app.route("/guestbook", methods=["POST"])
+@ratelimit.http_limit("guestbook")
 def add_guestbook_message():
     data = request.get_json()
     visitor_name = data.get("name", "Anonymous")
@@ -215,11 +376,10 @@ def add_guestbook_message():
     models.add_message(visitor_name, message)
 
     # Notify admin
-    socketio.emit(
-        "new_guestbook_message",
-        {"name": visitor_name, "message": message},
-        room="admin",
+    admin_events.emit(
+        "new_guestbook_message", {"name": visitor_name, "message": message}
     )
+    admin_events.refresh("messages", "unread_count")
 
     return jsonify({"success": True})
 
@@ -250,26 +410,19 @@ def admin_logout():
 @app.route("/admin")
 @admin_required
 def admin_dashboard():
-    status = models.get_current_status()
-    messages = models.get_messages(limit=20)
-    unread_count = models.get_unread_count()
-    visits = models.get_recent_visits(limit=10)
-    stats = models.get_visit_stats()
-    pending = models.get_pending_visitors()
-    return render_template(
-        "admin/dashboard.html",
-        status=status,
-        messages=messages,
-        unread_count=unread_count,
-        visits=visits,
-        stats=stats,
-        active_count=len(active_connections),
-        pending_visitors=pending,
-    )
+    return render_template("admin/dashboard.html", **dashboard_snapshot())
+
+
+@app.route("/admin/dashboard/data")
+@admin_required
+def admin_dashboard_data():
+    """The same snapshot the dashboard renders, for resyncing after a reconnect"""
+    return jsonify(dashboard_snapshot())
 
 
 @app.route("/admin/pending-visitors")
 @admin_required
+@httpcache.conditional("pending")
 def get_pending_visitors_api():
     pending = models.get_pending_visitors()
     return jsonify(pending)
@@ -277,23 +430,38 @@ def get_pending_visitors_api():
 
 @app.route("/admin/chat/messages")
 @admin_required
+@httpcache.conditional("chat")
 def get_chat_messages_api():
+    since_id = request.args.get("since_id", type=int)
+    if since_id is not None:
+        return jsonify(models.get_chat_changes(since_id))
     messages = models.get_chat_messages(limit=100)
     return jsonify(messages)
 
 
 @app.route("/api/chat/messages")
+@httpcache.conditional("chat", vary=lambda: session.get("visitor_id"))
 def get_visitor_chat_messages():
     visitor_id = session.get("visitor_id")
     if not visitor_id:
         return jsonify([])
-    all_messages = models.get_chat_messages(limit=100)
-    filtered = [
-        msg
-        for msg in all_messages
-        if msg.get("visitor_id") == visitor_id or msg["sender"] == "admin"
-    ]
-    return jsonify(filtered)
+    since_id = request.args.get("since_id", type=int)
+    if since_id is not None:
+        return jsonify(models.get_chat_changes(since_id, visitor_id))
+    return jsonify(models.get_visitor_chat_messages(visitor_id, limit=100))
+
+
+@app.route("/admin/metrics")
+@admin_required
+def metrics():
+    return jsonify(
+        {
+            "conditional_get": httpcache.metrics(),
+            "admin_events": admin_events.metrics(),
+            "rate_limits": ratelimit.metrics(),
+            "handlers": instrument.metrics(),
+        }
+    )
 
 
 @app.route("/admin/status/update", methods=["POST"])
@@ -313,7 +481,10 @@ def update_status():
 @admin_required
 def approve_visitor(visitor_id):
     models.approve_visitor(visitor_id)
-    socketio.emit("approval_granted", {"visitor_id": visitor_id}, namespace="/")
+    socketio.emit(
+        "approval_granted", {"visitor_id": visitor_id}, room=pending_room(visitor_id)
+    )
+    admin_events.refresh("pending_visitors", critical=True)
     return jsonify({"success": True})
 
 
@@ -321,38 +492,52 @@ def approve_visitor(visitor_id):
 @admin_required
 def reject_visitor(visitor_id):
     models.reject_visitor(visitor_id)
-    socketio.emit("approval_rejected", {"visitor_id": visitor_id}, namespace="/")
+    socketio.emit(
+        "approval_rejected", {"visitor_id": visitor_id}, room=pending_room(visitor_id)
+    )
+    admin_events.refresh("pending_visitors", critical=True)
     return jsonify({"success": True})
 
 
 @app.route("/admin/visitor/<visitor_id>/disconnect", methods=["POST"])
 @admin_required
 def disconnect_visitor(visitor_id):
-    """Disconnect a specific visitor"""
-    for sid, conn in list(active_connections.items()):
-        if conn["visitor_id"] == visitor_id:
-            socketio.emit(
-                "force_disconnect", {"reason": "Disconnected by admin"}, room=sid
-            )
-            # The actual disconnect will be handled by the client
-            return jsonify({"success": True})
-    return jsonify({"error": "Visitor not found"}), 404
+    """Disconnect a specific visitor, or with ``?sid=`` one socket that has no
+    visitor id (shown on the dashboard as "unknown")"""
+    if visitor_id == "unknown":
+        sid = request.args.get("sid")
+        connections = [
+            conn
+            for conn in db.get_connections()
+            if conn["sid"] == sid and conn["visitor_id"] is None
+        ]
+    else:
+        connections = db.find_connections(visitor_id)
+    if not connections:
+        return jsonify({"error": "Visitor not found"}), 404
+    # Every tab, on whichever worker it is connected to. The actual
+    # disconnect will be handled by the client.
+    socketio.emit(
+        "force_disconnect",
+        {"reason": "Disconnected by admin"},
+        room=[conn["sid"] for conn in connections],
+    )
+    return jsonify({"success": True})
 
 
 @app.route("/admin/messages/<int:message_id>/read", methods=["POST"])
 @admin_required
 def mark_read(message_id):
     models.mark_message_read(message_id)
+    admin_events.refresh("messages", "unread_count", critical=True)
     return jsonify({"success": True})
 
 
 @app.route("/admin/messages/<int:message_id>/delete", methods=["POST"])
 @admin_required
 def delete_guestbook_message(message_id):
-    conn = models.get_db()
-    conn.execute("DELETE FROM messages WHERE id = ?", (message_id,))
-    conn.commit()
-    conn.close()
+    models.delete_message(message_id)
+    admin_events.refresh("messages", "unread_count", critical=True)
     return jsonify({"success": True})
 
 
@@ -360,9 +545,11 @@ def delete_guestbook_message(message_id):
 @admin_required
 def delete_chat_message(message_id):
     """Delete a specific chat message"""
-    models.delete_chat_message(message_id)
-    socketio.emit("message_deleted", {"message_id": message_id}, room="admin")
-    socketio.emit("message_deleted", {"message_id": message_id}, broadcast=True)
+    message = models.delete_chat_message(message_id)
+    if message is not None:
+        socketio.emit(
+            "message_deleted", {"message_id": message_id}, room=chat_rooms(message)
+        )
     return jsonify({"success": True})
 
 
@@ -371,12 +558,12 @@ def delete_chat_message(message_id):
 def clear_chat_history():
     """Clear all chat messages"""
     models.clear_all_chat_messages()
-    socketio.emit("chat_cleared", {}, room="admin")
-    socketio.emit("chat_cleared", {}, broadcast=True)
+    socketio.emit("chat_cleared", {}, room=["admin", "visitors"])
     return jsonify({"success": True})
 
 
 @socketio.on("connect")
+@instrument.traced("socket connect")
 def handle_connect(auth=None):
     # Don't track admin connections as visitors
     if session.get("admin_logged_in"):
@@ -385,104 +572,109 @@ def handle_connect(auth=None):
     visitor_id = session.get("visitor_id", "unknown")
     visitor_name = session.get("visitor_name", "Anonymous")
 
-    # Store connection info
-    active_connections[request.sid] = {
-        "visitor_id": visitor_id,
-        "visitor_name": visitor_name,
-        "connected_at": datetime.now().isoformat(),
+    visit_id = None
+    if app.config["LOG_VISITS"]:
+        visit_id = db.log_visit(visitor_name, "chat")
+
+    # Store connection info where every worker can see it
+    connection = {
         "sid": request.sid,
+        "worker": presence.worker_id(),
+        "visitor_id": session.get("visitor_id"),
+        "visitor_name": visitor_name,
+        "connected_at": time.time(),
+        "visit_id": visit_id,
     }
+    count = db.add_connection(**connection)
 
-    if app.config["LOG_VISITS"]:
-        visit_id = models.log_visit(visitor_name, "chat")
-        active_connections[request.sid]["visit_id"] = visit_id
+    if "visitor_id" in session:
+        join_room("visitors")
+        join_room(visitor_room(visitor_id))
+    if "visitor_request_id" in session:
+        join_room(pending_room(session["visitor_request_id"]))
 
     # Notify admin room about new visitor
-    socketio.emit(
-        "visitor_joined",
-        {
-            "sid": request.sid,
-            "visitor_name": visitor_name,
-            "visitor_id": visitor_id,
-            "count": len(active_connections),
-            "connected_at": datetime.now().isoformat(),
-        },
-        room="admin",
-    )
-
-    # Send chat history for this visitor
-    chat_history = models.get_chat_messages(limit=100)
-    visitor_chat = [
-        msg
-        for msg in chat_history
-        if msg.get("visitor_id") == visitor_id or msg["sender"] == "admin"
-    ]
-    emit(
-        "connection_established",
-        {
-            "message": "Connected to The Welcome Window",
-            "visitor_name": visitor_name,
-            "chat_history": visitor_chat,
-        },
-    )
+    admin_events.joined(connection_info(connection), count)
+    if visit_id:
+        admin_events.refresh("visits", "stats")
+
+    # Send chat history for this visitor, or only what changed since the
+    # last message id a reconnecting client saw
+    since_id = (auth or {}).get("since_id")
+    payload = {
+        "message": "Connected to The Welcome Window",
+        "visitor_name": visitor_name,
+    }
+    if since_id:
+        payload["chat_changes"] = db.get_chat_changes(int(since_id), visitor_id)
+    else:
+        payload["cursor"] = db.get_chat_cursor()
+        payload["chat_history"] = chat_history(
+            db.get_visitor_chat_messages(visitor_id, limit=100)
+        )
+    emit("connection_established", payload)
 
 
 @socketio.on("disconnect")
+@instrument.traced("socket disconnect")
 def handle_disconnect():
-    if request.sid in active_connections:
-        connection = active_connections[request.sid]
-        if "visit_id" in connection and app.config["LOG_VISITS"]:
-            models.end_visit(connection["visit_id"])
-        visitor_name = connection["visitor_name"]
-        visitor_id = connection["visitor_id"]
-
-        # Remove from active_connections
-        del active_connections[request.sid]
+    connection, count = db.remove_connection(request.sid)
+    if connection is not None:
+        if connection["visit_id"] and app.config["LOG_VISITS"]:
+            db.end_visit(connection["visit_id"])
+            admin_events.refresh("visits", "stats")
 
         # Notify admin room with socket ID to remove
-        socketio.emit(
-            "visitor_left",
-            {
-                "visitor_name": visitor_name,
-                "visitor_id": visitor_id,
-                "sid": request.sid,
-                "count": len(active_connections),
-            },
-            room="admin",
-        )
+        admin_events.left(connection_info(connection), count)
 
-        # Auto-clear chat when last visitor disconnects
-        if len(active_connections) == 0:
-            models.clear_all_chat_messages()
+        # Auto-clear chat when the last visitor on any worker disconnects
+        if count == 0:
+            db.clear_all_chat_messages()
             socketio.emit("chat_cleared", {}, room="admin")
 
 
 @socketio.on("join_admin")
-def handle_join_admin():
+@instrument.traced("socket join_admin")
+def handle_join_admin(data=None):
     """Admin joins the admin room to receive real-time updates"""
     join_room("admin")
 
     # Send current active connections to admin
-    connections_list = [
-        {
-            "sid": sid,
-            "visitor_id": conn["visitor_id"],
-            "visitor_name": conn["visitor_name"],
-            "connected_at": conn["connected_at"],
-        }
-        for sid, conn in active_connections.items()
-    ]
+    connections_list = [connection_info(conn) for conn in db.get_connections()]
+    # Sockets in this list that leave later must be reported even if they
+    # joined within the current batch
+    admin_events.snapshot_sent()
+
+    payload = {"active_connections": connections_list}
+    since_id = (data or {}).get("since_id")
+    if since_id:
+        # Rejoining after a reconnect: only send what the admin missed
+        payload["chat_changes"] = db.get_chat_changes(int(since_id))
+    else:
+        payload["cursor"] = db.get_chat_cursor()
+        payload["chat_history"] = chat_history(db.get_chat_messages(limit=100))
 
-    # Send chat history
-    chat_history = models.get_chat_messages(limit=100)
+    emit("admin_joined", payload)
 
-    emit(
-        "admin_joined",
-        {"active_connections": connections_list, "chat_history": chat_history},
-    )
+
+@socketio.on("sync_chat")
+@instrument.traced("socket sync_chat")
+def handle_sync_chat(data):
+    """Send chat changes after the client's last seen message id"""
+    since_id = int((data or {}).get("since_id") or 0)
+    if session.get("admin_logged_in"):
+        changes = db.get_chat_changes(since_id)
+    else:
+        visitor_id = session.get("visitor_id")
+        if not visitor_id:
+            return
+        changes = db.get_chat_changes(since_id, visitor_id)
+    emit("chat_changes", changes)
 
 
 @socketio.on("send_message")
+@instrument.traced("socket send_message")
+@ratelimit.socket_limit("send_message")
 def handle_message(data):
     message = data.get("message", "").strip()
     sender = data.get("sender", "visitor")
@@ -504,11 +696,11 @@ def handle_message(data):
         }
 
         # Save to database
-        msg_id = models.save_chat_message("admin", "Diane", message)
+        msg_id = db.save_chat_message("admin", "Diane", message)
         msg_data["id"] = msg_id
 
-        # Send to ALL connected sockets (including admin)
-        socketio.emit("new_message", msg_data, namespace="/")
+        # Admin replies are part of every visitor's chat
+        socketio.emit("new_message", msg_data, room=chat_rooms(msg_data))
 
     else:
         # Visitor sending message
@@ -521,21 +713,24 @@ def handle_message(data):
         }
 
         # Save to database
-        msg_id = models.save_chat_message("visitor", visitor_name, message, visitor_id)
+        msg_id = db.save_chat_message("visitor", visitor_name, message, visitor_id)
         msg_data["id"] = msg_id
 
-        # Broadcast to all (admin + visitors)
-        socketio.emit("new_message", msg_data, namespace="/")
+        # Only the admin and this visitor's own tabs see it
+        rooms = chat_rooms(msg_data) if visitor_id else ["admin", request.sid]
+        socketio.emit("new_message", msg_data, room=rooms)
 
 
 @socketio.on("request_game")
+@instrument.traced("socket request_game")
+@ratelimit.socket_limit("request_game")
 def handle_game_request(data):
     game_type = data.get("game_type")
-    socketio.emit(
+    admin_events.emit(
         "game_requested",
         {"game_type": game_type, "requester": session.get("visitor_name", "Anonymous")},
     )
 
 
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=5000, debug=False)
+    socketio.run(create_app(), host="0.0.0.0", port=5000, debug=False)
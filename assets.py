@@ -0,0 +1,196 @@
+"""Fingerprinted, precompressed static assets.
+
+``python assets.py`` copies every file under static/ to static/dist/ with a
+content hash in its name (js/chess.js -> js/chess.1f0c2d9e4b.js), writes
+gzip and, when the brotli package is installed, brotli siblings of the text
+files, and records the mapping in static/dist/manifest.json. Run it again
+after changing anything under static/.
+
+The chess game's third-party libraries are committed under static/vendor/
+with their SHA-256 in static/vendor/SHA256SUMS; the build refuses to run if
+any of them is missing or changed.
+
+Templates call asset_url("js/chess.js"). With a manifest that is the
+fingerprinted URL under /assets/, served with a year-long immutable
+Cache-Control and the best encoding the browser accepts. Without one it is
+the plain /static/ URL, so a fresh checkout works unbuilt.
+"""
+
+import functools
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+
+from flask import abort, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone is served without it
+    brotli = None
+
+STATIC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST = os.path.join(STATIC, "dist")
+MAX_AGE = 365 * 24 * 3600
+
+# Vendored libraries: "hash  path" lines, paths relative to static/vendor/
+VENDOR_SUMS = os.path.join(STATIC, "vendor", "SHA256SUMS")
+
+# Compressed only if it saves something; images are already compressed
+COMPRESSIBLE = {".js", ".css", ".svg", ".json", ".html", ".txt", ".map"}
+SUFFIXES = {"br": ".br", "gzip": ".gz"}  # in order of preference
+
+# Loaded by init_app(): logical path -> {"file": hashed path, "encodings": [...]}
+manifest = {}
+_encodings = {}  # hashed path -> encodings available for it
+_urls = {}
+
+
+@functools.cache
+def vendored():
+    """{path under static/: sha256} of the vendored libraries"""
+    with open(VENDOR_SUMS) as f:
+        lines = [line.split() for line in f if line.strip()]
+    return {f"vendor/{path}": digest for digest, path in lines}
+
+
+def verify(static_dir=STATIC):
+    """Vendored files that are missing or differ from their pinned hash"""
+    problems = []
+    for path, digest in vendored().items():
+        try:
+            with open(os.path.join(static_dir, path), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            problems.append(f"{path} is missing")
+            continue
+        if hashlib.sha256(data).hexdigest() != digest:
+            problems.append(f"{path} does not match its pinned SHA-256")
+    return problems
+
+
+def _compress(data):
+    """{encoding: bytes} for each encoding that makes ``data`` smaller"""
+    packed = {"gzip": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        packed["br"] = brotli.compress(data)
+    return {name: body for name, body in packed.items() if len(body) < len(data)}
+
+
+def _sources(static_dir, dist_dir):
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_dir)
+        for name in sorted(files):
+            if name == "SHA256SUMS":
+                continue
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, static_dir).replace(os.sep, "/"), path
+
+
+def build(static_dir=STATIC, dist_dir=DIST):
+    """Write fingerprinted and precompressed copies of static_dir to
+    dist_dir with their manifest, and return the manifest"""
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    result = {}
+    for logical, path in _sources(static_dir, dist_dir):
+        with open(path, "rb") as f:
+            data = f.read()
+        stem, ext = os.path.splitext(logical)
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+        target = os.path.join(dist_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+
+        packed = _compress(data) if ext in COMPRESSIBLE else {}
+        for encoding, body in packed.items():
+            with open(target + SUFFIXES[encoding], "wb") as f:
+                f.write(body)
+        encodings = [name for name in SUFFIXES if name in packed]
+        result[logical] = {"file": hashed, "encodings": encodings}
+
+    with open(os.path.join(dist_dir, "manifest.json"), "w") as f:
+        json.dump(result, f, indent=1, sort_keys=True)
+    return result
+
+
+def load(dist_dir=DIST, static_dir=STATIC):
+    """Use dist_dir's manifest, if built, for asset_url() and /assets/"""
+    manifest.clear()
+    _encodings.clear()
+    _urls.clear()
+    path = os.path.join(dist_dir, "manifest.json")
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        manifest.update(json.load(f))
+    for entry in manifest.values():
+        _encodings[entry["file"]] = entry["encodings"]
+
+    built = os.path.getmtime(path)
+    if any(os.path.getmtime(p) > built for _, p in _sources(static_dir, dist_dir)):
+        print("Static files changed since the last build; run python assets.py")
+
+
+def asset_url(path):
+    """URL for ``path`` under static/, fingerprinted once built"""
+    url = _urls.get(path)
+    if url is None:
+        entry = manifest.get(path)
+        if entry is not None:
+            url = url_for("asset", filename=entry["file"])
+        else:
+            url = url_for("static", filename=path)
+        _urls[path] = url
+    return url
+
+
+def vendor_urls():
+    """asset_url() of every vendored library file, for scripts loading them"""
+    return {path: asset_url(path) for path in vendored()}
+
+
+def serve(filename):
+    """A fingerprinted file, precompressed for the client if possible"""
+    encodings = _encodings.get(filename)
+    if encodings is None:
+        abort(404)
+    encoding = next((e for e in encodings if request.accept_encodings[e]), None)
+    response = send_from_directory(
+        DIST,
+        filename + SUFFIXES[encoding] if encoding else filename,
+        mimetype=mimetypes.guess_type(filename)[0],
+        max_age=MAX_AGE,
+    )
+    # The name changes with the content, so it never needs revalidating
+    response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}, immutable"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if encodings:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_app(app):
+    """Serve built assets under /assets/ and expose asset_url() to templates"""
+    load()
+    app.add_url_rule("/assets/<path:filename>", "asset", serve)
+    app.add_template_global(asset_url)
+    app.add_template_global(vendor_urls)
+
+
+if __name__ == "__main__":
+    problems = verify()
+    for problem in problems:
+        print(f"✗ {problem}")
+    if problems:
+        sys.exit(1)
+    built = build()
+    compressed = sum(1 for entry in built.values() if entry["encodings"])
+    print(
+        f"✓ {len(built)} assets fingerprinted in static/dist "
+        f"({compressed} precompressed{'' if brotli else ', gzip only'})"
+    )
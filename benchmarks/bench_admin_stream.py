@@ -0,0 +1,74 @@
+"""Frames the admin dashboard receives during a reconnect storm.
+
+Simulates a proxy reload: every visitor (Socket.IO test client) disconnects
+and reconnects at once while one admin dashboard is connected, first with
+ADMIN_EVENT_INTERVAL = 0 (one event per join/leave, as before) and then
+coalesced, flushing once as the batch interval would. Uses the in-memory
+storage engine unless STORAGE_BACKEND is set.
+
+Usage: python benchmarks/bench_admin_stream.py [visitors]
+"""
+
+import json
+import os
+import sys
+import time
+import warnings
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import app  # noqa: E402
+
+app.create_app()
+
+
+def connect(session_values):
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session.update(session_values)
+    return app.socketio.test_client(app.app, flask_test_client=client)
+
+
+def storm(count, interval):
+    app.admin_events.interval = interval
+    admin = connect({"admin_logged_in": True})
+    admin.emit("join_admin")
+    sessions = [
+        {"visitor_id": f"visitor-{n}", "visitor_name": f"Visitor {n}"}
+        for n in range(count)
+    ]
+    visitors = [connect(values) for values in sessions]
+    app.admin_events.flush()
+    admin.get_received()
+
+    start = time.perf_counter()
+    for client in visitors:
+        client.disconnect()
+    visitors = [connect(values) for values in sessions]
+    app.admin_events.flush()
+    elapsed = time.perf_counter() - start
+
+    received = admin.get_received()
+    size = sum(len(json.dumps(frame["args"])) for frame in received)
+    label = "coalesced" if interval else "per event"
+    print(
+        f"  {label:<10} {len(received):>6} frames  {size / 1024:>7.0f} KiB  "
+        f"({elapsed * 1000:6.0f} ms)"
+    )
+    for client in [admin, *visitors]:
+        client.disconnect()
+    app.admin_events.flush()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app.models.init_db()
+    print(f"{count} visitors reconnecting:")
+    storm(count, 0)
+    storm(count, 1.0)
+
+
+if __name__ == "__main__":
+    main()
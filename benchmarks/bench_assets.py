@@ -0,0 +1,78 @@
+"""Bytes and requests for the chat room's game scripts, plain /static/
+against the fingerprinted, precompressed /assets/ build.
+
+A first visit downloads every script; a repeat visit within the cache
+lifetime revalidates the /static/ ones (a conditional request each) while
+the immutable /assets/ ones are not requested at all. Rebuilds static/dist
+first and runs in-process through Flask's test client; first-visit time is
+the mean of ROUNDS visits.
+
+Usage: python benchmarks/bench_assets.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+os.environ.setdefault("DATABASE", os.path.join(tempfile.mkdtemp(), "bench.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import app  # noqa: E402 - monkey-patches before anything else loads
+import assets  # noqa: E402
+
+SCRIPTS = ["js/wordsearch.js", "js/sudoku.js", "js/trivia.js", "js/chess.js"]
+ROUNDS = 500
+
+
+def visit(client, urls, accept_encoding, etags=None):
+    """(bytes, requests, seconds) to load ``urls``, revalidating with etags"""
+    total = requests = 0
+    start = time.perf_counter()
+    for url in urls:
+        if etags is not None and "immutable" in etags[url][1]:
+            continue  # fresh in the browser cache for a year
+        headers = {"Accept-Encoding": accept_encoding}
+        if etags is not None:
+            headers["If-None-Match"] = etags[url][0]
+        response = client.get(url, headers=headers)
+        total += len(response.data)
+        requests += 1
+        response.close()
+    return total, requests, time.perf_counter() - start
+
+
+def main():
+    assets.build()
+    app.create_app()  # loads the manifest just built
+    client = app.app.test_client()
+    with app.app.test_request_context():
+        plain = [f"/static/{path}" for path in SCRIPTS]
+        built = [assets.asset_url(path) for path in SCRIPTS]
+
+    cases = [("/static/", plain, "gzip, br"), ("/assets/ gzip", built, "gzip")]
+    if assets.brotli is not None:
+        cases.append(("/assets/ br", built, "gzip, br"))
+    print(f"{len(SCRIPTS)} game scripts:{'first visit':>23}{'repeat visit':>29}")
+    for label, urls, accept_encoding in cases:
+        etags = {}
+        for url in urls:
+            response = client.get(url, headers={"Accept-Encoding": accept_encoding})
+            etags[url] = (
+                response.headers["ETag"].strip('"'),
+                response.headers.get("Cache-Control", ""),
+            )
+            response.close()
+        first = [visit(client, urls, accept_encoding) for _ in range(ROUNDS)]
+        again = visit(client, urls, accept_encoding, etags)
+        elapsed = sum(seconds for _, _, seconds in first) / ROUNDS
+        print(
+            f"  {label:<14}{first[0][0]:7d} B, {first[0][1]} requests"
+            f" ({elapsed * 1e6:4.0f} us){again[0]:7d} B, {again[1]} requests"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cost of the admin dashboard's data: the six separate models calls it
+used to make against one get_dashboard() snapshot, uncached and cached.
+
+Runs against a throwaway SQLite database with some guestbook notes, visits
+and pending requests; statements are counted by the SQL tracing.
+
+Usage: python benchmarks/bench_dashboard.py [loads]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrument  # noqa: E402
+import models  # noqa: E402
+
+
+def six_calls():
+    return {
+        "status": models.get_current_status(),
+        "messages": models.get_messages(limit=20),
+        "unread_count": models.get_unread_count(),
+        "visits": models.get_recent_visits(limit=10),
+        "stats": models.get_visit_stats(),
+        "pending_visitors": models.get_pending_visitors(),
+    }
+
+
+def run(label, load, count):
+    instrument.stats.clear()
+    start = time.perf_counter()
+    for _ in range(count):
+        started = instrument.start()
+        load()
+        instrument.finish(label, started)
+    elapsed = time.perf_counter() - start
+    queries = instrument.stats[label].queries
+    print(
+        f"  {label:<20} {queries / count:5.2f} queries/load  "
+        f"{elapsed / count * 1e6:7.0f} us/load"
+    )
+
+
+def populate():
+    models.init_db()
+    for i in range(200):
+        models.add_message(f"Guest {i}", "Lovely to drop by")
+    for i in range(500):
+        models.end_visit(models.log_visit(f"Visitor {i}", "chat"))
+    for i in range(20):
+        models.create_pending_visitor(f"Pending {i}", "p@example.com", str(i))
+    models.flush_writes()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    instrument.configure(slow_seconds=float("inf"))
+    models.configure("sqlite", database=database, trace_sql=True)
+    populate()
+
+    print(f"{count} dashboard loads:")
+    run("six calls", six_calls, count)
+    for label, ttl in (("snapshot, uncached", 0), ("snapshot, cached", 60)):
+        models.configure(
+            "sqlite", database=database, trace_sql=True, dashboard_cache_ttl=ttl
+        )
+        run(label, models.get_dashboard, count)
+    models.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare per-call SQLite connects against pooled connection reuse.
+
+The status cache is off, so get_current_status reads SQLite on every call.
+The in-memory storage engine is run last as a no-I/O baseline.
+
+Usage: python benchmarks/bench_db_pool.py [iterations]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: E402
+
+
+def run(label, fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {label:<22} {iterations / elapsed:>10.0f} ops/sec"
+        f"  ({elapsed * 1e6 / iterations:.1f} us/op)"
+    )
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    uncached = {"database": database, "status_cache_ttl": 0}
+    for label, backend, options in (
+        ("per-call connect", "sqlite", {**uncached, "pool_size": 0}),
+        ("pooled", "sqlite", uncached),
+        ("in-memory", "memory", {}),
+    ):
+        models.configure(backend, **options)
+        models.init_db()
+        print(f"{label}:")
+        run(
+            "save_chat_message",
+            lambda i: models.save_chat_message("visitor", "Bench", f"msg {i}", "v1"),
+            iterations,
+        )
+        run("get_current_status", lambda i: models.get_current_status(), iterations)
+    models.close()
+
+
+if __name__ == "__main__":
+    main()
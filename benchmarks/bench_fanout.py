@@ -0,0 +1,94 @@
+"""Socket.IO frames sent per chat event at 10, 100 and 1000 connected visitors.
+
+Every visitor is a Socket.IO test client in its own chat session, plus one
+admin dashboard. For each event the frames received by all clients are
+counted; "broadcast" is the namespace-wide emit every message used to be.
+Uses the in-memory storage engine unless STORAGE_BACKEND is set.
+
+Usage: python benchmarks/bench_fanout.py [clients ...]
+"""
+
+import os
+import sys
+import time
+import warnings
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import app  # noqa: E402
+
+app.create_app()
+
+
+def connect(session_values):
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session.update(session_values)
+    return client, app.socketio.test_client(app.app, flask_test_client=client)
+
+
+def frames(clients):
+    return sum(len(client.get_received()) for client in clients)
+
+
+def measure(label, clients, fire):
+    frames(clients)
+    start = time.perf_counter()
+    fire()
+    elapsed = time.perf_counter() - start
+    count = frames(clients)
+    print(f"  {label:<18} {count:>6} frames  ({elapsed * 1000:6.1f} ms)")
+
+
+def run(count):
+    admin_http, admin = connect({"admin_logged_in": True})
+    admin.emit("join_admin")
+    visitors = []
+    for n in range(count):
+        _, client = connect(
+            {"visitor_id": f"visitor-{n}", "visitor_name": f"Visitor {n}"}
+        )
+        visitors.append(client)
+    _, waiting = connect({"visitor_request_id": 1})
+    clients = [admin, waiting, *visitors]
+
+    print(f"{count} visitors:")
+    measure(
+        "broadcast",
+        clients,
+        lambda: app.socketio.emit("new_message", {"message": "hi"}, namespace="/"),
+    )
+    measure(
+        "visitor message",
+        clients,
+        lambda: visitors[0].emit("send_message", {"message": "hello"}),
+    )
+    measure(
+        "admin message",
+        clients,
+        lambda: admin.emit("send_message", {"message": "hi", "sender": "admin"}),
+    )
+    message_id = app.models.get_chat_cursor() - 1
+    measure(
+        "delete",
+        clients,
+        lambda: admin_http.post(f"/admin/chat/message/{message_id}/delete"),
+    )
+    measure("approval", clients, lambda: admin_http.post("/admin/visitor/1/approve"))
+
+    for client in clients:
+        client.disconnect()
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    app.models.init_db()
+    app.models.create_pending_visitor("Bench", "bench@example.com", "bench")
+    for count in counts:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
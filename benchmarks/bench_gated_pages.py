@@ -0,0 +1,59 @@
+"""SQL statements and time per gated page load (/choose, /room/chat,
+/room/video) and /check-approval poll, with and without the approval cache.
+
+Runs against a throwaway SQLite database with an approved visitor; the
+counts come from the instrumentation's SQL tracing.
+
+Usage: python benchmarks/bench_gated_pages.py [page loads]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+os.environ.setdefault("DATABASE", os.path.join(tempfile.mkdtemp(), "bench.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import app  # noqa: E402
+import instrument  # noqa: E402
+
+app.create_app()
+
+PAGES = ["/choose", "/room/chat", "/room/video", "/check-approval"]
+
+
+def run(label, count, **options):
+    app.models.configure("sqlite", trace_sql=True, **options)
+    app.models.update_status("available", "")
+    client = app.app.test_client()
+    client.post("/request-access", json={"name": "Bench", "email": "b@example.com"})
+    with client.session_transaction() as session:
+        request_id = session["visitor_request_id"]
+    app.models.approve_visitor(request_id)
+
+    instrument.stats.clear()
+    start = time.perf_counter()
+    for n in range(count):
+        response = client.get(PAGES[n % len(PAGES)])
+        assert response.status_code == 200, response.status_code
+    elapsed = time.perf_counter() - start
+    queries = sum(entry.queries for entry in instrument.stats.values())
+    print(
+        f"  {label:<14} {queries / count:5.2f} queries/page  "
+        f"{elapsed / count * 1e6:7.0f} us/page"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    instrument.configure(slow_seconds=float("inf"))
+    print(f"{count} gated page loads:")
+    run("no cache", count, approval_cache_size=0)
+    run("approval cache", count)
+
+
+if __name__ == "__main__":
+    main()
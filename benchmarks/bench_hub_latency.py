@@ -0,0 +1,80 @@
+"""Show that a slow query run through db.py no longer stalls the hub.
+
+A "ping" green thread wakes every 10 ms, standing in for Socket.IO ping
+handling, while another green thread runs a deliberately slow SQLite query,
+first by calling models directly and then through db.call (eventlet tpool).
+Reports the worst delay the pinger saw in each case.
+
+Usage: python benchmarks/bench_hub_latency.py
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+# ruff: noqa: E402
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import models
+
+PING_INTERVAL = 0.01
+
+SLOW_QUERY = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000)
+    SELECT COUNT(*) FROM n
+"""
+
+
+def slow_query():
+    conn = models.get_db()
+    try:
+        return conn.execute(SLOW_QUERY).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def measure(label, run_query):
+    delays = []
+    done = []
+
+    def pinger():
+        while not done:
+            start = time.perf_counter()
+            eventlet.sleep(PING_INTERVAL)
+            delays.append(time.perf_counter() - start - PING_INTERVAL)
+
+    ping = eventlet.spawn(pinger)
+    eventlet.sleep(0.05)
+    start = time.perf_counter()
+    run_query()
+    query_time = time.perf_counter() - start
+    eventlet.sleep(0.05)
+    done.append(True)
+    ping.wait()
+    print(
+        f"  {label:<16} query {query_time * 1000:7.1f} ms, "
+        f"worst ping delay {max(delays) * 1000:7.1f} ms"
+    )
+    return max(delays)
+
+
+def main():
+    models.configure("sqlite", database=os.path.join(tempfile.mkdtemp(), "bench.db"))
+    models.init_db()
+    print(f"Ping every {PING_INTERVAL * 1000:.0f} ms during a slow query:")
+    blocking = measure("models (inline)", slow_query)
+    offloaded = measure("db.call (tpool)", lambda: db.call(slow_query))
+    if offloaded >= blocking / 2:
+        print("✗ offloading did not reduce ping delays")
+        sys.exit(1)
+    print("✓ slow queries no longer delay unrelated pings")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Overhead of the instrumentation layer.
+
+Times a point query plus a 100-row scan on plain and traced pooled SQLite
+connections, inside a traced call, and the cost of instrument.start() and
+finish() around an empty handler.
+
+Usage: python benchmarks/bench_instrument.py [iterations]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrument  # noqa: E402
+from storage.pool import ConnectionPool  # noqa: E402
+
+
+def setup(path):
+    pool = ConnectionPool(path, 1)
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT INTO t (value) VALUES (?)", [("x",)] * 1000)
+    conn.commit()
+    conn.close()
+    pool.close_all()
+
+
+def queries(name, pool, iterations):
+    conn = pool.acquire()
+    started = instrument.start()
+    start = time.perf_counter()
+    for n in range(iterations):
+        conn.execute("SELECT value FROM t WHERE id = ?", (n % 1000 + 1,)).fetchone()
+        conn.execute("SELECT * FROM t LIMIT 100").fetchall()
+    elapsed = time.perf_counter() - start
+    instrument.finish(name, started)
+    conn.close()
+    return elapsed / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    setup(path)
+    instrument.configure(slow_seconds=float("inf"))
+
+    plain = queries("plain", ConnectionPool(path, 1), iterations)
+    traced = queries("traced", ConnectionPool(path, 1, traced=True), iterations)
+    print("point query + 100-row scan:")
+    print(f"  plain connection   {plain * 1e6:7.1f} us")
+    print(f"  traced connection  {traced * 1e6:7.1f} us  (+{(traced / plain - 1):.0%})")
+    counted = instrument.stats["traced"]
+    print(f"  counted {counted.queries} queries, {counted.rows} rows")
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        instrument.finish("empty", instrument.start())
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"start() + finish() per call: {elapsed * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""One client flooding send_message, with and without rate limits.
+
+A flooding visitor emits messages back to back while a second visitor,
+within its limits, sends one every 400 flood messages; reports how many
+messages of each reached the database, the time spent handling the flood and
+the second visitor's send_message latency. Runs against a throwaway SQLite
+database, with RATE_LIMIT_MAX_DELAY 0 so over-limit events are dropped
+rather than slept on. Also times TokenBuckets.reserve() with 10k tracked keys.
+
+Usage: python benchmarks/bench_ratelimit.py [flood messages]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+workdir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE", os.path.join(workdir, "bench.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import app  # noqa: E402
+import ratelimit  # noqa: E402
+
+app.create_app()
+
+
+def connect(n):
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session.update({"visitor_id": f"visitor-{n}", "visitor_name": f"V{n}"})
+    return app.socketio.test_client(app.app, flask_test_client=client)
+
+
+def flood(count, limits):
+    ratelimit.configure(limits, max_delay=0)
+    flooder, victim = connect(1), connect(2)
+    latencies = []
+    start = time.perf_counter()
+    for n in range(count):
+        flooder.emit("send_message", {"message": f"spam {n}"})
+        if n % 400 == 0:
+            sent = time.perf_counter()
+            victim.emit("send_message", {"message": f"hello {n}"})
+            latencies.append(time.perf_counter() - sent)
+    app.models.flush_writes()
+    elapsed = time.perf_counter() - start
+    flooded = len(app.models.get_visitor_chat_messages("visitor-1", count))
+    delivered = len(app.models.get_visitor_chat_messages("visitor-2", count))
+    latencies.sort()
+    label = "limited" if limits else "unlimited"
+    print(
+        f"  {label:<10} {flooded:>5} flood writes  {elapsed * 1000:7.0f} ms  "
+        f"victim {delivered}/{len(latencies)} sent, "
+        f"p50 {statistics.median(latencies) * 1000:.2f} ms"
+    )
+    app.models.clear_all_chat_messages()
+    flooder.disconnect()
+    victim.disconnect()
+
+
+def reserve_cost():
+    buckets = ratelimit.TokenBuckets(1, 5, max_keys=10_000)
+    keys = [f"key-{n}" for n in range(20_000)]
+    start = time.perf_counter()
+    for key in keys * 5:
+        buckets.reserve(key)
+    elapsed = (time.perf_counter() - start) / (len(keys) * 5)
+    print(f"TokenBuckets.reserve: {elapsed * 1e6:.2f} us ({len(buckets)} keys kept)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{count} flood messages:")
+    flood(count, {})
+    flood(count, app.app.config["RATE_LIMITS"])
+    print(ratelimit.metrics())
+    reserve_cost()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Memory and lookup cost of tracking connected sockets.
+
+Compares the old active_connections layout (one dict per socket with ISO
+timestamp strings) against the memory engine's ConnectionRegistry of slotted
+records, including its visitor and visit id indexes, for 10k simulated sids
+where every fourth visitor has a second tab open.
+
+Usage: python benchmarks/bench_registry.py [sids]
+"""
+
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.memory import Connection, ConnectionRegistry  # noqa: E402
+
+
+def simulated(count):
+    """(sid, visitor_id, visitor_name, visit_id) for ``count`` sockets"""
+    sockets = []
+    visitor = 0
+    for n in range(count):
+        if n % 5 != 4:  # otherwise a second tab of the previous visitor
+            visitor += 1
+        sockets.append(
+            (os.urandom(10).hex(), f"{visitor:032x}", f"Visitor {visitor}", n + 1)
+        )
+    return sockets
+
+
+def build_dicts(sockets):
+    connections = {}
+    for sid, visitor_id, visitor_name, visit_id in sockets:
+        connections[sid] = {
+            "visitor_id": visitor_id,
+            "visitor_name": visitor_name,
+            "connected_at": datetime.datetime.now().isoformat(),
+            "sid": sid,
+            "visit_id": visit_id,
+        }
+    return connections
+
+
+def build_registry(sockets):
+    registry = ConnectionRegistry()
+    for sid, visitor_id, visitor_name, visit_id in sockets:
+        registry.add(
+            Connection(sid, "worker", visitor_id, visitor_name, time.time(), visit_id)
+        )
+    return registry
+
+
+def measure(label, build, sockets):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(sockets)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(
+        f"  {label:<22} {size / 1024:>8.0f} KiB  "
+        f"({size / len(sockets):.0f} bytes/connection)"
+    )
+    return result
+
+
+def timed(label, fn, repeat=1000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<22} {elapsed * 1e6:>8.1f} us")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    # Strings are built up front so both layouts share them, as they would
+    # share the session's visitor id and name
+    sockets = simulated(count)
+    print(f"{count} connections:")
+    dicts = measure("dict per connection", build_dicts, sockets)
+    registry = measure("ConnectionRegistry", build_registry, sockets)
+    print(f"  {registry.visitor_count()} distinct visitors")
+
+    _, visitor_id, _, visit_id = sockets[count // 2]
+    print("Tabs of one visitor:")
+    timed(
+        "scan of the dicts",
+        lambda: [c for c in dicts.values() if c["visitor_id"] == visitor_id],
+        repeat=100,
+    )
+    timed("registry.by_visitor", lambda: registry.by_visitor(visitor_id))
+
+    print("Socket of one visit:")
+    timed(
+        "scan of the dicts",
+        lambda: next(c for c in dicts.values() if c["visit_id"] == visit_id),
+        repeat=100,
+    )
+    timed("registry.by_visit", lambda: registry.by_visit(visit_id))
+
+
+if __name__ == "__main__":
+    main()
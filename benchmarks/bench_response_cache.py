@@ -0,0 +1,83 @@
+"""Requests per second on / and /api/status with and without the response cache.
+
+"uncached" serves the undecorated views from extra routes, rendering and
+encoding on every request as before; "cached" is the real route without an
+If-None-Match header (stored body); "304" is a browser revalidating. Runs
+in-process through Flask's test client, against a throwaway SQLite
+database, so the numbers are the app's own cost without network or WSGI
+server overhead; the test client's own cost is most of each request, so
+the time spent in the view alone is shown too.
+
+Usage: python benchmarks/bench_response_cache.py [seconds per round]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+os.environ.setdefault("DATABASE", os.path.join(tempfile.mkdtemp(), "bench.db"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import app  # noqa: E402
+import instrument  # noqa: E402
+
+app.create_app()
+
+ROUNDS = 5
+
+app.app.add_url_rule("/uncached/", "uncached_index", app.index.__wrapped__)
+app.app.add_url_rule("/uncached/status", "uncached_status", app.api_status.__wrapped__)
+
+
+def rate(client, path, seconds, headers=None):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        response = client.get(path, headers=headers)
+        assert response.status_code in (200, 304), response.status_code
+        count += 1
+    return count / seconds
+
+
+def view_time(path, view, iterations=2000, headers=None):
+    """Microseconds per call of ``view`` alone, encoded into a response"""
+    with app.app.test_request_context(path, headers=headers):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            app.app.make_response(view())
+        return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    instrument.configure(slow_seconds=float("inf"))
+    app.models.update_status("available", "Come on in")
+    client = app.app.test_client()
+    for path, uncached in (("/", "/uncached/"), ("/api/status", "/uncached/status")):
+        tag = client.get(path).headers["ETag"]
+        before = after = revalidated = 0
+        # Interleaved rounds, best of each, to keep machine noise out
+        for _ in range(ROUNDS):
+            before = max(before, rate(client, uncached, seconds))
+            after = max(after, rate(client, path, seconds))
+            revalidated = max(
+                revalidated, rate(client, path, seconds, {"If-None-Match": tag})
+            )
+        view = app.app.view_functions[app.app.url_map.bind("").match(path)[0]]
+        times = (
+            view_time(path, view.__wrapped__),
+            view_time(path, view),
+            view_time(path, view, headers={"If-None-Match": tag}),
+        )
+        print(f"{path}")
+        for label, requests, us in zip(
+            ("uncached", "cached", "304"), (before, after, revalidated), times
+        ):
+            print(f"  {label:<9}{requests:7.0f} req/s{us:9.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
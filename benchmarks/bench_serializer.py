@@ -0,0 +1,88 @@
+"""Size and encode time of a chat history payload, 100 and 1000 messages.
+
+"Flask default" is Flask's own provider (sorted keys, ASCII escapes) and
+"stdlib" the compact json.dumps() Socket.IO used; "orjson" is
+serializer.dumps() with orjson installed. "packed" encodes the messages with
+serializer.pack_messages() first, its time included. Times are the best of
+ROUNDS; sizes are also shown gzipped, as a compressing proxy would send them.
+
+Usage: python benchmarks/bench_serializer.py [counts ...]
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import serializer  # noqa: E402
+
+ROUNDS = 50
+NAMES = ["Amélie", "Bob", "Chidi", "Dana", "admin"]
+
+
+def history(count):
+    messages = []
+    for i in range(count):
+        sender_name = NAMES[i % len(NAMES)]
+        messages.append(
+            {
+                "id": i + 1,
+                "sender": "admin" if sender_name == "admin" else "visitor",
+                "sender_name": sender_name,
+                "message": f"Message {i}: thanks for dropping by, how are you?",
+                "visitor_id": None if sender_name == "admin" else f"v-{i % 4}",
+                "created_at": f"2024-05-01 12:{i // 60 % 60:02d}:{i % 60:02d}",
+            }
+        )
+    return messages
+
+
+def best(encode, messages):
+    payload = {"cursor": len(messages), "chat_history": messages}
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        text = encode(payload)
+        times.append(time.perf_counter() - start)
+    return min(times), text.encode()
+
+
+def packed(payload):
+    messages = serializer.pack_messages(payload["chat_history"])
+    return {**payload, "chat_history": messages}
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000]
+    flask_default = DefaultJSONProvider(Flask(__name__))
+    compact = {"separators": (",", ":")}
+    encoders = [
+        ("objects, Flask default", lambda p: flask_default.dumps(p, **compact)),
+        ("objects, stdlib", lambda p: json.dumps(p, **compact)),
+        ("packed, stdlib", lambda p: json.dumps(packed(p), **compact)),
+    ]
+    if serializer.orjson is not None:
+        encoders += [
+            ("objects, orjson", serializer.dumps),
+            ("packed, orjson", lambda p: serializer.dumps(packed(p))),
+        ]
+
+    for count in counts:
+        messages = history(count)
+        print(f"{count} messages:{'bytes':>24}{'gzipped':>10}{'encode':>12}")
+        for label, encode in encoders:
+            seconds, data = best(encode, messages)
+            print(
+                f"  {label:<24}{len(data):9d}{len(gzip.compress(data)):10d}"
+                f"{seconds * 1e6:9.0f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
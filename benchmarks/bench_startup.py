@@ -0,0 +1,128 @@
+"""Cold start: time from launching Python to the first answered request.
+
+Each run is a fresh interpreter under ``python -X importtime`` that imports
+app, calls create_app() and serves GET /api/status through the test client,
+timing each phase; the wall time also covers the interpreter's own start.
+"new database" starts from an empty file, so every migration runs;
+"existing database" is what a restart sees, where only the schema version
+is read. Prints the median of the runs and the slowest imports of the last
+one, third-party packages by cumulative time and this repo's own modules by
+self time.
+
+``--no-greendns`` adds runs with EVENTLET_NO_GREENDNS=yes, which skips
+loading dnspython but resolves names (the trivia API) with blocking calls.
+
+Usage: python benchmarks/bench_startup.py [runs] [--no-greendns]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OWN = {
+    os.path.splitext(name)[0]
+    for name in os.listdir(ROOT)
+    if name.endswith(".py") or name in ("games", "storage")
+}
+PHASES = ["import", "create_app", "first request", "wall"]
+
+CODE = """
+import json, os, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+response = app.app.test_client().get("/api/status")
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps([imported - start, created - imported, served - created]))
+os._exit(0)
+"""
+
+
+def launch(database, extra_env=None):
+    """Phase times in seconds and the -X importtime report of one start"""
+    env = dict(
+        os.environ, DATABASE=database, PYTHONWARNINGS="ignore", **(extra_env or {})
+    )
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(result.stderr[-2000:])
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    return phases + [wall], result.stderr
+
+
+def parse(report):
+    """[(module, self us, cumulative us, depth)] from -X importtime output"""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative), depth))
+    return rows
+
+
+def measure(label, runs, fresh, extra_env=None):
+    workdir = tempfile.mkdtemp()
+    existing = os.path.join(workdir, "existing.db")
+    if not fresh:
+        launch(existing, extra_env)  # migrate once, as a previous start would
+    samples = []
+    for n in range(runs):
+        database = os.path.join(workdir, f"new-{n}.db") if fresh else existing
+        phases, report = launch(database, extra_env)
+        samples.append(phases)
+    medians = [statistics.median(column) for column in zip(*samples)]
+    print(f"  {label:<32}" + "".join(f"{value * 1000:14.0f}" for value in medians))
+    return report
+
+
+def show_imports(report, count=8):
+    rows = parse(report)
+    top = [row for row in rows if row[3] <= 1 and row[0].split(".")[0] not in OWN]
+    top.sort(key=lambda row: -row[2])
+    print("\nSlowest third-party imports (cumulative ms):")
+    for name, _, cumulative, _ in top[:count]:
+        print(f"  {name:<40}{cumulative / 1000:7.1f}")
+    own = [row for row in rows if row[0].split(".")[0] in OWN]
+    own.sort(key=lambda row: -row[1])
+    total = sum(row[1] for row in own) / 1000
+    print(f"\nThis repo's modules (self ms, {total:.1f} in total; app's includes")
+    print("eventlet.monkey_patch()):")
+    for name, self_us, _, _ in own[:count]:
+        print(f"  {name:<40}{self_us / 1000:7.1f}")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    runs = int(args[0]) if args else 5
+    cases = [("new database", True, None), ("existing database", False, None)]
+    if "--no-greendns" in sys.argv[1:]:
+        no_greendns = {"EVENTLET_NO_GREENDNS": "yes"}
+        cases.append(("existing database, no greendns", False, no_greendns))
+
+    header = f"Median of {runs} starts (ms):"
+    print(f"{header:<34}" + "".join(f"{phase:>14}" for phase in PHASES))
+    reports = [measure(label, runs, *case) for label, *case in cases]
+    show_imports(reports[1])
+
+
+if __name__ == "__main__":
+    main()
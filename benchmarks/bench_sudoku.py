@@ -0,0 +1,111 @@
+"""Sudoku puzzles per second: the list-scanning recursive solver
+generate_sudoku() used to have against games.sudoku_solver.
+
+"generate" is generate_sudoku("hard") end to end, the old version copied
+below. "solve" solves the generated hard puzzles again, the old way with its
+is_valid() in fixed digit order, and "count" checks them for uniqueness with
+count_solutions(). Each case runs for the given number of seconds.
+
+Usage: python benchmarks/bench_sudoku.py [seconds]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from games import sudoku_generator, sudoku_solver  # noqa: E402
+
+
+def is_valid(grid, row, col, num):
+    if num in grid[row]:
+        return False
+    if num in [grid[i][col] for i in range(9)]:
+        return False
+    br, bc = 3 * (row // 3), 3 * (col // 3)
+    for i in range(br, br + 3):
+        for j in range(bc, bc + 3):
+            if grid[i][j] == num:
+                return False
+    return True
+
+
+def old_solve(grid, digits=lambda: random.sample(range(1, 10), 9)):
+    for i in range(9):
+        for j in range(9):
+            if grid[i][j] == 0:
+                for num in digits():
+                    if is_valid(grid, i, j, num):
+                        grid[i][j] = num
+                        if old_solve(grid, digits):
+                            return True
+                        grid[i][j] = 0
+                return False
+    return True
+
+
+def old_generate(difficulty="medium"):
+    grid = [[0] * 9 for _ in range(9)]
+    for box in range(0, 9, 3):
+        nums = random.sample(range(1, 10), 9)
+        for i in range(3):
+            for j in range(3):
+                grid[box + i][box + j] = nums[i * 3 + j]
+
+    old_solve(grid)
+    solution = [row[:] for row in grid]
+
+    cells_to_remove = {"easy": 30, "medium": 40, "hard": 50}.get(difficulty, 40)
+    cells = [(i, j) for i in range(9) for j in range(9)]
+    random.shuffle(cells)
+    for i in range(cells_to_remove):
+        grid[cells[i][0]][cells[i][1]] = 0
+
+    return {"puzzle": grid, "solution": solution}
+
+
+def rate(work, seconds):
+    """Calls of work(n) per second, for ``seconds``"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        work(count)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    random.seed(1)
+    puzzles = [sudoku_generator.generate_sudoku("hard")["puzzle"] for _ in range(200)]
+
+    def in_order():
+        return range(1, 10)
+
+    cases = [
+        (
+            "generate",
+            lambda n: old_generate("hard"),
+            lambda n: sudoku_generator.generate_sudoku("hard"),
+        ),
+        (
+            "solve",
+            lambda n: old_solve([row[:] for row in puzzles[n % 200]], in_order),
+            lambda n: sudoku_solver.solve(puzzles[n % 200]),
+        ),
+        (
+            "count",
+            None,
+            lambda n: sudoku_solver.count_solutions(puzzles[n % 200]),
+        ),
+    ]
+    print(f"Hard puzzles per second:{'before':>12}{'after':>12}")
+    for label, before, after in cases:
+        old = f"{rate(before, seconds):12.0f}" if before else f"{'-':>12}"
+        print(f"  {label:<22}{old}{rate(after, seconds):12.0f}")
+
+
+if __name__ == "__main__":
+    main()
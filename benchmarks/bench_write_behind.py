@@ -0,0 +1,61 @@
+"""Chat message throughput with 100 concurrent simulated visitors.
+
+Each visitor is an eventlet green thread, as in the real app, that saves
+chat messages back to back. Runs once with synchronous writes
+(write_behind=False) and once through the group-commit writer.
+
+Usage: python benchmarks/bench_write_behind.py [visitors] [messages_each]
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+# ruff: noqa: E402
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+
+
+def visitor(n, messages):
+    visitor_id = f"visitor-{n}"
+    for i in range(messages):
+        models.save_chat_message("visitor", f"Visitor {n}", f"message {i}", visitor_id)
+
+
+def run(label, visitors, messages):
+    pool = eventlet.GreenPool(visitors)
+    start = time.perf_counter()
+    for n in range(visitors):
+        pool.spawn(visitor, n, messages)
+    pool.waitall()
+    elapsed = time.perf_counter() - start
+    total = visitors * messages
+    print(f"  {label:<14} {total / elapsed:>10.0f} messages/sec ({total} in {elapsed:.2f}s)")
+
+
+def main():
+    visitors = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    print(f"{visitors} visitors x {messages} messages:")
+    models.configure("sqlite", database=database, write_behind=False)
+    models.init_db()
+    run("synchronous", visitors, messages)
+    storage = models.configure("sqlite", database=database)
+    run("write-behind", visitors, messages)
+    if storage._writer is not None:
+        print(
+            f"  {storage._writer.writes} writes in {storage._writer.batches} "
+            "transactions"
+        )
+
+
+if __name__ == "__main__":
+    main()
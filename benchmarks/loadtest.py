@@ -0,0 +1,422 @@
+"""Load test: simulated visitors and an admin against a local instance.
+
+Every visitor runs the real flow over HTTP and Socket.IO:
+- POST /request-access
+- wait on /check-approval while the admin approves it
+- open /room/chat and connect its socket
+- send_message at --rate per second, timing each message's echo
+- disconnect
+
+One admin logs in, sets the status to available, approves requests as they
+come in and watches the admin room.
+
+Reports connect latency, message round-trip percentiles, approval time,
+server CPU time and database growth, then the server's own per-handler
+percentiles from /admin/metrics. Exits with status 1 if a --max-* gate is
+exceeded, so a release can be gated on it.
+
+Without --url a server is started on localhost with a throwaway database and
+TRUSTED_PROXIES=1. Each visitor gets its own X-Forwarded-For address, so
+per-IP rate limits apply per visitor, as they would in production. With
+--url, pass --server-pid and --database to get CPU and database figures.
+
+Usage:
+  python benchmarks/loadtest.py --visitors 50 --messages 10 --rate 0.5
+  python benchmarks/loadtest.py --url http://127.0.0.1:5000 \\
+      --admin-password secret --server-pid 1234 --database welcome_window.db
+"""
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+import socketio
+
+try:
+    import websocket  # noqa: F401
+except ImportError:  # websocket-client is optional for python-socketio
+    TRANSPORTS = ["polling"]
+else:
+    TRANSPORTS = ["polling", "websocket"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentiles(values):
+    """p50/p95/p99/max in milliseconds of ``values`` (seconds)"""
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def rank(q):
+        return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+    return {
+        "count": len(values),
+        "p50_ms": round(rank(50) * 1000, 1),
+        "p95_ms": round(rank(95) * 1000, 1),
+        "p99_ms": round(rank(99) * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1),
+    }
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of ``pid`` (Linux only), or None"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def database_size(path):
+    """Bytes of the database file plus its WAL and shared-memory files"""
+    if not path:
+        return None
+    return sum(
+        os.path.getsize(path + suffix)
+        for suffix in ("", "-wal", "-shm")
+        if os.path.exists(path + suffix)
+    )
+
+
+def cookie_header(session):
+    return "; ".join(f"{name}={value}" for name, value in session.cookies.items())
+
+
+def start_server(port, workdir, admin_password):
+    env = dict(
+        os.environ,
+        DATABASE=os.path.join(workdir, "loadtest.db"),
+        SECRET_KEY=uuid.uuid4().hex,
+        ADMIN_PASSWORD=admin_password,
+        TRUSTED_PROXIES="1",
+        PYTHONPATH=ROOT,
+        PYTHONWARNINGS="ignore",
+    )
+    code = (
+        "import app; app.socketio.run(app.create_app(), "
+        f"host='127.0.0.1', port={port}, log_output=False)"
+    )
+    log = open(os.path.join(workdir, "server.log"), "w")
+    server = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=workdir, env=env, stdout=log, stderr=log
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited, see {log.name}")
+        try:
+            requests.get(url + "/api/status", timeout=1)
+            return server, url, env["DATABASE"]
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.approval = []
+        self.connect = []
+        self.round_trip = []
+        self.lost = 0
+        self.rate_limited = 0
+        self.errors = []
+
+    def add(self, name, value):
+        with self.lock:
+            getattr(self, name).append(value)
+
+    def count(self, name, n=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + n)
+
+
+class Admin:
+    """Logged-in admin: approves load-test requests and watches the admin room"""
+
+    def __init__(self, url, username, password):
+        self.url = url
+        self.http = requests.Session()
+        response = self.http.post(
+            url + "/admin/login", data={"username": username, "password": password}
+        )
+        if not self.http.cookies or "/admin/login" in response.url:
+            raise RuntimeError("Admin login failed, check --admin-password")
+        self.http.post(
+            url + "/admin/status/update", json={"status": "available", "message": ""}
+        )
+        self.frames = {}
+        self.socket = socketio.Client(reconnection=False)
+        self.socket.on("*", self._frame)
+        self.socket.connect(
+            url, headers={"Cookie": cookie_header(self.http)}, transports=TRANSPORTS
+        )
+        self.socket.emit("join_admin")
+        self.waiting = queue.Queue()
+        self.stopped = threading.Event()
+
+    def _frame(self, event, data=None):
+        self.frames[event] = self.frames.get(event, 0) + 1
+
+    def approve_forever(self):
+        """Approve the email addresses put on ``waiting`` as they show up"""
+        wanted = set()
+        while not self.stopped.is_set():
+            while not self.waiting.empty():
+                wanted.add(self.waiting.get())
+            if wanted:
+                pending = self.http.get(self.url + "/admin/pending-visitors").json()
+                for visitor in pending:
+                    if visitor["email"] in wanted:
+                        self.http.post(
+                            f"{self.url}/admin/visitor/{visitor['id']}/approve"
+                        )
+                        wanted.discard(visitor["email"])
+            time.sleep(0.1)
+
+    def close(self):
+        self.stopped.set()
+        self.socket.disconnect()
+
+
+def visitor(n, url, admin, args, results):
+    """One simulated visitor, start to finish"""
+    address = f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256 + 1}"
+    http = requests.Session()
+    http.headers["X-Forwarded-For"] = address
+    email = f"loadtest-{n}-{uuid.uuid4().hex[:8]}@example.com"
+    try:
+        started = time.perf_counter()
+        response = http.post(
+            url + "/request-access", json={"name": f"Load {n}", "email": email}
+        )
+        response.raise_for_status()
+        admin.waiting.put(email)
+        deadline = time.monotonic() + args.timeout
+        while not http.get(url + "/check-approval").json()["approved"]:
+            if time.monotonic() > deadline:
+                raise TimeoutError("not approved in time")
+            time.sleep(0.1)
+        results.add("approval", time.perf_counter() - started)
+        http.get(url + "/room/chat").raise_for_status()
+
+        client = socketio.Client(reconnection=False)
+        established = threading.Event()
+        sent = {}
+        limited = []  # messages the server dropped for going over its rate
+        echoed = threading.Condition()
+
+        def on_message(data):
+            sent_at = sent.pop(data.get("message"), None)
+            if sent_at is not None:
+                results.add("round_trip", time.perf_counter() - sent_at)
+                with echoed:
+                    echoed.notify_all()
+
+        def on_rate_limited(data):
+            limited.append(data)
+            with echoed:
+                echoed.notify_all()
+
+        client.on("connection_established", lambda data: established.set())
+        client.on("new_message", on_message)
+        client.on("rate_limited", on_rate_limited)
+        started = time.perf_counter()
+        client.connect(
+            url,
+            headers={"Cookie": cookie_header(http), "X-Forwarded-For": address},
+            transports=TRANSPORTS,
+            wait_timeout=args.timeout,
+        )
+        if not established.wait(args.timeout):
+            raise TimeoutError("no connection_established")
+        results.add("connect", time.perf_counter() - started)
+
+        for seq in range(args.messages):
+            text = f"load test {n}-{seq}"
+            sent[text] = time.perf_counter()
+            client.emit("send_message", {"message": text})
+            time.sleep(1 / args.rate if args.rate else 0)
+        with echoed:
+            echoed.wait_for(lambda: len(sent) <= len(limited), timeout=args.timeout)
+        results.count("rate_limited", len(limited))
+        results.count("lost", max(0, len(sent) - len(limited)))
+        client.disconnect()
+    except Exception as e:
+        results.add("errors", f"visitor {n}: {e}")
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    server = None
+    url, pid, database = args.url, args.server_pid, args.database
+    if not url:
+        server, url, database = start_server(args.port, workdir, args.admin_password)
+        pid = server.pid
+    try:
+        admin = Admin(url, args.admin_user, args.admin_password)
+        approver = threading.Thread(target=admin.approve_forever, daemon=True)
+        approver.start()
+
+        results = Results()
+        db_before = database_size(database)
+        cpu_before = cpu_seconds(pid) if pid else None
+        started = time.perf_counter()
+        threads = []
+        for n in range(args.visitors):
+            thread = threading.Thread(
+                target=visitor, args=(n, url, admin, args, results), daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+            time.sleep(args.ramp / args.visitors)
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        time.sleep(1)  # let the last admin batch arrive
+        cpu_after = cpu_seconds(pid) if pid else None
+        server_metrics = admin.http.get(url + "/admin/metrics").json()
+        admin.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "visitors": args.visitors,
+        "messages_per_visitor": args.messages,
+        "rate_per_visitor": args.rate,
+        "transports": TRANSPORTS,
+        "elapsed_s": round(elapsed, 1),
+        "approval": percentiles(results.approval),
+        "connect": percentiles(results.connect),
+        "round_trip": percentiles(results.round_trip),
+        "lost_messages": results.lost,
+        "rate_limited": results.rate_limited,
+        "errors": results.errors,
+        "admin_frames": admin.frames,
+        "server_cpu_s": None,
+        "db_growth_bytes": None,
+        "server_handlers": {
+            name: stats
+            for name, stats in server_metrics.get("handlers", {}).items()
+            if name.startswith("socket ")
+        },
+    }
+    if cpu_before is not None and cpu_after is not None:
+        report["server_cpu_s"] = round(cpu_after - cpu_before, 2)
+        report["server_cpu_percent"] = round(
+            (cpu_after - cpu_before) / elapsed * 100, 1
+        )
+    if db_before is not None:
+        report["db_growth_bytes"] = database_size(database) - db_before
+    return report
+
+
+def print_report(report):
+    print(
+        f"{report['visitors']} visitors x {report['messages_per_visitor']} messages "
+        f"at {report['rate_per_visitor']}/s in {report['elapsed_s']} s "
+        f"({'/'.join(report['transports'])})"
+    )
+    for name in ("approval", "connect", "round_trip"):
+        stats = report[name]
+        if stats["count"]:
+            print(
+                f"  {name:<11} p50 {stats['p50_ms']:>7} ms  p95 {stats['p95_ms']:>7} ms"
+                f"  p99 {stats['p99_ms']:>7} ms  max {stats['max_ms']:>7} ms"
+                f"  (n={stats['count']})"
+            )
+    print(
+        f"  lost messages {report['lost_messages']}, "
+        f"rate limited {report['rate_limited']}, errors {len(report['errors'])}"
+    )
+    if report["server_cpu_s"] is not None:
+        print(
+            f"  server CPU {report['server_cpu_s']} s "
+            f"({report['server_cpu_percent']}% of one core)"
+        )
+    if report["db_growth_bytes"] is not None:
+        print(f"  database grew {report['db_growth_bytes'] / 1024:.0f} KiB")
+    print(f"  admin frames {report['admin_frames']}")
+    for name, stats in report["server_handlers"].items():
+        print(
+            f"  server {name:<22} p50 {stats['p50_ms']} ms  p99 {stats['p99_ms']} ms"
+            f"  {stats['queries_per_call']} queries/call"
+        )
+    for error in report["errors"][:10]:
+        print(f"  error: {error}")
+
+
+def gate(report, args):
+    """Reasons the run fails the --max-* gates"""
+    failures = []
+    checks = [
+        ("connect p99", report["connect"].get("p99_ms"), args.max_connect_p99),
+        ("round trip p99", report["round_trip"].get("p99_ms"), args.max_rtt_p99),
+    ]
+    for label, value, limit in checks:
+        if limit is not None and (value is None or value > limit):
+            failures.append(f"{label} {value} ms > {limit} ms")
+    errors = len(report["errors"]) + report["lost_messages"]
+    if errors > args.max_errors:
+        failures.append(f"{errors} errors or lost messages > {args.max_errors}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--visitors", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=10, help="per visitor")
+    parser.add_argument(
+        "--rate", type=float, default=0.5, help="messages per second per visitor"
+    )
+    parser.add_argument(
+        "--ramp", type=float, default=2.0, help="seconds to start all visitors"
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--url", help="existing server (default: start one)")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--server-pid", type=int, help="with --url, for CPU time")
+    parser.add_argument("--database", help="with --url, for database growth")
+    parser.add_argument(
+        "--admin-user", default=os.environ.get("ADMIN_USERNAME", "admin")
+    )
+    parser.add_argument(
+        "--admin-password", default=os.environ.get("ADMIN_PASSWORD", "loadtest")
+    )
+    parser.add_argument("--max-connect-p99", type=float, help="gate, ms")
+    parser.add_argument("--max-rtt-p99", type=float, help="gate, ms")
+    parser.add_argument(
+        "--max-errors", type=int, default=0, help="gate on errors + lost messages"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    failures = gate(report, args)
+    report["failures"] = failures
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        for failure in failures:
+            print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
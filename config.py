@@ -8,7 +8,11 @@ class Config:
     # Basic Flask config
     SECRET_KEY = os.environ.get("SECRET_KEY") or "dev-secret-key-change-in-production"
 
-    # Database
+    # Database. STORAGE_BACKEND is "sqlite" or "memory" (nothing persisted);
+    # STORAGE_OPTIONS are passed to the engine, e.g. {"pool_size": 0}.
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND") or "sqlite"
+    DATABASE = os.environ.get("DATABASE") or "welcome_window.db"
+    STORAGE_OPTIONS = {}
     SQLALCHEMY_DATABASE_URI = "sqlite:///welcome_window.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
@@ -19,6 +23,45 @@ class Config:
     SOCKETIO_PING_TIMEOUT = 60
     SOCKETIO_PING_INTERVAL = 25
 
+    # Scale-out. With a message queue several worker processes can serve the
+    # app behind a proxy with sticky sessions: emits reach every worker's
+    # sockets and presence is shared through the database. "sqlite:///path"
+    # uses the SQLite-backed queue in socketqueue.py; other URLs (e.g.
+    # "redis://localhost:6379/0") are handed to Flask-SocketIO.
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+    PRESENCE_HEARTBEAT = 10  # seconds; dead workers are pruned after 3 missed
+    # Send the chat history on connect as field names plus a row of values
+    # per message (see serializer.pack_messages) instead of one object each
+    COMPACT_CHAT_HISTORY = True
+
+    # Visitor joins/leaves, guestbook notes and game requests reach the admin
+    # dashboard as one batch per interval (seconds); 0 sends each at once.
+    # New access requests are always sent immediately.
+    ADMIN_EVENT_INTERVAL = 1.0
+
+    # Rate limits: per event, a (tokens per second, burst) bucket for each of
+    # the socket ("sid"), the visitor's session and the client IP. Callers
+    # just over the rate wait up to RATE_LIMIT_MAX_DELAY seconds; the rest
+    # get 429 (HTTP) or a rate_limited event (sockets). Admins are exempt.
+    RATE_LIMITS = {
+        "send_message": {"sid": (1, 5), "session": (1, 8), "ip": (5, 30)},
+        "request_game": {"sid": (0.2, 3), "session": (0.2, 3)},
+        "request_access": {"ip": (0.05, 5)},
+        "guestbook": {"session": (0.1, 3), "ip": (0.2, 10)},
+    }
+    RATE_LIMIT_MAX_DELAY = 0.5
+    RATE_LIMIT_MAX_KEYS = 10000
+    # Proxies in front of the app (e.g. 1 behind Caddy) whose X-Forwarded-For
+    # is trusted, so per-IP limits see the client rather than the proxy. At 0,
+    # requests from loopback (likely a proxy) skip the per-IP limits
+    TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES") or 0)
+
+    # Instrumentation: every view and socket handler is timed (p50/p95/p99 in
+    # /admin/metrics); TRACE_SQL also counts its SQL statements and rows, and
+    # calls slower than SLOW_REQUEST_SECONDS are logged.
+    TRACE_SQL = True
+    SLOW_REQUEST_SECONDS = 0.5
+
     # Admin credentials (change these!)
     ADMIN_USERNAME = os.environ.get("ADMIN_USERNAME") or "admin"
     ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD") or "changeme123"
@@ -28,6 +71,18 @@ class Config:
     LOG_VISITS = True
     MAX_MESSAGE_LENGTH = 500
 
+    # Data retention, run in the background every RETENTION_INTERVAL seconds
+    # (0 disables it). availability keeps its latest row plus audit_days of
+    # history; older rows of the other tables are archived or deleted.
+    RETENTION_INTERVAL = 3600
+    RETENTION_BATCH_SIZE = 500
+    RETENTION = {
+        "availability": {"audit_days": 30},
+        "visits": {"archive_after_days": 90},
+        "pending_visitors": {"archive_after_days": 30},
+        "chat_tombstones": {"delete_after_days": 7},
+    }
+
     # Site info
     SITE_NAME = "Diane's Welcome Window"
     SITE_TAGLINE = "Drop by for a chat when the light is on"
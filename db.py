@@ -0,0 +1,80 @@
+"""Non-blocking access to models.py from eventlet green threads.
+
+sqlite3 is a C extension, so under eventlet every models call blocks the
+whole hub, and with it every websocket client, until SQLite returns. This
+module exposes the same functions as models.py but runs them on eventlet's
+native thread pool (tpool), at most MAX_CONCURRENCY at a time. Calls the
+storage engine says cannot block the hub (Storage.blocks), such as writes
+queued for the write-behind writer, run inline.
+
+Without eventlet monkey patching (scripts, the CLI tools) calls run inline.
+
+Offloaded calls run on native threads while the hub keeps serving, so any
+state both sides touch is guarded by real locks (storage.pool's
+native_threading), never the green ones monkey patching puts in threading.
+"""
+
+import contextvars
+import functools
+
+import models
+
+try:
+    from eventlet import patcher, semaphore, tpool
+except ImportError:  # pragma: no cover - eventlet is in requirements.txt
+    patcher = None
+
+# Native threads allowed into SQLite at once. Green threads beyond this wait
+# on a green semaphore, so they never hold a native thread while queued.
+MAX_CONCURRENCY = 4
+
+_slots = None
+
+
+def offloading():
+    """True when calls are run on native threads"""
+    return (
+        patcher is not None
+        and patcher.is_monkey_patched("thread")
+        and models.get_storage().blocking
+    )
+
+
+def call(fn, *args, **kwargs):
+    """Run ``fn`` off the hub and return its result (or raise its error)"""
+    if not offloading():
+        return fn(*args, **kwargs)
+    return offload(fn, *args, **kwargs)
+
+
+def offload(fn, *args, **kwargs):
+    """Like call(), for blocking work outside the storage engine (e.g. the
+    SQLite message queue): off the hub whenever eventlet is patched"""
+    global _slots
+    if patcher is None or not patcher.is_monkey_patched("thread"):
+        return fn(*args, **kwargs)
+    if _slots is None:
+        _slots = semaphore.Semaphore(MAX_CONCURRENCY)
+    with _slots:
+        # Carry context variables (the request's SQL trace) to the thread
+        return tpool.execute(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _offloaded(name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Asked on every call, since models.configure() can swap the engine
+        if not models.get_storage().blocks(name):
+            return fn(*args, **kwargs)
+        return call(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def __getattr__(name):
+    fn = getattr(models, name, None)
+    if name.startswith("_") or not callable(fn):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    wrapped = _offloaded(name, fn)
+    globals()[name] = wrapped
+    return wrapped
@@ -28,51 +28,43 @@ cp -r "$APP_DIR"/* "$BACKUP_DIR/" 2>/dev/null || true
 echo "✓ Backup created"
 echo ""
 
-echo "Step 2: Stopping the application..."
-sudo systemctl stop welcome-window || echo "Service not running"
-echo "✓ Application stopped"
+echo "Step 2: Staging the new release..."
+# Every committed file of this checkout; local data and builds stay out
+STAGE_DIR="$APP_DIR.next"
+SRC_DIR="$(cd "$(dirname "$0")" && pwd)"
+rm -rf "$STAGE_DIR"
+mkdir -p "$STAGE_DIR"
+git -C "$SRC_DIR" archive HEAD | tar -x -C "$STAGE_DIR"
+echo "✓ Release staged in $STAGE_DIR"
 echo ""
 
-echo "Step 3: Installing updated files..."
-
-# Copy Python files
-echo "  - Updating Python files..."
-cp models_updated.py "$APP_DIR/models.py"
-cp app_updated.py "$APP_DIR/app.py"
-
-# Create static directories if they don't exist
-mkdir -p "$APP_DIR/static/js"
-mkdir -p "$APP_DIR/templates/admin"
-
-# Copy JavaScript game files
-echo "  - Installing game files..."
-cp wordsearch.js "$APP_DIR/static/js/"
-cp sudoku.js "$APP_DIR/static/js/"
-
-# Copy template files
-echo "  - Updating templates..."
-cp index_updated.html "$APP_DIR/templates/index.html"
-cp waiting_room.html "$APP_DIR/templates/waiting_room.html"
-cp dashboard_updated.html "$APP_DIR/templates/admin/dashboard.html"
-cp room_chat_updated.html "$APP_DIR/templates/room_chat.html"
-
-echo "✓ Files installed"
+echo "Step 3: Checking the release while the old one keeps serving..."
+source "$APP_DIR/venv/bin/activate"
+pip install -q -r "$STAGE_DIR/requirements.txt"
+cd "$STAGE_DIR"
+export DATABASE="${DATABASE:-$APP_DIR/welcome_window.db}"
+python3 -m compileall -q .
+# Migrations never drop tables or columns, so the running release is unaffected
+python3 migrations.py
+python3 assets.py
+echo "✓ Release checked"
 echo ""
 
-echo "Step 4: Updating database schema..."
-cd "$APP_DIR"
-source venv/bin/activate
-python3 << 'PYEOF'
-import models
-models.init_db()
-print("✓ Database updated")
-PYEOF
-echo ""
-
-echo "Step 5: Restarting the application..."
+echo "Step 4: Switching releases..."
+sudo systemctl stop welcome-window || echo "Service not running"
+cp -r "$STAGE_DIR"/. "$APP_DIR"/
 sudo systemctl start welcome-window
-sleep 3
+# Wait for the first answered request rather than a fixed delay
+for attempt in $(seq 1 50); do
+    curl -fs -o /dev/null http://127.0.0.1:5000/api/status && break
+    sleep 0.2
+done
 sudo systemctl status welcome-window --no-pager
+if ! curl -fs -o /dev/null http://127.0.0.1:5000/api/status; then
+    echo "Error: the application is not answering; roll back with:"
+    echo "  cp -r $BACKUP_DIR/* $APP_DIR/ && sudo systemctl restart welcome-window"
+    exit 1
+fi
 echo "✓ Application restarted"
 echo ""
 
@@ -0,0 +1,93 @@
+"""Sudoku solver: candidate bitmasks per row, column and box, the empty cell
+with the fewest candidates filled first, and an explicit stack instead of
+recursion.
+
+Grids are 9 lists of 9 ints, 0 for an empty cell.
+"""
+
+ALL = 0b1111111110  # bit d set for each digit 1-9
+# Per cell: its row, column (9 + c) and box (18 + b) in the used masks
+UNITS = [(i // 9, 9 + i % 9, 18 + i // 27 * 3 + i % 9 // 3) for i in range(81)]
+COUNT = [bin(mask).count("1") for mask in range(ALL + 1)]
+DIGITS = [[d for d in range(1, 10) if mask >> d & 1] for mask in range(ALL + 1)]
+
+
+def _search(grid, rng=None):
+    """Yield each solution of ``grid`` as a flat list of 81 digits"""
+    cells = [value for row in grid for value in row]
+    used = [0] * 27
+    for i, value in enumerate(cells):
+        if value:
+            bit = 1 << value
+            a, b, c = UNITS[i]
+            if (used[a] | used[b] | used[c]) & bit:
+                return  # the givens already clash
+            used[a] |= bit
+            used[b] |= bit
+            used[c] |= bit
+
+    empty = [i for i, value in enumerate(cells) if not value]
+    stack = []  # (cell, candidates not tried yet)
+    while True:
+        if not empty:
+            yield list(cells)
+        else:
+            # The cell with the fewest candidates; one with none backtracks
+            fewest = 10
+            for position, i in enumerate(empty):
+                a, b, c = UNITS[i]
+                mask = ALL & ~(used[a] | used[b] | used[c])
+                if COUNT[mask] < fewest:
+                    best, best_mask, fewest = position, mask, COUNT[mask]
+                    if fewest <= 1:
+                        break
+            stack.append((empty[best], best_mask))
+            empty[best] = empty[-1]
+            empty.pop()
+
+        # Put the next candidate in the innermost cell, backtracking out of
+        # cells that have none left
+        while stack:
+            i, mask = stack[-1]
+            a, b, c = UNITS[i]
+            if cells[i]:
+                bit = ~(1 << cells[i])
+                used[a] &= bit
+                used[b] &= bit
+                used[c] &= bit
+                cells[i] = 0
+            if mask:
+                digit = rng.choice(DIGITS[mask]) if rng else DIGITS[mask][0]
+                bit = 1 << digit
+                stack[-1] = (i, mask & ~bit)
+                cells[i] = digit
+                used[a] |= bit
+                used[b] |= bit
+                used[c] |= bit
+                break
+            stack.pop()
+            empty.append(i)
+        else:
+            return
+
+
+def solve(grid, rng=None):
+    """A solved copy of ``grid``, or None if it has none.
+
+    With ``rng`` (random or a random.Random) candidates are tried in random
+    order, so an empty grid gives a random complete one.
+    """
+    for cells in _search(grid, rng):
+        return [cells[row * 9 : row * 9 + 9] for row in range(9)]
+    return None
+
+
+def count_solutions(grid, limit=2):
+    """How many solutions ``grid`` has, counting up to ``limit`` (None for
+    all); the default tells a unique puzzle from an ambiguous one"""
+    count = 0
+    for _ in _search(grid):
+        count += 1
+        if count == limit:
+            break
+    return count
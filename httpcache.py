@@ -0,0 +1,154 @@
+"""Conditional GET (ETag / If-None-Match) for the polling endpoints.
+
+Each polled response gets an ETag built from the storage generations it
+depends on. Generations are read before the view runs and only bumped after
+a write commits, so a tag is never newer than the data it was sent with. A
+poll that still holds the current tag gets an empty 304 Not Modified before
+the view, and its queries and JSON encoding, ever run.
+
+Browsers send If-None-Match on their own for responses marked
+``Cache-Control: no-cache``, and fetch() sees the cached body on a 304, so
+the pollers need no changes.
+
+Views that are the same for every visitor (the landing page, /api/status)
+also keep their encoded body under that tag with cached(), so a request
+without the tag is answered with stored bytes instead of rendering again.
+"""
+
+import functools
+import hashlib
+import time
+
+from flask import current_app, make_response, request
+
+import models
+
+# Per-endpoint counters: {"requests": polls seen, "not_modified": 304s sent},
+# plus "from_cache" for cached() views
+stats = {}
+
+
+def etag(*parts):
+    """Short opaque tag for ``parts``"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+
+def _tag(generations, vary=None):
+    return etag(
+        [models.get_generation(name) for name in generations],
+        request.query_string,
+        vary() if vary else None,
+    )
+
+
+def _matches(tag):
+    """True if the request's If-None-Match holds ``tag``"""
+    header = request.environ.get("HTTP_IF_NONE_MATCH")
+    return bool(header) and (f'"{tag}"' in header or header.strip() == "*")
+
+
+def _finish(response, tag, cache_control):
+    response.set_etag(tag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def conditional(*generations, vary=None):
+    """Decorate a GET view to answer unchanged polls with 304.
+
+    The tag covers the named generations, the query string and whatever
+    ``vary()`` returns, e.g. the visitor the response is for.
+    """
+
+    def decorate(view):
+        counts = stats.setdefault(view.__name__, {"requests": 0, "not_modified": 0})
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            tag = _tag(generations, vary)
+            counts["requests"] += 1
+            if _matches(tag):
+                counts["not_modified"] += 1
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            return _finish(response, tag, "private, no-cache")
+
+        return wrapper
+
+    return decorate
+
+
+def cached(*generations, ttl=60, max_entries=32):
+    """Decorate a GET view whose response depends only on the named
+    generations and the query string, the same for every visitor.
+
+    Unchanged requests get 304 as with conditional(); others are answered
+    from the stored body of the last 200 under the same tag, kept for at
+    most ``ttl`` seconds. Marked ``public, no-cache`` so shared caches may
+    keep it too, but must revalidate.
+    """
+
+    def decorate(view):
+        counts = stats.setdefault(
+            view.__name__, {"requests": 0, "not_modified": 0, "from_cache": 0}
+        )
+        responses = {}  # (generations, query string) -> (tag, body, headers, at)
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (
+                tuple(models.get_generation(name) for name in generations),
+                request.query_string,
+            )
+            counts["requests"] += 1
+            entry = responses.get(key)
+            if entry is not None and time.monotonic() - entry[3] >= ttl:
+                entry = None
+            tag = entry[0] if entry is not None else etag(list(key[0]), key[1], None)
+            if _matches(tag):
+                counts["not_modified"] += 1
+                headers = [("ETag", f'"{tag}"'), ("Cache-Control", "public, no-cache")]
+                return current_app.response_class(status=304, headers=headers)
+            if entry is not None:
+                # Replay the stored response without going through the view
+                counts["from_cache"] += 1
+                return current_app.response_class(entry[1], 200, entry[2])
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            _finish(response, tag, "public, no-cache")
+            if len(responses) >= max_entries:
+                # Old generations and stray query strings; start over
+                responses.clear()
+            headers = [
+                (name, value)
+                for name, value in response.headers.items()
+                if name in ("Content-Type", "ETag", "Cache-Control")
+            ]
+            responses[key] = (tag, response.get_data(), headers, time.monotonic())
+            return response
+
+        wrapper.responses = responses
+        return wrapper
+
+    return decorate
+
+
+def metrics():
+    """Per-endpoint request counts, 304 and stored-response hit ratios"""
+    result = {}
+    for name, counts in stats.items():
+        requests = counts["requests"]
+        result[name] = {
+            **counts,
+            "hit_ratio": round(counts["not_modified"] / requests, 3) if requests else 0,
+        }
+        if "from_cache" in counts:
+            result[name]["cache_ratio"] = (
+                round(counts["from_cache"] / requests, 3) if requests else 0
+            )
+    return result
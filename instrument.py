@@ -0,0 +1,154 @@
+"""Latency and SQL accounting for Flask views and Socket.IO handlers.
+
+Every HTTP request (through init_app's hooks) and every handler decorated
+with ``traced(name)`` is timed into a per-name latency histogram, and the
+SQL statements and rows it caused are counted through storage.pool's
+``sql_trace``, including work db.call runs on native threads. Calls slower
+than ``slow_seconds`` are printed. metrics() reports p50/p95/p99 per name.
+
+Histograms have fixed logarithmic buckets, so memory stays constant however
+many calls are recorded and percentiles are accurate to within a bucket
+(about 19%).
+"""
+
+import bisect
+import functools
+import time
+
+from flask import g, request
+
+from storage.pool import sql_trace
+
+# Bucket upper bounds in seconds: 50 us * 1.19^n, up to about 60 s
+BOUNDS = [0.00005 * 1.19**n for n in range(81)]
+
+_settings = {"slow_seconds": 0.5}
+
+stats = {}  # name -> Stats
+
+
+class Histogram:
+    """Counts of values in the BOUNDS buckets"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the ``q``-th percentile"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index == len(BOUNDS):
+                    break
+                return min(BOUNDS[index], self.max)
+        return self.max
+
+
+class Stats:
+    """Latency histogram and SQL totals of one view or handler"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.queries = 0
+        self.rows = 0
+        self.max_queries = 0
+        self.slow = 0
+
+    def record(self, elapsed, trace):
+        self.latency.add(elapsed)
+        self.queries += trace["queries"]
+        self.rows += trace["rows"]
+        self.max_queries = max(self.max_queries, trace["queries"])
+
+    def as_dict(self):
+        latency = self.latency
+        calls = latency.count or 1
+        return {
+            "count": latency.count,
+            "p50_ms": round(latency.percentile(50) * 1000, 2),
+            "p95_ms": round(latency.percentile(95) * 1000, 2),
+            "p99_ms": round(latency.percentile(99) * 1000, 2),
+            "max_ms": round(latency.max * 1000, 2),
+            "mean_ms": round(latency.total / calls * 1000, 2),
+            "queries_per_call": round(self.queries / calls, 2),
+            "rows_per_call": round(self.rows / calls, 2),
+            "max_queries": self.max_queries,
+            "slow": self.slow,
+        }
+
+
+def configure(slow_seconds=0.5):
+    _settings["slow_seconds"] = slow_seconds
+
+
+def start():
+    """Begin tracing the current call; pass the result to finish()"""
+    trace = {"queries": 0, "rows": 0}
+    return time.perf_counter(), trace, sql_trace.set(trace)
+
+
+def finish(name, started):
+    """Record the call begun with ``started = start()`` under ``name``"""
+    began, trace, token = started
+    elapsed = time.perf_counter() - began
+    sql_trace.reset(token)
+    entry = stats.get(name)
+    if entry is None:
+        entry = stats[name] = Stats()
+    entry.record(elapsed, trace)
+    if elapsed >= _settings["slow_seconds"]:
+        entry.slow += 1
+        print(
+            f"Slow request: {name} took {elapsed * 1000:.0f} ms, "
+            f"{trace['queries']} queries, {trace['rows']} rows"
+        )
+
+
+def traced(name):
+    """Decorate a Socket.IO handler to be timed under ``name``"""
+
+    def decorate(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            started = start()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                finish(name, started)
+
+        return wrapper
+
+    return decorate
+
+
+def init_app(app):
+    """Time every request of ``app``, named by its method and URL rule"""
+
+    @app.before_request
+    def _start_request():
+        g.instrument = start()
+
+    @app.teardown_request
+    def _finish_request(exc=None):
+        started = g.pop("instrument", None)
+        if started is not None:
+            name = f"{request.method} {request.url_rule or '(unmatched)'}"
+            finish(name, started)
+
+
+def metrics():
+    """Latency percentiles and SQL per call for every view and handler"""
+    return {name: entry.as_dict() for name, entry in sorted(stats.items())}
@@ -0,0 +1,343 @@
+"""Versioned schema migrations for the Welcome Window database.
+
+Each migration has a version number and runs exactly once, in order, inside
+its own transaction. Applied versions are recorded in ``schema_version``, and
+the latest one also in the file header (``PRAGMA user_version``), so starting
+against an up to date database costs a single header read and no DDL.
+
+Run ``python migrations.py`` to bring the database up to date, adding
+``--rebuild-rollups`` to recompute visit_rollups from the visits history.
+tests/test_query_plans.py checks that the queries the SQLite engine runs use
+these indexes.
+"""
+
+import sys
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a migration step that receives a cursor"""
+
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+
+    return register
+
+
+@migration(1, "Baseline tables")
+def _baseline(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS availability (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL DEFAULT 'away',
+            message TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            visitor_name TEXT,
+            message TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_read BOOLEAN DEFAULT 0
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS visits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            visitor_name TEXT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ended_at TIMESTAMP,
+            connection_type TEXT,
+            duration_seconds INTEGER
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pending_visitors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            approved BOOLEAN DEFAULT 0,
+            rejected BOOLEAN DEFAULT 0,
+            approved_at TIMESTAMP,
+            session_id TEXT UNIQUE
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT NOT NULL,
+            sender_name TEXT NOT NULL,
+            message TEXT NOT NULL,
+            visitor_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+@migration(2, "Indexes for hot-path queries")
+def _hot_path_indexes(cursor):
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_created_at "
+        "ON chat_messages (created_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_visits_started_at ON visits (started_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages (created_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_messages_unread "
+        "ON messages (is_read, created_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pending_visitors_open "
+        "ON pending_visitors (approved, rejected, requested_at)"
+    )
+
+
+@migration(3, "Visit stats rollups")
+def _visit_rollups(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS visit_rollups (
+            period TEXT PRIMARY KEY,
+            visits INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            total_duration INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    rebuild_visit_rollups(cursor)
+
+
+def rebuild_visit_rollups(cursor):
+    """Rebuild the per-day and 'all' visit rollups from the visits table.
+
+    Days older than the oldest remaining visit keep their rollup rows, since
+    the retention job archives whole days of visits.
+    """
+    cursor.execute("""
+        DELETE FROM visit_rollups
+        WHERE period = 'all'
+           OR period >= (SELECT COALESCE(DATE(MIN(started_at)), '9999-12-31')
+                         FROM visits)
+    """)
+    cursor.execute("""
+        INSERT INTO visit_rollups (period, visits, completed, total_duration)
+        SELECT DATE(started_at), COUNT(*), COUNT(duration_seconds),
+               COALESCE(SUM(duration_seconds), 0)
+        FROM visits GROUP BY DATE(started_at)
+    """)
+    cursor.execute("""
+        INSERT INTO visit_rollups (period, visits, completed, total_duration)
+        SELECT 'all', COALESCE(SUM(visits), 0), COALESCE(SUM(completed), 0),
+               COALESCE(SUM(total_duration), 0)
+        FROM visit_rollups
+    """)
+
+
+@migration(4, "Per-visitor chat history indexes")
+def _chat_history_indexes(cursor):
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_visitor "
+        "ON chat_messages (visitor_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_sender "
+        "ON chat_messages (sender)"
+    )
+
+
+@migration(5, "Chat tombstones for incremental sync")
+def _chat_tombstones(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chat_tombstones (
+            id INTEGER PRIMARY KEY,
+            message_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+@migration(6, "Archive table for the retention job")
+def _archive_batches(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS archive_batches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            payload BLOB NOT NULL
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_availability_updated_at "
+        "ON availability (updated_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pending_visitors_requested_at "
+        "ON pending_visitors (requested_at)"
+    )
+
+
+@migration(7, "Shared presence registry for multiple workers")
+def _presence(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS presence (
+            sid TEXT PRIMARY KEY,
+            worker TEXT NOT NULL,
+            visitor_id TEXT,
+            visitor_name TEXT,
+            visit_id INTEGER,
+            connected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_presence_visitor_id ON presence (visitor_id)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_presence_worker ON presence (worker)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS presence_workers (
+            worker TEXT PRIMARY KEY,
+            seen_at REAL NOT NULL
+        )
+    """)
+
+
+@migration(8, "Indexes for presence reads")
+def _presence_indexes(cursor):
+    cursor.execute("DROP INDEX IF EXISTS idx_presence_visitor_id")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_presence_visitor "
+        "ON presence (visitor_id, connected_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_presence_connected_at "
+        "ON presence (connected_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_presence_identity "
+        "ON presence (COALESCE(visitor_id, sid))"
+    )
+
+
+@migration(9, "Presence connect times as Unix timestamps")
+def _presence_connected_at_real(cursor):
+    # SQLite cannot change a column's type, so copy into a new table. Rows
+    # that took the old CURRENT_TIMESTAMP default hold text; convert them.
+    cursor.execute("""
+        CREATE TABLE presence_new (
+            sid TEXT PRIMARY KEY,
+            worker TEXT NOT NULL,
+            visitor_id TEXT,
+            visitor_name TEXT,
+            visit_id INTEGER,
+            connected_at REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO presence_new
+            (sid, worker, visitor_id, visitor_name, visit_id, connected_at)
+        SELECT sid, worker, visitor_id, visitor_name, visit_id,
+               COALESCE(
+                   CASE typeof(connected_at)
+                       WHEN 'text' THEN CAST(strftime('%s', connected_at) AS REAL)
+                       ELSE connected_at
+                   END,
+                   0
+               )
+        FROM presence
+    """)
+    cursor.execute("DROP TABLE presence")
+    cursor.execute("ALTER TABLE presence_new RENAME TO presence")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_presence_worker ON presence (worker)"
+    )
+    _presence_indexes(cursor)
+
+
+def _ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def _applied_version(conn):
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def current_version(conn):
+    """Highest applied migration version, 0 for an empty database"""
+    _ensure_version_table(conn)
+    return _applied_version(conn)
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def migrate(conn):
+    """Apply every pending migration in order and return their versions"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] == latest_version():
+        return []
+    applied = []
+    _ensure_version_table(conn)
+    for version, description, step in MIGRATIONS:
+        if version <= _applied_version(conn):
+            continue
+        # Take the write lock first so concurrent workers apply each step once
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM schema_version WHERE version = ?", (version,)
+            ).fetchone()
+            if row is None:
+                step(conn.cursor())
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description),
+                )
+                applied.append(version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if _applied_version(conn) == latest_version():
+        conn.execute(f"PRAGMA user_version = {latest_version()}")
+    return applied
+
+
+if __name__ == "__main__":
+    import models
+
+    conn = models.get_db()
+    before = current_version(conn)
+    conn.close()
+
+    models.init_db()
+
+    conn = models.get_db()
+    after = current_version(conn)
+    conn.close()
+    print(f"✓ Database schema at version {after} (was {before})")
+
+    if "--rebuild-rollups" in sys.argv[1:]:
+        models.rebuild_visit_rollups()
+        print("✓ Visit rollups rebuilt")
@@ -1,313 +1,231 @@
-from datetime import datetime
-import sqlite3
+"""Data access for the app.
 
-DATABASE = "welcome_window.db"
+Every function delegates to one storage engine from the storage package,
+picked with configure() (SQLite by default). Call sites only ever use the
+functions here, so the engine can be swapped without touching them.
+"""
+
+from config import Config
+import storage
+
+_storage = None
+
+
+def configure(backend=None, **options):
+    """Switch to a fresh storage engine, closing the previous one.
+
+    ``backend`` defaults to Config.STORAGE_BACKEND and options to
+    Config.STORAGE_OPTIONS; the SQLite engine also gets Config.DATABASE.
+    """
+    global _storage
+    if backend is None:
+        backend = Config.STORAGE_BACKEND
+        options = {**Config.STORAGE_OPTIONS, **options}
+    if backend == "sqlite":
+        # Imported here, not at the top: db wraps this module
+        import db
+
+        options.setdefault("database", Config.DATABASE)
+        options.setdefault("execute", db.call)
+    engine = storage.create_storage(backend, **options)
+    if _storage is not None:
+        _storage.close()
+    _storage = engine
+    return engine
+
+
+def get_storage():
+    """The current storage engine, configured from Config on first use"""
+    if _storage is None:
+        configure()
+    return _storage
 
 
 def get_db():
-    conn = sqlite3.connect(DATABASE, timeout=10)
-    conn.row_factory = sqlite3.Row
-    # Enable WAL mode for better concurrent access
-    conn.execute("PRAGMA journal_mode=WAL")
-    return conn
+    """A raw connection to the SQLite database (SQLite engine only)"""
+    return get_storage().get_db()
+
+
+def close():
+    """Flush pending writes and release connections (e.g. on shutdown)"""
+    if _storage is not None:
+        _storage.close()
+
+
+def flush_writes():
+    """Block until every queued background write has been committed"""
+    get_storage().flush_writes()
+
+
+def get_generation(name):
+    """Current generation of ``name``, or 0 if it has never been bumped"""
+    return get_storage().get_generation(name)
+
+
+def bump_generation(name):
+    """Advance the generation of ``name`` and return the new value"""
+    return get_storage().bump_generation(name)
 
 
 def init_db():
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS availability (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            status TEXT NOT NULL DEFAULT 'away',
-            message TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            visitor_name TEXT,
-            message TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            is_read BOOLEAN DEFAULT 0
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS visits (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            visitor_name TEXT,
-            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            ended_at TIMESTAMP,
-            connection_type TEXT,
-            duration_seconds INTEGER
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS pending_visitors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            approved BOOLEAN DEFAULT 0,
-            rejected BOOLEAN DEFAULT 0,
-            approved_at TIMESTAMP,
-            session_id TEXT UNIQUE
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sender TEXT NOT NULL,
-            sender_name TEXT NOT NULL,
-            message TEXT NOT NULL,
-            visitor_id TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    cursor.execute("SELECT COUNT(*) as count FROM availability")
-    if cursor.fetchone()["count"] == 0:
-        cursor.execute(
-            "INSERT INTO availability (status, message) VALUES ('away', 'Not available right now')"
-        )
-
-    conn.commit()
-    conn.close()
+    """Apply pending schema migrations and seed the availability row"""
+    get_storage().init()
 
 
 def get_current_status():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM availability ORDER BY id DESC LIMIT 1")
-    result = cursor.fetchone()
-    conn.close()
-    if result:
-        return {
-            "status": result["status"],
-            "message": result["message"],
-            "updated_at": result["updated_at"],
-        }
-    return {"status": "away", "message": "Not available", "updated_at": None}
+    return get_storage().get_current_status()
 
 
 def update_status(status, message):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO availability (status, message) VALUES (?, ?)", (status, message)
-    )
-    conn.commit()
-    conn.close()
+    get_storage().update_status(status, message)
 
 
 def add_message(visitor_name, message):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO messages (visitor_name, message) VALUES (?, ?)",
-        (visitor_name, message),
-    )
-    conn.commit()
-    conn.close()
+    get_storage().add_message(visitor_name, message)
 
 
 def get_messages(limit=50, unread_only=False):
-    conn = get_db()
-    cursor = conn.cursor()
-    query = "SELECT * FROM messages"
-    if unread_only:
-        query += " WHERE is_read = 0"
-    query += " ORDER BY created_at DESC LIMIT ?"
-    cursor.execute(query, (limit,))
-    messages = cursor.fetchall()
-    conn.close()
-    return [dict(msg) for msg in messages]
+    return get_storage().get_messages(limit, unread_only)
 
 
 def mark_message_read(message_id):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE messages SET is_read = 1 WHERE id = ?", (message_id,))
-    conn.commit()
-    conn.close()
+    get_storage().mark_message_read(message_id)
+
+
+def delete_message(message_id):
+    get_storage().delete_message(message_id)
 
 
 def get_unread_count():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) as count FROM messages WHERE is_read = 0")
-    result = cursor.fetchone()
-    conn.close()
-    return result["count"]
+    return get_storage().get_unread_count()
 
 
 def log_visit(visitor_name, connection_type):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO visits (visitor_name, connection_type) VALUES (?, ?)",
-        (visitor_name, connection_type),
-    )
-    visit_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return visit_id
+    return get_storage().log_visit(visitor_name, connection_type)
 
 
 def end_visit(visit_id):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        UPDATE visits 
-        SET ended_at = CURRENT_TIMESTAMP,
-            duration_seconds = (strftime('%s', CURRENT_TIMESTAMP) - strftime('%s', started_at))
-        WHERE id = ?
-    """,
-        (visit_id,),
-    )
-    conn.commit()
-    conn.close()
+    get_storage().end_visit(visit_id)
 
 
 def get_recent_visits(limit=20):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM visits ORDER BY started_at DESC LIMIT ?", (limit,))
-    visits = cursor.fetchall()
-    conn.close()
-    return [dict(visit) for visit in visits]
+    return get_storage().get_recent_visits(limit)
 
 
 def get_visit_stats():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) as total FROM visits")
-    total = cursor.fetchone()["total"]
-    cursor.execute(
-        "SELECT COUNT(*) as today FROM visits WHERE DATE(started_at) = DATE('now')"
-    )
-    today = cursor.fetchone()["today"]
-    cursor.execute(
-        "SELECT AVG(duration_seconds) as avg_duration FROM visits WHERE duration_seconds IS NOT NULL"
-    )
-    avg_duration = cursor.fetchone()["avg_duration"] or 0
-    conn.close()
-    return {
-        "total_visits": total,
-        "today_visits": today,
-        "avg_duration_minutes": round(avg_duration / 60, 1) if avg_duration else 0,
-    }
+    return get_storage().get_visit_stats()
+
+
+def rebuild_visit_rollups():
+    """Recompute visit rollups from the raw visits history"""
+    get_storage().rebuild_visit_rollups()
 
 
 # New functions for visitor approval system
 def create_pending_visitor(name, email, session_id):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO pending_visitors (name, email, session_id) VALUES (?, ?, ?)",
-        (name, email, session_id),
-    )
-    visitor_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return visitor_id
+    return get_storage().create_pending_visitor(name, email, session_id)
 
 
 def get_pending_visitors():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM pending_visitors WHERE approved = 0 AND rejected = 0 ORDER BY requested_at DESC"
-    )
-    visitors = cursor.fetchall()
-    conn.close()
-    return [dict(v) for v in visitors]
+    return get_storage().get_pending_visitors()
 
 
 def approve_visitor(visitor_id):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE pending_visitors SET approved = 1, approved_at = CURRENT_TIMESTAMP WHERE id = ?",
-        (visitor_id,),
-    )
-    conn.commit()
-    conn.close()
+    get_storage().approve_visitor(visitor_id)
 
 
 def reject_visitor(visitor_id):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE pending_visitors SET rejected = 1 WHERE id = ?",
-        (visitor_id,),
-    )
-    conn.commit()
-    conn.close()
+    get_storage().reject_visitor(visitor_id)
 
 
 def get_visitor_by_session(session_id):
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM pending_visitors WHERE session_id = ?",
-        (session_id,),
-    )
-    result = cursor.fetchone()
-    conn.close()
-    return dict(result) if result else None
+    return get_storage().get_visitor_by_session(session_id)
+
+
+def get_dashboard(messages_limit=20, visits_limit=10):
+    """The admin dashboard's data as one snapshot (see Storage.get_dashboard)"""
+    return get_storage().get_dashboard(messages_limit, visits_limit)
 
 
 # Chat message persistence functions
 def save_chat_message(sender, sender_name, message, visitor_id=None):
     """Save a chat message to database"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        """INSERT INTO chat_messages (sender, sender_name, message, visitor_id) 
-           VALUES (?, ?, ?, ?)""",
-        (sender, sender_name, message, visitor_id),
-    )
-    message_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return message_id
+    return get_storage().save_chat_message(sender, sender_name, message, visitor_id)
 
 
 def get_chat_messages(limit=100):
     """Get recent chat messages"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        """SELECT * FROM chat_messages 
-           ORDER BY created_at ASC 
-           LIMIT ?""",
-        (limit,),
-    )
-    messages = cursor.fetchall()
-    conn.close()
-    return [dict(msg) for msg in messages]
+    return get_storage().get_chat_messages(limit)
+
+
+def get_visitor_chat_messages(visitor_id, limit=100):
+    """Newest chat messages one visitor can see: their own plus admin replies"""
+    return get_storage().get_visitor_chat_messages(visitor_id, limit)
+
+
+def get_chat_cursor():
+    """Newest chat message or tombstone id, for clients to resume from"""
+    return get_storage().get_chat_cursor()
+
+
+def get_chat_changes(since_id, visitor_id=None, limit=100):
+    """Chat changes after the ``since_id`` cursor.
+
+    Returns new messages (only the ones ``visitor_id`` can see, if given),
+    ids of deleted messages, the tombstone id of the latest clear (messages
+    below it are gone) and the cursor to pass next time. ``more`` is set
+    when ``limit`` cut the messages short.
+    """
+    return get_storage().get_chat_changes(since_id, visitor_id, limit)
 
 
 def delete_chat_message(message_id):
-    """Delete a specific chat message"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM chat_messages WHERE id = ?", (message_id,))
-    conn.commit()
-    conn.close()
+    """Delete a specific chat message and return it (None if already gone)"""
+    return get_storage().delete_chat_message(message_id)
 
 
 def clear_all_chat_messages():
     """Clear all chat messages"""
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM chat_messages")
-    conn.commit()
-    conn.close()
+    get_storage().clear_all_chat_messages()
+
+
+# Presence of connected visitor sockets, shared by every worker
+def add_connection(sid, worker, visitor_id, visitor_name, connected_at, visit_id=None):
+    """Record a visitor socket; returns the number of visitors"""
+    return get_storage().add_connection(
+        sid, worker, visitor_id, visitor_name, connected_at, visit_id
+    )
+
+
+def remove_connection(sid):
+    """Forget a socket; returns (its connection or None, visitors left)"""
+    return get_storage().remove_connection(sid)
+
+
+def get_connections():
+    return get_storage().get_connections()
+
+
+def count_connections():
+    return get_storage().count_connections()
+
+
+def count_visitors():
+    """Connected visitors, counting each visitor's tabs once"""
+    return get_storage().count_visitors()
+
+
+def find_connections(visitor_id):
+    return get_storage().find_connections(visitor_id)
+
+
+def heartbeat(worker):
+    get_storage().heartbeat(worker)
+
+
+def get_workers():
+    return get_storage().get_workers()
+
+
+def remove_workers(workers):
+    return get_storage().remove_workers(workers)
@@ -0,0 +1,56 @@
+"""Which visitor sockets are connected, across every worker process.
+
+Each worker records its sockets in the storage engine's presence registry
+under its worker_id() and heartbeats every few seconds. Connections of
+workers that stopped heartbeating, or whose process is gone on this host,
+are pruned so a crashed or restarted worker leaves no ghosts behind.
+"""
+
+import os
+import socket
+import time
+
+import db
+
+
+def worker_id():
+    """This process's id in the presence registry"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_gone(worker):
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def prune(max_age):
+    """Drop connections of dead workers and return how many were dropped"""
+    me = worker_id()
+    now = time.time()
+    dead = [
+        worker
+        for worker, seen_at in db.get_workers().items()
+        if worker != me and (now - seen_at > max_age or _process_gone(worker))
+    ]
+    return db.remove_workers(dead) if dead else 0
+
+
+def run_heartbeat(interval, sleep=time.sleep):
+    """Background loop: heartbeat and prune every ``interval`` seconds"""
+    # A previous process with the same pid may have left connections behind
+    db.remove_workers([worker_id()])
+    while True:
+        try:
+            db.heartbeat(worker_id())
+            prune(interval * 3)
+        except Exception as e:
+            print(f"Error in presence heartbeat: {e}")
+        sleep(interval)
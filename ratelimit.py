@@ -0,0 +1,207 @@
+"""Token-bucket rate limits for the socket events and HTTP endpoints that write.
+
+Each limit names the keys it is counted under ("sid" for the socket,
+"session" for the visitor's session, "ip" for the client address), each with
+its own (tokens per second, burst) bucket; an event passes only if every one
+of its buckets has a token. A caller a little over the rate is delayed until
+the next token (at most ``max_delay`` seconds); one further over is turned
+away, with 429 Too Many Requests for HTTP and a ``rate_limited`` event for
+sockets. Admins are never limited.
+
+Buckets live in this process's memory, least recently used keys evicted
+first. With several workers and sticky sessions a socket or session always
+hits the same worker; per-IP limits are per worker.
+
+Per-IP limits need the client's address. Behind a reverse proxy every
+request comes from the proxy, so unless ``trusted_proxies`` is set (and
+ProxyFix recovers the address) requests from loopback skip their IP buckets
+rather than share one site-wide bucket.
+"""
+
+import functools
+import ipaddress
+import math
+import time
+from collections import OrderedDict
+
+from flask import jsonify, request, session
+from flask_socketio import emit
+
+_limits = {}  # limit name -> {key kind: TokenBuckets}
+_settings = {"max_delay": 0.5, "trusted_proxies": 0, "warned": False}
+
+# Per-limit counters: {"allowed": n, "delayed": n, "rejected": n}
+stats = {}
+
+
+class TokenBuckets:
+    """One token bucket per key, refilling at ``rate`` tokens a second up to
+    ``burst``; at most ``max_keys`` are kept"""
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, last refill]
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def reserve(self, key, max_wait=0, now=None):
+        """Take a token for ``key``.
+
+        Returns 0 if one was available, the seconds to wait for it if that
+        is at most ``max_wait`` (the token is taken now, so later callers
+        queue behind it), or None if the caller is rejected.
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        wait = max(0.0, (1 - bucket[0]) / self.rate)
+        if wait > max_wait:
+            return None
+        bucket[0] -= 1
+        return wait
+
+    def refund(self, key):
+        """Give back a token taken by reserve()"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.burst, bucket[0] + 1)
+
+
+def configure(limits, max_delay=0.5, max_keys=10000, trusted_proxies=0):
+    """Set up the limits from ``{name: {key kind: (rate, burst)}}``"""
+    _limits.clear()
+    for name, kinds in limits.items():
+        _limits[name] = {
+            kind: TokenBuckets(rate, burst, max_keys)
+            for kind, (rate, burst) in kinds.items()
+        }
+        stats.setdefault(name, {"allowed": 0, "delayed": 0, "rejected": 0})
+    _settings["max_delay"] = max_delay
+    _settings["trusted_proxies"] = trusted_proxies
+    _settings["warned"] = False
+
+
+def _key(kind):
+    if kind == "sid":
+        return getattr(request, "sid", None)
+    if kind == "session":
+        return session.get("visitor_id") or session.get("visitor_session")
+    if kind == "ip":
+        return _client_address()
+    raise ValueError(f"Unknown rate limit key: {kind}")
+
+
+def _client_address():
+    """The caller's IP, or None when it is likely an unconfigured proxy's"""
+    address = request.remote_addr
+    if _settings["trusted_proxies"] or not _is_loopback(address):
+        return address
+    if not _settings["warned"]:
+        _settings["warned"] = True
+        print(
+            "Per-IP rate limits skipped for requests from loopback: set "
+            "TRUSTED_PROXIES when behind a reverse proxy"
+        )
+    return None
+
+
+def _is_loopback(address):
+    try:
+        return ipaddress.ip_address(address).is_loopback
+    except ValueError:
+        return False
+
+
+def check(name):
+    """Take a token from every bucket of limit ``name`` for this request.
+
+    Returns the seconds to wait before going ahead (0 for none), or None
+    if the request is rejected. Unknown limits never limit.
+    """
+    buckets = _limits.get(name)
+    if not buckets or session.get("admin_logged_in"):
+        return 0
+    taken = []
+    wait = 0
+    for kind, limiter in buckets.items():
+        key = _key(kind)
+        if key is None:
+            continue
+        reserved = limiter.reserve(key, _settings["max_delay"])
+        if reserved is None:
+            for earlier, earlier_key in taken:
+                earlier.refund(earlier_key)
+            stats[name]["rejected"] += 1
+            return None
+        taken.append((limiter, key))
+        wait = max(wait, reserved)
+    stats[name]["delayed" if wait else "allowed"] += 1
+    return wait
+
+
+def _retry_after(name):
+    """Seconds until every bucket of ``name`` refills a token, rounded up"""
+    return max(1, math.ceil(max(1 / b.rate for b in _limits[name].values())))
+
+
+def http_limit(name):
+    """Decorate a view to answer over-limit callers with 429"""
+
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            wait = check(name)
+            if wait is None:
+                response = jsonify({"error": "Too many requests, try again shortly"})
+                response.status_code = 429
+                response.headers["Retry-After"] = str(_retry_after(name))
+                return response
+            if wait:
+                time.sleep(wait)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def socket_limit(name):
+    """Decorate a Socket.IO handler to drop over-limit events, telling the
+    sender with a ``rate_limited`` event"""
+
+    def decorate(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            wait = check(name)
+            if wait is None:
+                retry_after = _retry_after(name)
+                emit("rate_limited", {"event": name, "retry_after": retry_after})
+                return None
+            if wait:
+                time.sleep(wait)
+            return handler(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def metrics():
+    """Per-limit counters and how many keys are being tracked"""
+    return {
+        name: {
+            **stats[name],
+            "keys": {kind: len(limiter) for kind, limiter in buckets.items()},
+        }
+        for name, buckets in _limits.items()
+    }
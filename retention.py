@@ -0,0 +1,192 @@
+"""Retention and compaction for tables that otherwise grow forever.
+
+Policies come from Config.RETENTION. Work is done in small batches, each in
+its own short transaction run through db.call (off the eventlet hub), and
+``sleep`` is called between batches.
+
+Run ``python retention.py`` for a one-off pass, or
+``python retention.py --full-vacuum`` (with the app stopped) to switch an
+existing database to incremental vacuuming.
+"""
+
+import json
+import sys
+import time
+import zlib
+
+import db
+import models
+
+VACUUM_PAGES = 1000
+
+
+def _age_filter(column, days):
+    return f"{column} < DATE('now', '-{int(days)} days')"
+
+
+def compact_availability(conn, audit_days, batch_size):
+    """Delete old status rows, always keeping the latest one"""
+    query = "SELECT id FROM availability WHERE id < (SELECT MAX(id) FROM availability)"
+    if audit_days:
+        query += " AND " + _age_filter("updated_at", audit_days)
+    return _delete_batch(conn, "availability", query, batch_size)
+
+
+def archive_rows(conn, table, where, batch_size):
+    """Move one batch of rows into a compressed archive_batches entry"""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table} WHERE {where} ORDER BY id LIMIT ?", (batch_size,))
+    rows = [dict(row) for row in cursor.fetchall()]
+    if not rows:
+        return 0
+    payload = zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 9)
+    ids = [row["id"] for row in rows]
+    cursor.execute(
+        """INSERT INTO archive_batches (source, first_id, last_id, row_count, payload)
+           VALUES (?, ?, ?, ?, ?)""",
+        (table, ids[0], ids[-1], len(ids), payload),
+    )
+    cursor.executemany(f"DELETE FROM {table} WHERE id = ?", [(i,) for i in ids])
+    conn.commit()
+    return len(rows)
+
+
+def read_archive(source):
+    """Yield archived rows of ``source`` back as dicts, oldest first"""
+    conn = models.get_db()
+    try:
+        cursor = conn.execute(
+            "SELECT payload FROM archive_batches WHERE source = ? ORDER BY id",
+            (source,),
+        )
+        for batch in cursor:
+            yield from json.loads(zlib.decompress(batch["payload"]))
+    finally:
+        conn.close()
+
+
+def _delete_batch(conn, table, id_query, batch_size):
+    cursor = conn.cursor()
+    cursor.execute(
+        f"DELETE FROM {table} WHERE id IN ({id_query} ORDER BY id LIMIT ?)",
+        (batch_size,),
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def _steps(policy):
+    """(name, callable(conn, batch_size)) for every configured policy"""
+    steps = []
+    availability = policy.get("availability")
+    if availability is not None:
+        steps.append(
+            (
+                "availability",
+                lambda conn, n: compact_availability(
+                    conn, availability.get("audit_days"), n
+                ),
+            )
+        )
+    visits_days = (policy.get("visits") or {}).get("archive_after_days")
+    if visits_days:
+        where = _age_filter("started_at", visits_days)
+        steps.append(
+            (
+                "visits",
+                lambda conn, n, where=where: archive_rows(conn, "visits", where, n),
+            )
+        )
+    pending_days = (policy.get("pending_visitors") or {}).get("archive_after_days")
+    if pending_days:
+        pending_where = "(approved = 1 OR rejected = 1) AND " + _age_filter(
+            "requested_at", pending_days
+        )
+        steps.append(
+            (
+                "pending_visitors",
+                lambda conn, n: archive_rows(
+                    conn, "pending_visitors", pending_where, n
+                ),
+            )
+        )
+    tombstone_days = (policy.get("chat_tombstones") or {}).get("delete_after_days")
+    if tombstone_days:
+        query = "SELECT id FROM chat_tombstones WHERE " + _age_filter(
+            "created_at", tombstone_days
+        )
+        steps.append(
+            (
+                "chat_tombstones",
+                lambda conn, n: _delete_batch(conn, "chat_tombstones", query, n),
+            )
+        )
+    return steps
+
+
+def run_once(policy, batch_size=500, sleep=time.sleep):
+    """Apply every policy once and return rows removed per table"""
+    removed = {}
+    for name, step in _steps(policy):
+        removed[name] = 0
+        while True:
+            count = db.call(_run_batch, step, batch_size)
+            removed[name] += count
+            sleep(0)
+            if count < batch_size:
+                break
+
+    db.call(_compact, any(removed.values()))
+    return removed
+
+
+def _run_batch(step, batch_size):
+    conn = models.get_db()
+    try:
+        return step(conn, batch_size)
+    finally:
+        conn.close()
+
+
+def _compact(vacuum):
+    conn = models.get_db()
+    try:
+        if vacuum:
+            conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})").fetchall()
+        # Refreshes query planner statistics (ANALYZE) where they are stale
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+
+def run_forever(policy, interval, batch_size=500, sleep=time.sleep):
+    """Background loop: wait ``interval`` seconds, then run_once()"""
+    while True:
+        sleep(interval)
+        try:
+            run_once(policy, batch_size, sleep)
+        except Exception as e:
+            print(f"Error running retention: {e}")
+
+
+def full_vacuum():
+    """Switch to incremental auto-vacuum and rebuild the database file"""
+    models.flush_writes()
+    conn = models.get_db()
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    from config import Config
+
+    models.init_db()
+    if "--full-vacuum" in sys.argv[1:]:
+        full_vacuum()
+        print("✓ Database vacuumed")
+    removed = run_once(Config.RETENTION, Config.RETENTION_BATCH_SIZE)
+    for table, count in removed.items():
+        print(f"✓ {table}: {count} rows removed")
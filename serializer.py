@@ -0,0 +1,70 @@
+"""JSON encoding for HTTP responses and Socket.IO packets.
+
+dumps() and loads() use orjson when it is installed and the standard library
+otherwise, both without whitespace or ASCII escaping. JSONProvider plugs them
+into Flask (jsonify, request.get_json, the tojson filter); the module itself
+is handed to Socket.IO, which only needs dumps() and loads().
+
+pack_messages() turns a list of chat rows into their field names once and a
+list of values per message, so a connect payload doesn't repeat every key a
+hundred times. unpackMessages() in static/js/messages.js reverses it.
+"""
+
+import json
+import operator
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library is used without it
+    orjson = None
+
+_COMPACT = (",", ":")
+# Datetimes go through ``default`` so they look the same either way
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+def dumps(obj, default=None, **kwargs):
+    """``obj`` as compact JSON text; ``default`` converts anything else.
+
+    Other json.dumps() options, such as indent, go to the standard library.
+    """
+    separators = kwargs.pop("separators", None)
+    if orjson is not None and not kwargs and separators in (None, _COMPACT):
+        return orjson.dumps(obj, default=default, option=_OPTIONS).decode()
+    if separators is None and not kwargs.get("indent"):
+        separators = _COMPACT
+    kwargs.setdefault("ensure_ascii", False)
+    return json.dumps(obj, default=default, separators=separators, **kwargs)
+
+
+def loads(s, **kwargs):
+    """Decode JSON text or UTF-8 bytes"""
+    if orjson is not None and not kwargs:
+        return orjson.loads(s)
+    return json.loads(s, **kwargs)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask's default provider, encoding through dumps() and loads()"""
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if self.sort_keys:
+            kwargs.setdefault("sort_keys", True)
+        return dumps(obj, default=self.default, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return loads(s, **kwargs)
+
+
+def pack_messages(messages):
+    """Chat rows as {"fields": [name, ...], "rows": [[value, ...], ...]}"""
+    if not messages:
+        return {"fields": [], "rows": []}
+    fields = list(messages[0])
+    row = operator.itemgetter(*fields)
+    return {"fields": fields, "rows": [row(message) for message in messages]}
@@ -0,0 +1,127 @@
+"""SQLite-backed Socket.IO message queue, a stand-in for Redis on one host.
+
+Every worker appends the events it emits to a table in a shared SQLite file
+and bumps a stamp file next to it. The other workers stat() the stamp every
+``poll_interval`` seconds and only query the table when it changed, then
+replay the new events to their own sockets.
+
+Publishing runs on a native thread (db.offload), so a busy queue database
+delays the emitting green thread but never the hub.
+
+Use it with ``SOCKETIO_MESSAGE_QUEUE=sqlite:///path/to/queue.db``.
+"""
+
+import os
+import sqlite3
+import time
+
+import socketio
+
+import db
+from storage.pool import native_threading
+
+
+class SQLiteQueueManager(socketio.PubSubManager):
+    name = "sqlite"
+
+    def __init__(
+        self,
+        url="sqlite:///socketio_queue.db",
+        channel="flask-socketio",
+        write_only=False,
+        logger=None,
+        json=None,
+        poll_interval=0.01,
+        keep_seconds=60,
+    ):
+        super().__init__(
+            channel=channel, write_only=write_only, logger=logger, json=json
+        )
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        self.database = url.removeprefix("sqlite:///")
+        self.poll_interval = poll_interval
+        self.keep_seconds = keep_seconds
+        self._lock = native_threading.Lock()  # taken on tpool threads
+        self._conn = None
+        self._published = 0
+        self._setup()
+
+    @property
+    def _stamp_path(self):
+        return f"{self.database}.stamp"
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Queued events are throwaway, they need not survive a power cut
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _setup(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS socketio_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _stamp(self):
+        try:
+            return os.stat(self._stamp_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _bump(self):
+        stamp = max(time.time_ns(), self._stamp() + 1)
+        with open(self._stamp_path, "a"):
+            pass
+        os.utime(self._stamp_path, ns=(stamp, stamp))
+
+    def _publish(self, data):
+        db.offload(self._insert, self.json.dumps(data))
+
+    def _insert(self, payload):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO socketio_queue (channel, payload, created_at) "
+                "VALUES (?, ?, ?)",
+                (self.channel, payload, now),
+            )
+            self._published += 1
+            if self._published % 1000 == 0:
+                self._conn.execute(
+                    "DELETE FROM socketio_queue WHERE created_at < ?",
+                    (now - self.keep_seconds,),
+                )
+            self._conn.commit()
+            self._bump()
+
+    def _listen(self):
+        conn = self._connect()
+        last_id = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM socketio_queue"
+        ).fetchone()[0]
+        seen = None
+        while True:
+            # Read the stamp before querying: it is bumped after each commit,
+            # so a change is never missed
+            stamp = self._stamp()
+            if stamp != seen:
+                seen = stamp
+                rows = conn.execute(
+                    "SELECT id, channel, payload FROM socketio_queue "
+                    "WHERE id > ? ORDER BY id",
+                    (last_id,),
+                ).fetchall()
+                for last_id, channel, payload in rows:
+                    if channel == self.channel:
+                        yield payload
+            self.server.sleep(self.poll_interval)
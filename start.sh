@@ -16,7 +16,12 @@ fi
 
 if [ ! -f "welcome_window.db" ]; then
     echo "Initializing database..."
-    python -c "import models; models.init_db()"
+    python migrations.py
+fi
+
+if [ ! -f "static/dist/manifest.json" ]; then
+    echo "Building static assets..."
+    python assets.py
 fi
 
 echo "Starting application at http://localhost:5000"
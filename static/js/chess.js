@@ -8,21 +8,28 @@ class ChessGame {
   }
 
   async init() {
-    // Load chess.js library
+    // Load chess.js library (vendored, see assets.py)
     if (typeof Chess === 'undefined') {
-      await this.loadScript('https://cdnjs.cloudflare.com/ajax/libs/chess.js/0.10.3/chess.min.js');
+      await this.loadScript(this.vendorUrl('vendor/chess-0.10.2.min.js'));
     }
 
-    // Load chessboard.js library
+    // Load chessboard.js library, which needs jQuery
+    if (typeof jQuery === 'undefined') {
+      await this.loadScript(this.vendorUrl('vendor/jquery-3.4.1.min.js'));
+    }
     if (typeof Chessboard === 'undefined') {
-      await this.loadScript('https://unpkg.com/@chrisoakman/chessboardjs@1.0.0/dist/chessboard-1.0.0.min.js');
-      await this.loadCSS('https://unpkg.com/@chrisoakman/chessboardjs@1.0.0/dist/chessboard-1.0.0.min.css');
+      await this.loadScript(this.vendorUrl('vendor/chessboard-1.0.0.min.js'));
+      await this.loadCSS(this.vendorUrl('vendor/chessboard-1.0.0.min.css'));
     }
 
     this.game = new Chess();
     this.renderGame();
   }
 
+  vendorUrl(path) {
+    return (window.VENDOR_URLS || {})[path] || '/static/' + path;
+  }
+
   loadScript(src) {
     return new Promise((resolve, reject) => {
       const script = document.createElement('script');
@@ -99,7 +106,7 @@ class ChessGame {
       onDragStart: (source, piece) => this.onDragStart(source, piece),
       onDrop: (source, target) => this.onDrop(source, target),
       onSnapEnd: () => this.onSnapEnd(),
-      pieceTheme: 'https://chessboardjs.com/img/chesspieces/wikipedia/{piece}.png'
+      pieceTheme: (piece) => this.vendorUrl('vendor/chesspieces/' + piece + '.png')
     };
 
     this.board = Chessboard('chess-board', config);
@@ -0,0 +1,14 @@
+// Chat history sent packed as {fields: [...], rows: [[...], ...]} (see
+// serializer.pack_messages); plain arrays of messages are returned as they are.
+function unpackMessages(history) {
+  if (!history || Array.isArray(history)) {
+    return history || [];
+  }
+  return history.rows.map((row) => {
+    const message = {};
+    history.fields.forEach((field, i) => {
+      message[field] = row[i];
+    });
+    return message;
+  });
+}
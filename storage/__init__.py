@@ -0,0 +1,27 @@
+"""Storage engines behind the models module.
+
+``create_storage(backend, **options)`` builds one of the BACKENDS; options
+are passed to the engine's constructor.
+"""
+
+from .base import Storage
+from .memory import MemoryStorage
+from .sqlite import SQLiteStorage
+
+BACKENDS = {
+    "sqlite": SQLiteStorage,
+    "memory": MemoryStorage,
+}
+
+
+def create_storage(backend="sqlite", **options):
+    try:
+        engine = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown storage backend {backend!r}, expected one of {sorted(BACKENDS)}"
+        ) from None
+    return engine(**options)
+
+
+__all__ = ["BACKENDS", "MemoryStorage", "SQLiteStorage", "Storage", "create_storage"]
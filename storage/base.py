@@ -0,0 +1,197 @@
+"""The interface every storage engine implements.
+
+Rows are returned as plain dicts with the same keys as the SQLite columns,
+and timestamps as ``YYYY-MM-DD HH:MM:SS`` UTC strings, whatever the engine.
+"""
+
+
+class Storage:
+    """Base class for storage engines; see models.py for the public API"""
+
+    # False for engines that never block on I/O, so callers need not move
+    # their calls off the eventlet hub
+    blocking = True
+
+    def blocks(self, name):
+        """Whether the call ``name`` can block the eventlet hub on I/O"""
+        return self.blocking
+
+    def init(self):
+        """Create or migrate the schema and seed the availability row"""
+        raise NotImplementedError
+
+    def close(self):
+        """Flush pending writes and release connections"""
+
+    def flush_writes(self):
+        """Block until every queued background write has been committed"""
+
+    # Shared generation counters, bumped after writes that readers cache:
+    # "status" (availability), "chat" (messages, deletes and clears),
+    # "pending" (visitor requests, approvals and rejections), "guestbook"
+    # (notes left, read and deleted) and "visits" (visits logged and ended)
+    def get_generation(self, name):
+        raise NotImplementedError
+
+    def bump_generation(self, name):
+        raise NotImplementedError
+
+    # Availability status
+    def get_current_status(self):
+        raise NotImplementedError
+
+    def update_status(self, status, message):
+        raise NotImplementedError
+
+    # Guest book
+    def add_message(self, visitor_name, message):
+        raise NotImplementedError
+
+    def get_messages(self, limit=50, unread_only=False):
+        raise NotImplementedError
+
+    def mark_message_read(self, message_id):
+        raise NotImplementedError
+
+    def delete_message(self, message_id):
+        raise NotImplementedError
+
+    def get_unread_count(self):
+        raise NotImplementedError
+
+    # Visits
+    def log_visit(self, visitor_name, connection_type):
+        raise NotImplementedError
+
+    def end_visit(self, visit_id):
+        raise NotImplementedError
+
+    def get_recent_visits(self, limit=20):
+        raise NotImplementedError
+
+    def get_visit_stats(self):
+        raise NotImplementedError
+
+    def rebuild_visit_rollups(self):
+        raise NotImplementedError
+
+    # Pending visitors
+    def create_pending_visitor(self, name, email, session_id):
+        raise NotImplementedError
+
+    def get_pending_visitors(self):
+        raise NotImplementedError
+
+    def approve_visitor(self, visitor_id):
+        raise NotImplementedError
+
+    def reject_visitor(self, visitor_id):
+        raise NotImplementedError
+
+    def get_visitor_by_session(self, session_id):
+        raise NotImplementedError
+
+    # Admin dashboard
+    def get_dashboard(self, messages_limit=20, visits_limit=10):
+        """Everything the admin dashboard shows, as one dict: status,
+        messages, unread_count, visits, stats and pending_visitors"""
+        return {
+            "status": self.get_current_status(),
+            "messages": self.get_messages(limit=messages_limit),
+            "unread_count": self.get_unread_count(),
+            "visits": self.get_recent_visits(limit=visits_limit),
+            "stats": self.get_visit_stats(),
+            "pending_visitors": self.get_pending_visitors(),
+        }
+
+    # Chat
+    def save_chat_message(self, sender, sender_name, message, visitor_id=None):
+        raise NotImplementedError
+
+    def get_chat_messages(self, limit=100):
+        raise NotImplementedError
+
+    def get_visitor_chat_messages(self, visitor_id, limit=100):
+        raise NotImplementedError
+
+    def get_chat_cursor(self):
+        raise NotImplementedError
+
+    def get_chat_changes(self, since_id, visitor_id=None, limit=100):
+        raise NotImplementedError
+
+    def delete_chat_message(self, message_id):
+        """Delete a message and return it, or None if it did not exist"""
+        raise NotImplementedError
+
+    def clear_all_chat_messages(self):
+        raise NotImplementedError
+
+    # Presence: connected visitor sockets, shared by every worker process.
+    # Connections are dicts with sid, worker, visitor_id (None if unknown),
+    # visitor_name, visit_id and connected_at (a Unix timestamp). Visitors
+    # are counted once however many tabs they have open.
+    def add_connection(
+        self, sid, worker, visitor_id, visitor_name, connected_at, visit_id=None
+    ):
+        """Record a socket; returns the number of visitors"""
+        raise NotImplementedError
+
+    def remove_connection(self, sid):
+        """Forget a socket; returns (its connection or None, visitors left)"""
+        raise NotImplementedError
+
+    def get_connections(self):
+        raise NotImplementedError
+
+    def count_connections(self):
+        raise NotImplementedError
+
+    def count_visitors(self):
+        raise NotImplementedError
+
+    def find_connections(self, visitor_id):
+        raise NotImplementedError
+
+    def heartbeat(self, worker):
+        """Record that ``worker`` is alive"""
+        raise NotImplementedError
+
+    def get_workers(self):
+        """{worker: Unix time of its last heartbeat}"""
+        raise NotImplementedError
+
+    def remove_workers(self, workers):
+        """Forget workers and their connections; returns connections removed"""
+        raise NotImplementedError
+
+
+def chat_changes(messages, tombstones, head, since_id, limit):
+    """Shape a get_chat_changes() result.
+
+    ``messages`` are the visible messages after ``since_id`` up to ``head``
+    (at most ``limit + 1`` of them), ``tombstones`` are (id, message_id)
+    pairs in id order, message_id None meaning the chat was cleared.
+    """
+    more = len(messages) > limit
+    if more:
+        messages = messages[:limit]
+        head = messages[-1]["id"]
+
+    cleared = None
+    deleted = []
+    for tombstone_id, message_id in tombstones:
+        if tombstone_id > head:
+            break
+        if message_id is None:
+            cleared = tombstone_id
+            deleted = []
+        else:
+            deleted.append(message_id)
+    return {
+        "messages": messages,
+        "deleted": deleted,
+        "cleared": cleared,
+        "cursor": max(head, since_id),
+        "more": more,
+    }
@@ -0,0 +1,477 @@
+"""In-memory storage engine for tests, benchmarks and throwaway demos.
+
+Nothing is persisted and nothing is shared between processes. Every call is
+a few dict or list operations under one lock, so it is safe from native
+threads and never blocks the eventlet hub.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+import threading
+import time
+
+from .base import Storage, chat_changes
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _seconds_between(start, end):
+    fmt = "%Y-%m-%d %H:%M:%S"
+    return int(
+        (datetime.strptime(end, fmt) - datetime.strptime(start, fmt)).total_seconds()
+    )
+
+
+def _newest(rows, limit, key):
+    """Copies of the ``limit`` rows with the largest ``key``, newest first"""
+    return [dict(row) for row in sorted(rows, key=key, reverse=True)[:limit]]
+
+
+class Connection:
+    """One connected socket; ``connected_at`` is a Unix timestamp"""
+
+    __slots__ = (
+        "sid",
+        "worker",
+        "visitor_id",
+        "visitor_name",
+        "visit_id",
+        "connected_at",
+    )
+
+    def __init__(
+        self, sid, worker, visitor_id, visitor_name, connected_at, visit_id=None
+    ):
+        self.sid = sid
+        self.worker = worker
+        self.visitor_id = visitor_id
+        self.visitor_name = visitor_name
+        self.visit_id = visit_id
+        self.connected_at = connected_at
+
+    @property
+    def visitor_key(self):
+        """Groups a visitor's tabs; sockets without a visitor id stand alone"""
+        return self.visitor_id if self.visitor_id is not None else ("sid", self.sid)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ConnectionRegistry:
+    """Connections indexed by sid, by visitor (every tab) and by visit id.
+
+    Lookups are dict operations; a visitor's tabs are a short list, since
+    a visitor rarely has more than a few open. Not thread-safe on its own;
+    callers that share one across native threads hold a lock.
+    """
+
+    def __init__(self):
+        self._by_sid = {}
+        self._by_visitor = {}  # visitor key -> [Connection, ...], oldest first
+        self._by_visit = {}
+
+    def __len__(self):
+        return len(self._by_sid)
+
+    def __contains__(self, sid):
+        return sid in self._by_sid
+
+    def add(self, connection):
+        """Index ``connection``, replacing any earlier one with its sid"""
+        self.remove(connection.sid)
+        self._by_sid[connection.sid] = connection
+        self._by_visitor.setdefault(connection.visitor_key, []).append(connection)
+        if connection.visit_id is not None:
+            self._by_visit[connection.visit_id] = connection
+        return connection
+
+    def remove(self, sid):
+        """Unindex and return the connection with ``sid``, or None"""
+        connection = self._by_sid.pop(sid, None)
+        if connection is None:
+            return None
+        tabs = self._by_visitor[connection.visitor_key]
+        tabs.remove(connection)
+        if not tabs:
+            del self._by_visitor[connection.visitor_key]
+        if self._by_visit.get(connection.visit_id) is connection:
+            del self._by_visit[connection.visit_id]
+        return connection
+
+    def get(self, sid):
+        return self._by_sid.get(sid)
+
+    def by_visitor(self, visitor_id):
+        """Every tab of one visitor, oldest first"""
+        return list(self._by_visitor.get(visitor_id, ()))
+
+    def by_visit(self, visit_id):
+        """The socket that logged visit ``visit_id``, or None"""
+        return self._by_visit.get(visit_id)
+
+    def visitor_count(self):
+        """Distinct visitors, however many tabs each has open"""
+        return len(self._by_visitor)
+
+    def snapshot(self):
+        """Connections as a list, safe to iterate while others come and go"""
+        return list(self._by_sid.values())
+
+    def remove_worker(self, worker):
+        """Unindex every connection of ``worker`` and return them"""
+        gone = [c for c in self._by_sid.values() if c.worker == worker]
+        for connection in gone:
+            self.remove(connection.sid)
+        return gone
+
+
+class MemoryStorage(Storage):
+    """Storage in Python dicts, mirroring the SQLite engine's results"""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._generations = {}
+        self._status = None
+        self._messages = OrderedDict()
+        self._message_id = 0
+        self._visits = OrderedDict()
+        self._visit_rollups = {}
+        self._pending = OrderedDict()
+        self._pending_by_session = {}
+        self._chat = OrderedDict()
+        # Chat message and tombstone ids share one sequence, as in SQLite
+        self._chat_seq = 0
+        self._tombstones = []
+        self._connections = ConnectionRegistry()
+        self._workers = {}
+
+    def init(self):
+        with self._lock:
+            if self._status is None:
+                self._set_status("away", "Not available right now")
+                self.bump_generation("status")
+
+    def get_generation(self, name):
+        with self._lock:
+            return self._generations.get(name, 0)
+
+    def bump_generation(self, name):
+        # Clock based like the SQLite stamps, so values from before a restart
+        # are never reused
+        with self._lock:
+            self._generations[name] = max(
+                time.time_ns(), self._generations.get(name, 0) + 1
+            )
+            return self._generations[name]
+
+    def _set_status(self, status, message):
+        self._status = {
+            "status": status,
+            "message": message,
+            "updated_at": _now(),
+        }
+
+    def get_current_status(self):
+        with self._lock:
+            if self._status is None:
+                return {
+                    "status": "away",
+                    "message": "Not available",
+                    "updated_at": None,
+                }
+            return dict(self._status)
+
+    def update_status(self, status, message):
+        with self._lock:
+            self._set_status(status, message)
+            self.bump_generation("status")
+
+    def add_message(self, visitor_name, message):
+        with self._lock:
+            self._message_id += 1
+            self._messages[self._message_id] = {
+                "id": self._message_id,
+                "visitor_name": visitor_name,
+                "message": message,
+                "created_at": _now(),
+                "is_read": 0,
+            }
+            self.bump_generation("guestbook")
+
+    def get_messages(self, limit=50, unread_only=False):
+        with self._lock:
+            rows = self._messages.values()
+            if unread_only:
+                rows = [row for row in rows if not row["is_read"]]
+            return _newest(rows, limit, lambda row: (row["created_at"], row["id"]))
+
+    def mark_message_read(self, message_id):
+        with self._lock:
+            row = self._messages.get(message_id)
+            if row is not None:
+                row["is_read"] = 1
+                self.bump_generation("guestbook")
+
+    def delete_message(self, message_id):
+        with self._lock:
+            if self._messages.pop(message_id, None) is not None:
+                self.bump_generation("guestbook")
+
+    def get_unread_count(self):
+        with self._lock:
+            return sum(1 for row in self._messages.values() if not row["is_read"])
+
+    def _add_to_visit_rollups(self, visit, visits=0, completed=0):
+        duration = (visit["duration_seconds"] or 0) * completed
+        for period in (visit["started_at"][:10], "all"):
+            rollup = self._visit_rollups.setdefault(
+                period, {"visits": 0, "completed": 0, "total_duration": 0}
+            )
+            rollup["visits"] += visits
+            rollup["completed"] += completed
+            rollup["total_duration"] += duration
+
+    def log_visit(self, visitor_name, connection_type):
+        with self._lock:
+            visit_id = len(self._visits) + 1
+            visit = self._visits[visit_id] = {
+                "id": visit_id,
+                "visitor_name": visitor_name,
+                "started_at": _now(),
+                "ended_at": None,
+                "connection_type": connection_type,
+                "duration_seconds": None,
+            }
+            self._add_to_visit_rollups(visit, visits=1)
+            self.bump_generation("visits")
+            return visit_id
+
+    def end_visit(self, visit_id):
+        with self._lock:
+            visit = self._visits.get(visit_id)
+            if visit is None or visit["ended_at"] is not None:
+                return
+            visit["ended_at"] = _now()
+            visit["duration_seconds"] = _seconds_between(
+                visit["started_at"], visit["ended_at"]
+            )
+            self._add_to_visit_rollups(visit, completed=1)
+            self.bump_generation("visits")
+
+    def get_recent_visits(self, limit=20):
+        with self._lock:
+            return _newest(
+                self._visits.values(),
+                limit,
+                lambda row: (row["started_at"], row["id"]),
+            )
+
+    def get_visit_stats(self):
+        with self._lock:
+            total = self._visit_rollups.get("all")
+            today = self._visit_rollups.get(_now()[:10])
+            avg_duration = (
+                total["total_duration"] / total["completed"]
+                if total and total["completed"]
+                else 0
+            )
+            return {
+                "total_visits": total["visits"] if total else 0,
+                "today_visits": today["visits"] if today else 0,
+                "avg_duration_minutes": (
+                    round(avg_duration / 60, 1) if avg_duration else 0
+                ),
+            }
+
+    def rebuild_visit_rollups(self):
+        with self._lock:
+            self._visit_rollups = {}
+            for visit in self._visits.values():
+                self._add_to_visit_rollups(
+                    visit, visits=1, completed=int(visit["ended_at"] is not None)
+                )
+
+    def create_pending_visitor(self, name, email, session_id):
+        with self._lock:
+            if session_id in self._pending_by_session:
+                raise ValueError(f"Duplicate visitor session: {session_id}")
+            visitor_id = len(self._pending) + 1
+            self._pending[visitor_id] = {
+                "id": visitor_id,
+                "name": name,
+                "email": email,
+                "requested_at": _now(),
+                "approved": 0,
+                "rejected": 0,
+                "approved_at": None,
+                "session_id": session_id,
+            }
+            self._pending_by_session[session_id] = visitor_id
+            self.bump_generation("pending")
+            return visitor_id
+
+    def get_pending_visitors(self):
+        with self._lock:
+            rows = [
+                row
+                for row in self._pending.values()
+                if not row["approved"] and not row["rejected"]
+            ]
+            return _newest(
+                rows, len(rows), lambda row: (row["requested_at"], row["id"])
+            )
+
+    def approve_visitor(self, visitor_id):
+        with self._lock:
+            row = self._pending.get(visitor_id)
+            if row is not None:
+                row["approved"] = 1
+                row["approved_at"] = _now()
+                self.bump_generation("pending")
+
+    def reject_visitor(self, visitor_id):
+        with self._lock:
+            row = self._pending.get(visitor_id)
+            if row is not None:
+                row["rejected"] = 1
+                self.bump_generation("pending")
+
+    def get_visitor_by_session(self, session_id):
+        with self._lock:
+            visitor_id = self._pending_by_session.get(session_id)
+            return dict(self._pending[visitor_id]) if visitor_id else None
+
+    def get_dashboard(self, messages_limit=20, visits_limit=10):
+        # The lock is reentrant: one consistent view across every section
+        with self._lock:
+            return super().get_dashboard(messages_limit, visits_limit)
+
+    def save_chat_message(self, sender, sender_name, message, visitor_id=None):
+        with self._lock:
+            self._chat_seq += 1
+            self._chat[self._chat_seq] = {
+                "id": self._chat_seq,
+                "sender": sender,
+                "sender_name": sender_name,
+                "message": message,
+                "visitor_id": visitor_id,
+                "created_at": _now(),
+            }
+            self.bump_generation("chat")
+            return self._chat_seq
+
+    def get_chat_messages(self, limit=100):
+        with self._lock:
+            rows = sorted(
+                self._chat.values(), key=lambda row: (row["created_at"], row["id"])
+            )
+            return [dict(row) for row in rows[:limit]]
+
+    def get_visitor_chat_messages(self, visitor_id, limit=100):
+        with self._lock:
+            rows = [
+                row
+                for row in reversed(self._chat.values())
+                if row["visitor_id"] == visitor_id or row["sender"] == "admin"
+            ][:limit]
+            return [dict(row) for row in reversed(rows)]
+
+    def get_chat_cursor(self):
+        with self._lock:
+            return self._chat_seq
+
+    def get_chat_changes(self, since_id, visitor_id=None, limit=100):
+        with self._lock:
+            messages = []
+            for row in self._chat.values():
+                if row["id"] <= since_id:
+                    continue
+                if (
+                    visitor_id is None
+                    or row["visitor_id"] == visitor_id
+                    or row["sender"] == "admin"
+                ):
+                    messages.append(dict(row))
+                    if len(messages) > limit:
+                        break
+            tombstones = [
+                (tombstone["id"], tombstone["message_id"])
+                for tombstone in self._tombstones
+                if tombstone["id"] > since_id
+            ]
+            return chat_changes(messages, tombstones, self._chat_seq, since_id, limit)
+
+    def _add_chat_tombstone(self, message_id):
+        self._chat_seq += 1
+        self._tombstones.append(
+            {"id": self._chat_seq, "message_id": message_id, "created_at": _now()}
+        )
+        self.bump_generation("chat")
+
+    def delete_chat_message(self, message_id):
+        with self._lock:
+            message = self._chat.pop(message_id, None)
+            if message is not None:
+                self._add_chat_tombstone(message_id)
+                return dict(message)
+            return None
+
+    def clear_all_chat_messages(self):
+        with self._lock:
+            self._chat.clear()
+            self._add_chat_tombstone(None)
+
+    def add_connection(
+        self, sid, worker, visitor_id, visitor_name, connected_at, visit_id=None
+    ):
+        with self._lock:
+            connection = Connection(
+                sid, worker, visitor_id, visitor_name, connected_at, visit_id
+            )
+            self._connections.add(connection)
+            return self._connections.visitor_count()
+
+    def remove_connection(self, sid):
+        with self._lock:
+            connection = self._connections.remove(sid)
+            return (
+                connection.as_dict() if connection else None,
+                self._connections.visitor_count(),
+            )
+
+    def get_connections(self):
+        with self._lock:
+            return [c.as_dict() for c in self._connections.snapshot()]
+
+    def count_connections(self):
+        with self._lock:
+            return len(self._connections)
+
+    def count_visitors(self):
+        with self._lock:
+            return self._connections.visitor_count()
+
+    def find_connections(self, visitor_id):
+        with self._lock:
+            return [c.as_dict() for c in self._connections.by_visitor(visitor_id)]
+
+    def heartbeat(self, worker):
+        with self._lock:
+            self._workers[worker] = time.time()
+
+    def get_workers(self):
+        with self._lock:
+            return dict(self._workers)
+
+    def remove_workers(self, workers):
+        with self._lock:
+            removed = 0
+            for worker in workers:
+                self._workers.pop(worker, None)
+                removed += len(self._connections.remove_worker(worker))
+            return removed
@@ -0,0 +1,258 @@
+"""Long-lived SQLite connections for the SQLite storage engine."""
+
+from collections import deque
+import contextvars
+import sqlite3
+import threading
+import time
+
+try:
+    from eventlet import patcher
+except ImportError:  # pragma: no cover - eventlet is in requirements.txt
+    patcher = None
+
+# State shared by green threads on the hub and native tpool threads (see
+# db.py) needs real locks even after monkey patching: a green lock contended
+# across threads raises greenlet.error and wedges the process.
+native_threading = patcher.original("threading") if patcher else threading
+_native_thread = patcher.original("_thread") if patcher else threading
+
+HEALTH_CHECK_AFTER = 30  # seconds idle before a connection is re-checked
+HUB_POLL = 0.005  # seconds a green thread sleeps between checks for a slot
+
+# {"queries": n, "rows": n} of the request being served, counted by traced
+# connections. Unset (None) outside a request, e.g. on the write-behind thread.
+sql_trace = contextvars.ContextVar("sql_trace", default=None)
+
+
+def configure_connection(conn):
+    """Per-connection setup, run once when the connection is opened"""
+    conn.row_factory = sqlite3.Row
+    # Only affects a brand new database file, and must come before WAL mode.
+    # Lets the retention job reclaim space with PRAGMA incremental_vacuum.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # Enable WAL mode for better concurrent access
+    conn.execute("PRAGMA journal_mode=WAL")
+
+
+def _count(queries, rows):
+    trace = sql_trace.get()
+    if trace is not None:
+        trace["queries"] += queries
+        trace["rows"] += rows
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that counts statements run and rows read into ``sql_trace``"""
+
+    def execute(self, sql, parameters=()):
+        super().execute(sql, parameters)
+        _count(1, max(self.rowcount, 0))
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        super().executemany(sql, seq_of_parameters)
+        _count(1, max(self.rowcount, 0))
+        return self
+
+    def executescript(self, script):
+        _count(1, 0)
+        return super().executescript(script)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _count(0, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        _count(0, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _count(0, len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        _count(0, 1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose statements, cursors included, go through TracedCursor"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+def connect(database, traced=False):
+    """A plain, unpooled connection"""
+    factory = TracedConnection if traced else sqlite3.Connection
+    conn = sqlite3.connect(database, timeout=10, factory=factory)
+    configure_connection(conn)
+    return conn
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that goes back to its pool on close()"""
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def really_close(self):
+        super().close()
+
+
+class TracedPooledConnection(TracedConnection, PooledConnection):
+    pass
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections.
+
+    A connection is owned by the green thread (or thread) that acquired it
+    until every matching close() has been called, so nested get_db() calls
+    share one connection. At most ``size`` connections are checked out at
+    once: acquire() waits up to ``timeout`` seconds for one to come back and
+    then raises sqlite3.OperationalError. Idle connections are checked with a
+    cheap query before reuse when they have sat idle a while. ``traced``
+    connections count their statements into ``sql_trace``.
+    """
+
+    def __init__(self, database, size=8, traced=False, timeout=10):
+        self.database = database
+        self.size = size
+        self.traced = traced
+        self.timeout = timeout
+        self._idle = deque()
+        self._owners = {}
+        self._checked_out = 0
+        self._returned = native_threading.Condition()
+        # Native thread the pool was made on: the eventlet hub's, in the app
+        self._hub_thread = _native_thread.get_ident()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=10,
+            factory=TracedPooledConnection if self.traced else PooledConnection,
+            check_same_thread=False,
+        )
+        configure_connection(conn)
+        conn.pool = self
+        return conn
+
+    def _healthy(self, conn, idle_since):
+        if time.monotonic() - idle_since < HEALTH_CHECK_AFTER:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        owner = threading.get_ident()
+        held = self._owners.get(owner)
+        if held is not None:
+            held[1] += 1
+            return held[0]
+
+        self._check_out()
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    candidate, idle_since = self._idle.pop()
+                except IndexError:
+                    conn = self._connect()
+                    break
+                if self._healthy(candidate, idle_since):
+                    conn = candidate
+                else:
+                    candidate.really_close()
+        except BaseException:
+            self._check_in()
+            raise
+
+        self._owners[owner] = [conn, 1]
+        return conn
+
+    def _check_out(self):
+        deadline = time.monotonic() + self.timeout
+        on_hub = _native_thread.get_ident() == self._hub_thread
+        with self._returned:
+            while self._checked_out >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"all {self.size} pooled connections are in use"
+                    )
+                if not on_hub:
+                    self._returned.wait(remaining)
+                    continue
+                # Blocking the hub thread would also stop the green threads
+                # due to hand their connections back, so sleep (green once
+                # patched) with the lock released instead
+                self._returned.release()
+                try:
+                    time.sleep(min(remaining, HUB_POLL))
+                finally:
+                    self._returned.acquire()
+            self._checked_out += 1
+
+    def _check_in(self):
+        with self._returned:
+            self._checked_out -= 1
+            self._returned.notify()
+
+    def release(self, conn):
+        owner = threading.get_ident()
+        held = self._owners.get(owner)
+        if held is None or held[0] is not conn:
+            # Released from a different thread than it was acquired on
+            for key, value in list(self._owners.items()):
+                if value[0] is conn:
+                    owner, held = key, value
+                    break
+            else:
+                conn.really_close()
+                return
+
+        held[1] -= 1
+        if held[1] > 0:
+            return
+        del self._owners[owner]
+
+        try:
+            if conn.in_transaction:
+                # Match the old close() semantics: uncommitted work is dropped
+                conn.rollback()
+        except sqlite3.Error:
+            conn.really_close()
+        else:
+            self._idle.append((conn, time.monotonic()))
+        finally:
+            self._check_in()
+
+    def close_all(self):
+        while self._idle:
+            conn, _ = self._idle.pop()
+            conn.really_close()
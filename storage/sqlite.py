@@ -0,0 +1,831 @@
+"""SQLite storage engine, the one used in production."""
+
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+import heapq
+import os
+import time
+
+import migrations
+
+from .base import Storage, chat_changes
+from .pool import ConnectionPool, connect, native_threading
+from .writebehind import WriteBehindQueue
+
+# Key of the admin messages' chat history buffer
+_ADMIN_HISTORY = ("admin",)
+
+# Everything get_dashboard() reads is covered by one of these
+_DASHBOARD_GENERATIONS = ("status", "guestbook", "visits", "pending")
+
+
+def _status_from_row(result):
+    if result:
+        return {
+            "status": result["status"],
+            "message": result["message"],
+            "updated_at": result["updated_at"],
+        }
+    return {"status": "away", "message": "Not available", "updated_at": None}
+
+
+def _add_to_visit_rollups(cursor, visit_id, visits=0, completed=0):
+    """Fold one visit into its day's rollup row and the 'all' row"""
+    for period in ("DATE(started_at)", "'all'"):
+        cursor.execute(
+            f"""
+            INSERT INTO visit_rollups (period, visits, completed, total_duration)
+            SELECT {period}, ?, ?, COALESCE(duration_seconds, 0) * ?
+            FROM visits WHERE id = ?
+            ON CONFLICT(period) DO UPDATE SET
+                visits = visits + excluded.visits,
+                completed = completed + excluded.completed,
+                total_duration = total_duration + excluded.total_duration
+        """,
+            (visits, completed, completed, visit_id),
+        )
+
+
+def _insert_visit(cursor, visitor_name, connection_type):
+    cursor.execute(
+        "INSERT INTO visits (visitor_name, connection_type) VALUES (?, ?)",
+        (visitor_name, connection_type),
+    )
+    visit_id = cursor.lastrowid
+    _add_to_visit_rollups(cursor, visit_id, visits=1)
+    return visit_id
+
+
+def _finish_visit(cursor, visit_id):
+    cursor.execute(
+        """
+        UPDATE visits 
+        SET ended_at = CURRENT_TIMESTAMP,
+            duration_seconds = (strftime('%s', CURRENT_TIMESTAMP) - strftime('%s', started_at))
+        WHERE id = ? AND ended_at IS NULL
+    """,
+        (visit_id,),
+    )
+    if cursor.rowcount:
+        _add_to_visit_rollups(cursor, visit_id, completed=1)
+
+
+def _insert_chat_message(cursor, sender, sender_name, message, visitor_id, created_at):
+    cursor.execute(
+        """INSERT INTO chat_messages (sender, sender_name, message, visitor_id, created_at) 
+           VALUES (?, ?, ?, ?, ?)""",
+        (sender, sender_name, message, visitor_id, created_at),
+    )
+    return cursor.lastrowid
+
+
+# Deletions and clears leave tombstones so incremental readers can catch up.
+# Tombstone ids come from the chat_messages AUTOINCREMENT sequence, so one
+# since_id cursor orders messages and tombstones together.
+def _add_chat_tombstone(cursor, message_id):
+    cursor.execute(
+        "UPDATE sqlite_sequence SET seq = seq + 1 WHERE name = 'chat_messages'"
+    )
+    if not cursor.rowcount:
+        cursor.execute(
+            "INSERT INTO sqlite_sequence (name, seq) VALUES ('chat_messages', 1)"
+        )
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'chat_messages'")
+    cursor.execute(
+        "INSERT INTO chat_tombstones (id, message_id) VALUES (?, ?)",
+        (cursor.fetchone()["seq"], message_id),
+    )
+
+
+def _delete_chat_message(cursor, message_id):
+    cursor.execute("SELECT * FROM chat_messages WHERE id = ?", (message_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    cursor.execute("DELETE FROM chat_messages WHERE id = ?", (message_id,))
+    _add_chat_tombstone(cursor, message_id)
+    return dict(row)
+
+
+def _clear_chat_messages(cursor):
+    cursor.execute("DELETE FROM chat_messages")
+    _add_chat_tombstone(cursor, None)
+
+
+def _add_connection(
+    cursor, sid, worker, visitor_id, visitor_name, connected_at, visit_id
+):
+    cursor.execute(
+        """INSERT OR REPLACE INTO presence
+           (sid, worker, visitor_id, visitor_name, connected_at, visit_id)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (sid, worker, visitor_id, visitor_name, connected_at, visit_id),
+    )
+    return _count_visitors(cursor)
+
+
+def _remove_connection(cursor, sid):
+    cursor.execute("SELECT * FROM presence WHERE sid = ?", (sid,))
+    row = cursor.fetchone()
+    if row is not None:
+        cursor.execute("DELETE FROM presence WHERE sid = ?", (sid,))
+    return (dict(row) if row else None), _count_visitors(cursor)
+
+
+def _count_visitors(cursor):
+    # A visitor's tabs share a visitor_id; sockets without one count alone
+    cursor.execute(
+        "SELECT COUNT(DISTINCT COALESCE(visitor_id, sid)) AS count FROM presence"
+    )
+    return cursor.fetchone()["count"]
+
+
+def _heartbeat(cursor, worker, seen_at):
+    cursor.execute(
+        """INSERT INTO presence_workers (worker, seen_at) VALUES (?, ?)
+           ON CONFLICT(worker) DO UPDATE SET seen_at = excluded.seen_at""",
+        (worker, seen_at),
+    )
+
+
+def _remove_workers(cursor, workers):
+    removed = 0
+    for worker in workers:
+        cursor.execute("DELETE FROM presence WHERE worker = ?", (worker,))
+        removed += cursor.rowcount
+        cursor.execute("DELETE FROM presence_workers WHERE worker = ?", (worker,))
+    return removed
+
+
+def _chat_head(cursor):
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'chat_messages'")
+    row = cursor.fetchone()
+    return row["seq"] if row else 0
+
+
+def _select_status(cursor):
+    cursor.execute(
+        "SELECT * FROM availability WHERE id = (SELECT MAX(id) FROM availability)"
+    )
+    return _status_from_row(cursor.fetchone())
+
+
+def _select_messages(cursor, limit, unread_only=False):
+    query = "SELECT * FROM messages"
+    if unread_only:
+        query += " WHERE is_read = 0"
+    query += " ORDER BY created_at DESC LIMIT ?"
+    cursor.execute(query, (limit,))
+    return [dict(msg) for msg in cursor.fetchall()]
+
+
+def _count_unread(cursor):
+    cursor.execute("SELECT COUNT(*) as count FROM messages WHERE is_read = 0")
+    return cursor.fetchone()["count"]
+
+
+def _select_recent_visits(cursor, limit):
+    cursor.execute("SELECT * FROM visits ORDER BY started_at DESC LIMIT ?", (limit,))
+    return [dict(visit) for visit in cursor.fetchall()]
+
+
+def _visit_stats(cursor):
+    """Dashboard stats from the visit_rollups table (two primary key lookups)"""
+    cursor.execute("SELECT * FROM visit_rollups WHERE period IN ('all', DATE('now'))")
+    rows = {row["period"]: row for row in cursor.fetchall()}
+    total = rows.get("all")
+    today = [row for period, row in rows.items() if period != "all"]
+    avg_duration = (
+        total["total_duration"] / total["completed"]
+        if total and total["completed"]
+        else 0
+    )
+    return {
+        "total_visits": total["visits"] if total else 0,
+        "today_visits": today[0]["visits"] if today else 0,
+        "avg_duration_minutes": round(avg_duration / 60, 1) if avg_duration else 0,
+    }
+
+
+def _select_pending_visitors(cursor):
+    cursor.execute(
+        "SELECT * FROM pending_visitors WHERE approved = 0 AND rejected = 0 ORDER BY requested_at DESC"
+    )
+    return [dict(v) for v in cursor.fetchall()]
+
+
+# Calls whose only SQLite work is a _write(); with write_behind they wait on
+# the writer, which blocks their own green thread but not the hub
+_QUEUED_WRITES = frozenset(
+    {
+        "save_chat_message",
+        "delete_chat_message",
+        "clear_all_chat_messages",
+        "log_visit",
+        "end_visit",
+        "add_connection",
+        "remove_connection",
+        "heartbeat",
+        "remove_workers",
+    }
+)
+
+
+class SQLiteStorage(Storage):
+    """Storage in a SQLite database file.
+
+    Connections are pooled, at most ``pool_size`` in use at once
+    (``pool_size = 0`` opens one per call), chat messages and visit logs go
+    through a group-commit writer unless ``write_behind`` is off, and the
+    current status, visitors' access requests by session, per-visitor chat
+    histories and the admin dashboard are cached in memory.
+    ``execute(fn, *args)`` runs the writer's batches, e.g. on a native
+    thread. With ``trace_sql`` statements and rows are counted into
+    ``pool.sql_trace`` for the request being served.
+    """
+
+    def __init__(
+        self,
+        database="welcome_window.db",
+        pool_size=8,
+        write_behind=True,
+        write_batch_size=100,
+        write_batch_window=0.002,
+        status_cache_ttl=60,
+        approval_cache_size=1000,
+        approval_cache_ttl=60,
+        dashboard_cache_ttl=2,
+        chat_history_buffer=100,
+        chat_history_visitors=1000,
+        execute=None,
+        trace_sql=False,
+    ):
+        self.database = database
+        self.pool_size = pool_size
+        self.write_behind = write_behind
+        self.write_batch_size = write_batch_size
+        self.write_batch_window = write_batch_window
+        self.status_cache_ttl = status_cache_ttl
+        self.approval_cache_size = approval_cache_size
+        self.approval_cache_ttl = approval_cache_ttl
+        self.dashboard_cache_ttl = dashboard_cache_ttl
+        self.chat_history_buffer = chat_history_buffer
+        self.chat_history_visitors = chat_history_visitors
+        self.execute = execute
+        self.trace_sql = trace_sql
+
+        self._pool = (
+            ConnectionPool(database, pool_size, traced=trace_sql)
+            if pool_size > 0
+            else None
+        )
+        self._writer = None
+        self._status_cache = {"value": None, "generation": None, "loaded_at": 0.0}
+
+        # Access requests by session id, as (pending generation, loaded at,
+        # row or None). Every create, approve and reject bumps the generation,
+        # in any worker, so an entry is only used while nothing has changed.
+        self._approval_cache = OrderedDict()
+
+        # Last admin dashboard snapshot, as (limits and generations, loaded
+        # at, snapshot); kept for dashboard_cache_ttl seconds at most
+        self._dashboard_cache = None
+
+        # Per-visitor chat history ring buffers. Each buffer holds the newest
+        # chat_history_buffer messages of one visitor (or of the admin, under
+        # _ADMIN_HISTORY) and is only kept once it has been loaded from
+        # SQLite, so a buffered history is always complete up to its size.
+        # _chat_lock covers the buffers, the epoch and the in-flight count;
+        # writes take it on the hub and offloaded reads on tpool threads, so
+        # it is a native lock, and nothing is done under it that could yield.
+        self._chat_buffers = OrderedDict()
+        self._chat_epoch = 0
+        self._chat_writes_in_flight = 0
+        self._chat_lock = native_threading.Lock()
+
+    def blocks(self, name):
+        if name == "flush_writes":
+            return False  # waits on the writer, or has nothing to wait for
+        if name in _QUEUED_WRITES:
+            return not self.write_behind
+        if name == "get_current_status":
+            # Cached, so only a miss every status_cache_ttl seconds reads
+            return self.status_cache_ttl <= 0
+        return True
+
+    def get_db(self):
+        if self._pool is None:
+            return connect(self.database, traced=self.trace_sql)
+        return self._pool.acquire()
+
+    def _write(self, op, *args, wait=True):
+        """Run ``op(cursor, *args)`` in a committed transaction.
+
+        With write_behind enabled the op is handed to the group-commit writer
+        and shares a transaction with other concurrent writes.
+        """
+        if not self.write_behind:
+            conn = self.get_db()
+            result = op(conn.cursor(), *args)
+            conn.commit()
+            conn.close()
+            return result
+        if self._writer is None:
+            self._writer = WriteBehindQueue(
+                self.get_db,
+                batch_size=self.write_batch_size,
+                batch_window=self.write_batch_window,
+                execute=self.execute,
+            )
+        return self._writer.submit(op, *args, wait=wait)
+
+    def flush_writes(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._pool is not None:
+            self._pool.close_all()
+
+    # Shared generation counters ("status", "chat", "pending"), bumped after
+    # the write commits. Each one is the mtime of a stamp file next to the
+    # database, so every worker process sees a bump without querying SQLite.
+    def _stamp_path(self, name):
+        return f"{self.database}.{name}.stamp"
+
+    def get_generation(self, name):
+        try:
+            return os.stat(self._stamp_path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def bump_generation(self, name):
+        path = self._stamp_path(name)
+        generation = max(time.time_ns(), self.get_generation(name) + 1)
+        with open(path, "a"):
+            pass
+        os.utime(path, ns=(generation, generation))
+        return self.get_generation(name)
+
+    def init(self):
+        conn = self.get_db()
+        migrations.migrate(conn)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) as count FROM availability")
+        seeded = cursor.fetchone()["count"] == 0
+        if seeded:
+            cursor.execute(
+                "INSERT INTO availability (status, message) VALUES ('away', 'Not available right now')"
+            )
+
+        conn.commit()
+        conn.close()
+        if seeded:
+            self.bump_generation("status")
+
+    def _cache_status(self, status, generation):
+        self._status_cache.update(
+            value=status, generation=generation, loaded_at=time.monotonic()
+        )
+
+    def get_current_status(self):
+        generation = self.get_generation("status")
+        cache = self._status_cache
+        if (
+            cache["value"] is not None
+            and cache["generation"] == generation
+            and time.monotonic() - cache["loaded_at"] < self.status_cache_ttl
+        ):
+            return dict(cache["value"])
+
+        conn = self.get_db()
+        status = _select_status(conn.cursor())
+        conn.close()
+        self._cache_status(status, generation)
+        return dict(status)
+
+    def update_status(self, status, message):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO availability (status, message) VALUES (?, ?)",
+            (status, message),
+        )
+        cursor.execute("SELECT * FROM availability WHERE id = ?", (cursor.lastrowid,))
+        row = cursor.fetchone()
+        conn.commit()
+        conn.close()
+        # Write-through: this process serves the new value straight away and
+        # other workers notice the bumped generation on their next read.
+        self._cache_status(_status_from_row(row), self.bump_generation("status"))
+
+    def add_message(self, visitor_name, message):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO messages (visitor_name, message) VALUES (?, ?)",
+            (visitor_name, message),
+        )
+        conn.commit()
+        conn.close()
+        self.bump_generation("guestbook")
+
+    def get_messages(self, limit=50, unread_only=False):
+        conn = self.get_db()
+        messages = _select_messages(conn.cursor(), limit, unread_only)
+        conn.close()
+        return messages
+
+    def mark_message_read(self, message_id):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE messages SET is_read = 1 WHERE id = ?", (message_id,))
+        conn.commit()
+        conn.close()
+        self.bump_generation("guestbook")
+
+    def delete_message(self, message_id):
+        conn = self.get_db()
+        conn.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+        conn.commit()
+        conn.close()
+        self.bump_generation("guestbook")
+
+    def get_unread_count(self):
+        conn = self.get_db()
+        count = _count_unread(conn.cursor())
+        conn.close()
+        return count
+
+    def log_visit(self, visitor_name, connection_type):
+        visit_id = self._write(_insert_visit, visitor_name, connection_type)
+        self.bump_generation("visits")
+        return visit_id
+
+    def end_visit(self, visit_id):
+        # Nothing waits on the result, so let the writer commit it in the
+        # background. The bump may land just before the commit; the
+        # dashboard cache's TTL bounds how long that can go unseen.
+        self._write(_finish_visit, visit_id, wait=False)
+        self.bump_generation("visits")
+
+    def get_recent_visits(self, limit=20):
+        conn = self.get_db()
+        visits = _select_recent_visits(conn.cursor(), limit)
+        conn.close()
+        return visits
+
+    def get_visit_stats(self):
+        conn = self.get_db()
+        stats = _visit_stats(conn.cursor())
+        conn.close()
+        return stats
+
+    def rebuild_visit_rollups(self):
+        self.flush_writes()
+        conn = self.get_db()
+        conn.execute("BEGIN IMMEDIATE")
+        migrations.rebuild_visit_rollups(conn.cursor())
+        conn.commit()
+        conn.close()
+
+    def create_pending_visitor(self, name, email, session_id):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO pending_visitors (name, email, session_id) VALUES (?, ?, ?)",
+            (name, email, session_id),
+        )
+        visitor_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        self.bump_generation("pending")
+        return visitor_id
+
+    def get_pending_visitors(self):
+        conn = self.get_db()
+        visitors = _select_pending_visitors(conn.cursor())
+        conn.close()
+        return visitors
+
+    def approve_visitor(self, visitor_id):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE pending_visitors SET approved = 1, approved_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (visitor_id,),
+        )
+        conn.commit()
+        conn.close()
+        self.bump_generation("pending")
+
+    def reject_visitor(self, visitor_id):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE pending_visitors SET rejected = 1 WHERE id = ?",
+            (visitor_id,),
+        )
+        conn.commit()
+        conn.close()
+        self.bump_generation("pending")
+
+    def get_visitor_by_session(self, session_id):
+        generation = self.get_generation("pending")
+        cached = self._approval_cache.get(session_id)
+        if (
+            cached is not None
+            and cached[0] == generation
+            and time.monotonic() - cached[1] < self.approval_cache_ttl
+        ):
+            try:
+                self._approval_cache.move_to_end(session_id)
+            except KeyError:  # evicted meanwhile by another thread
+                pass
+            return dict(cached[2]) if cached[2] else None
+
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM pending_visitors WHERE session_id = ?",
+            (session_id,),
+        )
+        result = cursor.fetchone()
+        conn.close()
+        visitor = dict(result) if result else None
+        if self.approval_cache_size > 0:
+            self._approval_cache.pop(session_id, None)
+            self._approval_cache[session_id] = (generation, time.monotonic(), visitor)
+            while len(self._approval_cache) > self.approval_cache_size:
+                try:
+                    self._approval_cache.popitem(last=False)
+                except KeyError:
+                    break
+        return dict(visitor) if visitor else None
+
+    def get_dashboard(self, messages_limit=20, visits_limit=10):
+        key = (messages_limit, visits_limit) + tuple(
+            self.get_generation(name) for name in _DASHBOARD_GENERATIONS
+        )
+        cached = self._dashboard_cache
+        if (
+            cached is not None
+            and cached[0] == key
+            and time.monotonic() - cached[1] < self.dashboard_cache_ttl
+        ):
+            return dict(cached[2])
+
+        conn = self.get_db()
+        cursor = conn.cursor()
+        if not conn.in_transaction:
+            # Deferred: every SELECT below reads the same WAL snapshot
+            cursor.execute("BEGIN")
+        dashboard = {
+            "status": _select_status(cursor),
+            "messages": _select_messages(cursor, messages_limit),
+            "unread_count": _count_unread(cursor),
+            "visits": _select_recent_visits(cursor, visits_limit),
+            "stats": _visit_stats(cursor),
+            "pending_visitors": _select_pending_visitors(cursor),
+        }
+        conn.close()  # back to the pool, which ends the read transaction
+        if self.dashboard_cache_ttl > 0:
+            self._dashboard_cache = (key, time.monotonic(), dashboard)
+        return dict(dashboard)
+
+    def _write_chat(self, update, op, *args):
+        """Run a chat write, then ``update(result)`` the history buffers.
+
+        The write counts as in flight until the buffers are updated and the
+        epoch bumped, all under the lock, so a history loaded meanwhile is
+        never kept: it could miss the write, or get it added a second time.
+        """
+        with self._chat_lock:
+            self._chat_writes_in_flight += 1
+        committed = False
+        try:
+            result = self._write(op, *args)
+            committed = True
+        finally:
+            with self._chat_lock:
+                if committed:
+                    update(result)
+                self._chat_epoch += 1
+                self._chat_writes_in_flight -= 1
+        self.bump_generation("chat")
+        return result
+
+    def save_chat_message(self, sender, sender_name, message, visitor_id=None):
+        created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+        def buffer(message_id):
+            self._buffer_chat_message(
+                {
+                    "id": message_id,
+                    "sender": sender,
+                    "sender_name": sender_name,
+                    "message": message,
+                    "visitor_id": visitor_id,
+                    "created_at": created_at,
+                }
+            )
+
+        return self._write_chat(
+            buffer,
+            _insert_chat_message,
+            sender,
+            sender_name,
+            message,
+            visitor_id,
+            created_at,
+        )
+
+    def _buffer_chat_message(self, message):
+        key = _ADMIN_HISTORY if message["sender"] == "admin" else message["visitor_id"]
+        buffer = self._chat_buffers.get(key)
+        if buffer is not None:
+            buffer.append(message)
+            if len(buffer) > 1 and buffer[-2]["id"] > message["id"]:
+                # Writes from one batch can finish out of order
+                ordered = sorted(buffer, key=lambda msg: msg["id"])
+                buffer.clear()
+                buffer.extend(ordered)
+
+    def _chat_history(self, key, limit):
+        with self._chat_lock:
+            buffer = self._chat_buffers.get(key)
+            if buffer is not None:
+                self._chat_buffers.move_to_end(key)
+                return list(buffer)[-limit:]
+            epoch = self._chat_epoch if not self._chat_writes_in_flight else None
+
+        conn = self.get_db()
+        cursor = conn.cursor()
+        if key is _ADMIN_HISTORY:
+            cursor.execute(
+                "SELECT * FROM chat_messages WHERE sender = 'admin' ORDER BY id DESC LIMIT ?",
+                (self.chat_history_buffer,),
+            )
+        else:
+            cursor.execute(
+                "SELECT * FROM chat_messages WHERE visitor_id = ? ORDER BY id DESC LIMIT ?",
+                (key, self.chat_history_buffer),
+            )
+        messages = [dict(msg) for msg in reversed(cursor.fetchall())]
+        conn.close()
+
+        # Only keep the result if no message was written while it was loading
+        with self._chat_lock:
+            if epoch == self._chat_epoch and not self._chat_writes_in_flight:
+                buffer = deque(messages, maxlen=self.chat_history_buffer)
+                self._chat_buffers[key] = buffer
+                while len(self._chat_buffers) > self.chat_history_visitors:
+                    self._chat_buffers.popitem(last=False)
+        return messages[-limit:]
+
+    def _query_visitor_chat_messages(self, visitor_id, limit):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT * FROM (
+                   SELECT * FROM (SELECT * FROM chat_messages WHERE visitor_id = ?
+                                  ORDER BY id DESC LIMIT ?)
+                   UNION ALL
+                   SELECT * FROM (SELECT * FROM chat_messages WHERE sender = 'admin'
+                                  ORDER BY id DESC LIMIT ?)
+               )
+               ORDER BY id DESC
+               LIMIT ?""",
+            (visitor_id, limit, limit, limit),
+        )
+        messages = cursor.fetchall()
+        conn.close()
+        return [dict(msg) for msg in reversed(messages)]
+
+    def get_visitor_chat_messages(self, visitor_id, limit=100):
+        if limit > self.chat_history_buffer:
+            return self._query_visitor_chat_messages(visitor_id, limit)
+        own = self._chat_history(visitor_id, limit)
+        admin = self._chat_history(_ADMIN_HISTORY, limit)
+        return list(heapq.merge(own, admin, key=lambda msg: msg["id"]))[-limit:]
+
+    def get_chat_messages(self, limit=100):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT * FROM chat_messages 
+               ORDER BY created_at ASC 
+               LIMIT ?""",
+            (limit,),
+        )
+        messages = cursor.fetchall()
+        conn.close()
+        return [dict(msg) for msg in messages]
+
+    def get_chat_cursor(self):
+        conn = self.get_db()
+        head = _chat_head(conn.cursor())
+        conn.close()
+        return head
+
+    def get_chat_changes(self, since_id, visitor_id=None, limit=100):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        head = _chat_head(cursor)
+
+        query = "SELECT * FROM chat_messages WHERE id > ? AND id <= ?"
+        params = [since_id, head]
+        if visitor_id is not None:
+            query += " AND (visitor_id = ? OR sender = 'admin')"
+            params.append(visitor_id)
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit + 1)
+        cursor.execute(query, params)
+        messages = [dict(msg) for msg in cursor.fetchall()]
+
+        cursor.execute(
+            "SELECT id, message_id FROM chat_tombstones WHERE id > ? AND id <= ? ORDER BY id",
+            (since_id, head),
+        )
+        tombstones = [tuple(row) for row in cursor.fetchall()]
+        conn.close()
+        return chat_changes(messages, tombstones, head, since_id, limit)
+
+    def delete_chat_message(self, message_id):
+        def drop(message):
+            # The buffer lost a row, so reload it from SQLite on next read
+            for key, buffer in list(self._chat_buffers.items()):
+                if any(msg["id"] == message_id for msg in buffer):
+                    del self._chat_buffers[key]
+
+        return self._write_chat(drop, _delete_chat_message, message_id)
+
+    def clear_all_chat_messages(self):
+        self._write_chat(
+            lambda result: self._chat_buffers.clear(), _clear_chat_messages
+        )
+
+    def add_connection(
+        self, sid, worker, visitor_id, visitor_name, connected_at, visit_id=None
+    ):
+        return self._write(
+            _add_connection,
+            sid,
+            worker,
+            visitor_id,
+            visitor_name,
+            connected_at,
+            visit_id,
+        )
+
+    def remove_connection(self, sid):
+        return self._write(_remove_connection, sid)
+
+    def _connections(self, query, params=()):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def get_connections(self):
+        return self._connections("SELECT * FROM presence ORDER BY connected_at")
+
+    def count_connections(self):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) AS count FROM presence")
+        result = cursor.fetchone()
+        conn.close()
+        return result["count"]
+
+    def count_visitors(self):
+        conn = self.get_db()
+        count = _count_visitors(conn.cursor())
+        conn.close()
+        return count
+
+    def find_connections(self, visitor_id):
+        return self._connections(
+            "SELECT * FROM presence WHERE visitor_id = ? ORDER BY connected_at",
+            (visitor_id,),
+        )
+
+    def heartbeat(self, worker):
+        self._write(_heartbeat, worker, time.time())
+
+    def get_workers(self):
+        conn = self.get_db()
+        cursor = conn.cursor()
+        cursor.execute("SELECT worker, seen_at FROM presence_workers ORDER BY worker")
+        workers = {row["worker"]: row["seen_at"] for row in cursor.fetchall()}
+        conn.close()
+        return workers
+
+    def remove_workers(self, workers):
+        return self._write(_remove_workers, list(workers))
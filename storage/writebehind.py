@@ -0,0 +1,152 @@
+"""Group-commit writer for SQLite.
+
+Writes submitted from many green threads are collected by one background
+writer and committed together, one transaction per batch, instead of one
+connection, transaction and fsync per write.
+"""
+
+import atexit
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class _Pending:
+    __slots__ = ("op", "args", "wait", "done", "result", "error")
+
+    def __init__(self, op, args, wait):
+        self.op = op
+        self.args = args
+        self.wait = wait
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WriteBehindQueue:
+    """Batch writes into one transaction every ``batch_window`` seconds or
+    every ``batch_size`` operations, whichever comes first.
+
+    ``connect`` returns a connection for each batch and ``close()`` on it is
+    called afterwards. Each submitted op is called as ``op(cursor, *args)``
+    inside its own savepoint, so one failing write does not roll back the
+    rest of the batch. ``execute(fn, batch)`` runs the database part of a
+    batch, e.g. on a native thread so the writer does not block the hub.
+    """
+
+    def __init__(self, connect, batch_size=100, batch_window=0.002, execute=None):
+        self.connect = connect
+        self.execute = execute or (lambda fn, *args: fn(*args))
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def submit(self, op, *args, wait=True):
+        """Queue ``op`` and, if ``wait``, block until it is committed.
+
+        Returns the op's result, or re-raises its exception.
+        """
+        if self._thread is None:
+            self._start()
+        pending = _Pending(op, args, wait)
+        self._queue.put(pending)
+        if not wait:
+            return None
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def flush(self):
+        """Block until everything queued so far has been committed"""
+        if self._thread is not None:
+            self.submit(lambda cursor: None)
+
+    def close(self):
+        """Flush outstanding writes and stop the writer"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self.execute(self._commit, batch)
+            self.batches += 1
+            self.writes += len(batch)
+            for pending in batch:
+                self._finish(pending)
+
+    def _commit(self, batch):
+        """Write one batch; only touches the database, never wakes waiters"""
+        try:
+            conn = self.connect()
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+            return
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for pending in batch:
+                cursor.execute("SAVEPOINT write_behind")
+                try:
+                    pending.result = pending.op(cursor, *pending.args)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_behind")
+                    pending.error = e
+                cursor.execute("RELEASE write_behind")
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            for pending in batch:
+                pending.error = pending.error or e
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _finish(pending):
+        if pending.error is not None and not pending.wait:
+            # Nobody is waiting to re-raise a fire-and-forget failure
+            print(f"Error in background write {pending.op.__name__}: {pending.error}")
+        pending.done.set()
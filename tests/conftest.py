@@ -0,0 +1,78 @@
+"""Puts the repo root on sys.path, as the benchmarks do, and points the app
+at a throwaway database before anything imports config. ``eventlet_script``
+runs code under monkey patching, away from the test process; ``app_module``
+and ``connect`` drive app.py through the Flask and Socket.IO test clients."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import warnings
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DATABASE", os.path.join(tempfile.mkdtemp(), "test.db"))
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+@pytest.fixture
+def eventlet_script(tmp_path):
+    """Run Python source in a fresh interpreter that monkey patches first, as
+    app.py does; returns its stdout and fails on errors or a hang"""
+
+    def run(source, timeout=60):
+        script = tmp_path / "script.py"
+        script.write_text(
+            "import eventlet\neventlet.monkey_patch()\n"
+            f"import sys\nsys.path.insert(0, {ROOT!r})\n" + textwrap.dedent(source)
+        )
+        env = dict(
+            os.environ,
+            DATABASE=str(tmp_path / "test.db"),
+            PYTHONWARNINGS="ignore",
+        )
+        result = subprocess.run(
+            [sys.executable, str(script)],
+            cwd=tmp_path,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert "Traceback" not in result.stderr, result.stderr[-2000:]
+        return result.stdout
+
+    return run
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def app_module(request):
+    import app
+
+    app.create_app()
+    options = {}
+    if request.param == "sqlite":
+        options["database"] = os.path.join(tempfile.mkdtemp(), "test.db")
+    app.models.configure(request.param, **options)
+    app.models.init_db()
+    app.admin_events.interval = 1.0
+    app.admin_events.flush()
+    yield app
+    app.models.close()
+
+
+@pytest.fixture
+def connect():
+    """Open a Socket.IO test client whose session holds ``session_values``"""
+
+    def run(app, session_values):
+        client = app.app.test_client()
+        with client.session_transaction() as session:
+            session.update(session_values)
+        return app.socketio.test_client(app.app, flask_test_client=client)
+
+    return run
@@ -0,0 +1,43 @@
+def admin_client(app):
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session["admin_logged_in"] = True
+    return client
+
+
+def kicked(socket):
+    return [e for e in socket.get_received() if e["name"] == "force_disconnect"]
+
+
+def test_disconnects_a_socket_without_a_visitor_id_by_sid(app_module, connect):
+    app = app_module
+    anonymous = connect(app, {})
+    other = connect(app, {})
+    sid = app.socketio.server.manager.sid_from_eio_sid(anonymous.eio_sid, "/")
+    response = admin_client(app).post(f"/admin/visitor/unknown/disconnect?sid={sid}")
+    assert response.status_code == 200
+    assert kicked(anonymous)
+    assert not kicked(other)
+    anonymous.disconnect()
+    other.disconnect()
+
+
+def test_unknown_without_a_matching_sid_is_not_found(app_module, connect):
+    app = app_module
+    visitor = connect(app, {"visitor_id": "v1", "visitor_name": "Visitor"})
+    sid = app.socketio.server.manager.sid_from_eio_sid(visitor.eio_sid, "/")
+    # Only sockets with no visitor id are reachable through "unknown"
+    response = admin_client(app).post(f"/admin/visitor/unknown/disconnect?sid={sid}")
+    assert response.status_code == 404
+    assert not kicked(visitor)
+    visitor.disconnect()
+
+
+def test_disconnects_every_socket_of_a_visitor(app_module, connect):
+    app = app_module
+    tabs = [connect(app, {"visitor_id": "v1", "visitor_name": "V"}) for _ in range(2)]
+    response = admin_client(app).post("/admin/visitor/v1/disconnect")
+    assert response.status_code == 200
+    assert all(kicked(tab) for tab in tabs)
+    for tab in tabs:
+        tab.disconnect()
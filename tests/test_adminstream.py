@@ -0,0 +1,60 @@
+import adminstream
+
+
+def info(sid):
+    return {"sid": sid, "visitor_id": sid, "visitor_name": sid}
+
+
+def stream():
+    frames = []
+    events = adminstream.AdminStream(
+        lambda event, data: frames.append((event, data)), interval=1.0
+    )
+    return events, frames
+
+
+def test_join_and_leave_in_one_batch_cancel_out():
+    events, frames = stream()
+    events.joined(info("a"), 1)
+    events.left(info("a"), 0)
+    events.flush()
+    assert frames[0][1]["joined"] == []
+    assert frames[0][1]["left"] == []
+
+
+def test_leave_is_sent_when_an_admin_saw_the_join():
+    events, frames = stream()
+    events.joined(info("a"), 1)
+    events.snapshot_sent()
+    events.left(info("a"), 0)
+    events.flush()
+    assert frames[0][1]["left"] == ["a"]
+
+
+def test_every_leave_is_sent_when_shared_with_other_workers():
+    events, frames = stream()
+    events.shared = True
+    events.joined(info("a"), 1)
+    # An admin on another worker may have loaded "a" in the meantime
+    events.left(info("a"), 0)
+    events.flush()
+    assert frames[0][1]["joined"] == []
+    assert frames[0][1]["left"] == ["a"]
+
+
+def test_admin_joining_between_connect_and_disconnect_sees_the_leave(
+    app_module, connect
+):
+    app = app_module
+    visitor = connect(app, {"visitor_id": "v1", "visitor_name": "Visitor"})
+    admin = connect(app, {"admin_logged_in": True})
+    admin.emit("join_admin")
+    joined = next(e for e in admin.get_received() if e["name"] == "admin_joined")
+    sids = [c["sid"] for c in joined["args"][0]["active_connections"]]
+    assert len(sids) == 1
+
+    visitor.disconnect()
+    app.admin_events.flush()
+    batches = [e for e in admin.get_received() if e["name"] == "admin_batch"]
+    assert [sid for batch in batches for sid in batch["args"][0]["left"]] == sids
+    admin.disconnect()
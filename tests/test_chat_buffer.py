@@ -0,0 +1,99 @@
+import os
+import tempfile
+import threading
+
+from storage.pool import native_threading
+from storage.sqlite import SQLiteStorage
+
+
+def engine():
+    storage = SQLiteStorage(
+        os.path.join(tempfile.mkdtemp(), "test.db"), write_behind=False
+    )
+    storage.init()
+    return storage
+
+
+def test_history_read_during_a_write_is_not_buffered_twice():
+    storage = engine()
+    storage.save_chat_message("visitor", "V", "first", "v1")
+    buffer_message = storage._buffer_chat_message
+    # Native, even if another test has monkey patched threading: the writer
+    # waits with the chat lock held, which would stop a green reader's hub
+    in_window = native_threading.Event()
+    read_done = native_threading.Event()
+
+    def slow_buffer(message):
+        # The write has committed; give a reader the chance to load and
+        # keep the history before the writer adds the message to it
+        in_window.set()
+        read_done.wait(0.5)
+        buffer_message(message)
+
+    storage._buffer_chat_message = slow_buffer
+    writer = native_threading.Thread(
+        target=storage.save_chat_message, args=("visitor", "V", "second", "v1")
+    )
+    writer.start()
+    assert in_window.wait(5)
+    storage.get_visitor_chat_messages("v1", limit=10)
+    read_done.set()
+    writer.join()
+
+    history = storage.get_visitor_chat_messages("v1", limit=10)
+    assert [msg["message"] for msg in history] == ["first", "second"]
+
+
+def test_concurrent_writers_and_readers_keep_one_copy_of_each_message():
+    storage = engine()
+    storage.chat_history_visitors = 2  # evict often, while others read
+    errors = []
+
+    def visitor(n):
+        try:
+            for i in range(20):
+                storage.save_chat_message("visitor", "V", f"{n}-{i}", f"v{n}")
+                storage.get_visitor_chat_messages(f"v{n % 3}", limit=50)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=visitor, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for n in range(6):
+        history = storage.get_visitor_chat_messages(f"v{n}", limit=50)
+        assert [msg["message"] for msg in history] == [f"{n}-{i}" for i in range(20)]
+
+
+def test_hub_writes_and_tpool_reads_under_eventlet(eventlet_script):
+    output = eventlet_script("""
+        import os, tempfile
+        import eventlet
+        import db, models
+
+        sys.setswitchinterval(1e-6)
+        models.configure(
+            "sqlite",
+            database=os.path.join(tempfile.mkdtemp(), "test.db"),
+            chat_history_visitors=2,
+        )
+        models.init_db()
+
+        def visitor(n):
+            for i in range(30):
+                db.save_chat_message("visitor", "V", f"{n}-{i}", f"v{n}")
+                db.get_visitor_chat_messages(f"v{n % 3}", 50)
+
+        workers = [eventlet.spawn(visitor, n) for n in range(6)]
+        for worker in workers:
+            worker.wait()
+        for n in range(6):
+            history = db.get_visitor_chat_messages(f"v{n}", 50)
+            expected = [f"{n}-{i}" for i in range(30)]
+            print([msg["message"] for msg in history] == expected)
+        """)
+    assert output.split() == ["True"] * 6
@@ -0,0 +1,132 @@
+import os
+import tempfile
+
+import pytest
+
+import db
+import models
+
+
+@pytest.fixture
+def offloaded(monkeypatch):
+    """Names of the db calls sent off the hub"""
+    names = []
+
+    def call(fn, *args, **kwargs):
+        names.append(fn.__name__)
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(db, "call", call)
+    yield names
+    models.close()
+
+
+def configure(backend, **options):
+    if backend == "sqlite":
+        options["database"] = os.path.join(tempfile.mkdtemp(), "test.db")
+    models.configure(backend, **options)
+    models.init_db()
+
+
+def test_queued_writes_run_inline_with_write_behind(offloaded):
+    configure("sqlite", write_behind=True)
+    db.save_chat_message("visitor", "V", "hi", "v1")
+    db.get_current_status()
+    db.get_chat_messages()
+    # The writer still commits off the hub
+    assert "save_chat_message" not in offloaded
+    assert "get_current_status" not in offloaded
+    assert "get_chat_messages" in offloaded
+
+
+def test_writes_are_offloaded_without_write_behind(offloaded):
+    configure("sqlite", write_behind=False, status_cache_ttl=0)
+    db.save_chat_message("visitor", "V", "hi", "v1")
+    db.get_current_status()
+    db.flush_writes()
+    assert offloaded == ["save_chat_message", "get_current_status"]
+
+
+def test_memory_engine_calls_run_inline(offloaded):
+    configure("memory")
+    db.save_chat_message("visitor", "V", "hi", "v1")
+    db.get_chat_messages()
+    assert offloaded == []
+
+
+def test_slow_query_does_not_delay_pings_under_eventlet(eventlet_script):
+    output = eventlet_script("""
+        import os, tempfile, time
+        import eventlet
+        import db, models
+
+        SLOW_QUERY = '''
+            WITH RECURSIVE n(i) AS (
+                SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000
+            )
+            SELECT COUNT(*) FROM n
+        '''
+
+        def slow_query():
+            conn = models.get_db()
+            try:
+                return conn.execute(SLOW_QUERY).fetchone()[0]
+            finally:
+                conn.close()
+
+        sys.setswitchinterval(1e-6)
+        models.configure("sqlite", database=os.path.join(tempfile.mkdtemp(), "t.db"))
+        models.init_db()
+        stop = []
+        calls = {"hub": 0, "tpool": 0}
+
+        def hub_traffic(n):
+            while not stop:
+                models.get_unread_count()
+                db.save_chat_message("visitor", "V", "hi", f"v{n}")
+                calls["hub"] += 1
+                eventlet.sleep(0)
+
+        def tpool_traffic(n):
+            while not stop:
+                db.get_unread_count()
+                db.get_visitor_chat_messages(f"v{n}", 10)
+                calls["tpool"] += 1
+
+        def worst_ping_delay(run):
+            delays = []
+            done = []
+
+            def pinger():
+                while not done:
+                    start = time.perf_counter()
+                    eventlet.sleep(0.01)
+                    delays.append(time.perf_counter() - start - 0.01)
+
+            ping = eventlet.spawn(pinger)
+            eventlet.sleep(0.05)
+            start = time.perf_counter()
+            run()
+            took = time.perf_counter() - start
+            eventlet.sleep(0.05)
+            done.append(True)
+            ping.wait()
+            return took, max(delays)
+
+        traffic = [eventlet.spawn(hub_traffic, n) for n in range(5)]
+        traffic += [eventlet.spawn(tpool_traffic, n) for n in range(5)]
+        inline = worst_ping_delay(slow_query)
+        offloaded = worst_ping_delay(lambda: db.call(slow_query))
+        before = dict(calls)
+        eventlet.sleep(0.2)
+        stop.append(True)
+        for thread in traffic:
+            thread.wait()
+        moving = calls["hub"] > before["hub"] and calls["tpool"] > before["tpool"]
+        print(inline[0], inline[1], offloaded[0], offloaded[1], moving)
+        """)
+    inline_took, inline_delay, took, delay, moving = output.split()
+    # Run on the hub the query stalls every ping; through db.call it doesn't
+    assert float(inline_delay) > float(inline_took) / 2
+    assert float(delay) < min(float(took) / 2, 0.1)
+    assert moving == "True"
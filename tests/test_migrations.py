@@ -0,0 +1,35 @@
+import sqlite3
+
+import migrations
+
+
+def test_presence_connect_times_become_unix_timestamps(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / "test.db")
+    steps = migrations.MIGRATIONS
+    monkeypatch.setattr(
+        migrations, "MIGRATIONS", [step for step in steps if step[0] <= 8]
+    )
+    migrations.migrate(conn)
+    # One row from the old CURRENT_TIMESTAMP default, one stored as a float
+    conn.execute(
+        "INSERT INTO presence (sid, worker, connected_at) "
+        "VALUES ('old', 'w', '2024-05-01 12:00:00')"
+    )
+    conn.execute(
+        "INSERT INTO presence (sid, worker, connected_at) "
+        "VALUES ('new', 'w', 1714564800.5)"
+    )
+    conn.commit()
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+    migrations.migrate(conn)
+    rows = conn.execute(
+        "SELECT sid, connected_at, typeof(connected_at) FROM presence "
+        "ORDER BY connected_at"
+    ).fetchall()
+    columns = {row[1]: row for row in conn.execute("PRAGMA table_info(presence)")}
+    conn.close()
+
+    assert rows == [("old", 1714564800.0, "real"), ("new", 1714564800.5, "real")]
+    assert columns["connected_at"][2] == "REAL"
+    assert columns["connected_at"][4] is None  # no default
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+import pytest
+
+from storage.pool import ConnectionPool
+
+
+def pool(size, timeout=0.1):
+    return ConnectionPool(
+        os.path.join(tempfile.mkdtemp(), "test.db"), size, timeout=timeout
+    )
+
+
+def hold(connections, release):
+    """Check out a connection on another thread until ``release`` is set"""
+    acquired = threading.Event()
+
+    def run():
+        conn = connections.acquire()
+        acquired.set()
+        release.wait(5)
+        conn.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert acquired.wait(5)
+    return thread
+
+
+def on_other_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_nested_acquires_share_one_connection():
+    connections = pool(1)
+
+    def try_acquire():
+        try:
+            connections.acquire().close()
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    outer = connections.acquire()
+    assert connections.acquire() is outer
+    outer.close()
+    assert not on_other_thread(try_acquire)
+    outer.close()
+    assert on_other_thread(try_acquire)
+
+
+def test_acquire_raises_once_size_connections_are_checked_out():
+    connections = pool(2)
+    release = threading.Event()
+    holders = [hold(connections, release) for _ in range(2)]
+    with pytest.raises(sqlite3.OperationalError):
+        connections.acquire()
+    release.set()
+    for thread in holders:
+        thread.join()
+    connections.acquire().close()
+    assert len(connections._idle) == 2
+
+
+def test_acquire_waits_for_a_connection_to_come_back():
+    connections = pool(1, timeout=5)
+    release = threading.Event()
+    holder = hold(connections, release)
+    threading.Timer(0.05, release.set).start()
+    conn = connections.acquire()
+    conn.close()
+    holder.join()
+    assert len(connections._idle) == 1
+
+
+def test_hub_and_tpool_share_the_pool_under_eventlet(eventlet_script):
+    output = eventlet_script("""
+        import os, tempfile
+        import eventlet
+        from eventlet import tpool
+        from storage.pool import ConnectionPool
+
+        sys.setswitchinterval(1e-6)
+        connections = ConnectionPool(
+            os.path.join(tempfile.mkdtemp(), "test.db"), 2, timeout=10
+        )
+        done = {"hub": 0, "tpool": 0}
+
+        def query(side, yield_while_holding):
+            conn = connections.acquire()
+            conn.execute("SELECT 1").fetchone()
+            if yield_while_holding:
+                eventlet.sleep(0)
+            conn.close()
+            done[side] += 1
+
+        def hub():
+            for _ in range(200):
+                query("hub", True)
+
+        def offloaded():
+            for _ in range(200):
+                tpool.execute(query, "tpool", False)
+
+        workers = [eventlet.spawn(hub) for _ in range(10)]
+        workers += [eventlet.spawn(offloaded) for _ in range(10)]
+        for worker in workers:
+            worker.wait()
+        print(done["hub"], done["tpool"], connections._checked_out)
+        """)
+    assert output.split() == ["2000", "2000", "0"]
@@ -0,0 +1,132 @@
+"""Every query the SQLite engine runs on the request path must reach its rows
+through an index: EXPLAIN QUERY PLAN of the SQL actually executed, captured
+with a trace callback, may only SEARCH, or SCAN an index in order."""
+
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+import storage.pool
+from storage.sqlite import SQLiteStorage
+
+# SQLite's own AUTOINCREMENT counters, one row per table; they cannot be
+# indexed
+UNINDEXABLE = {"sqlite_sequence"}
+
+
+def _seed(s):
+    s.update_status("available", "Hello")
+    s.add_message("Ann", "Hi")
+    s.log_visit("Ann", "chat")
+    s.create_pending_visitor("Bob", "bob@example.com", "session-b")
+    s.create_pending_visitor("Cy", "cy@example.com", "session-c")
+    s.save_chat_message("visitor", "Ann", "Hi", "v1")
+    s.save_chat_message("admin", "Admin", "Hello")
+    s.add_connection("sid-1", "worker-1", "v1", "Ann", 1.0, 1)
+    s.heartbeat("worker-1")
+
+
+# (engine method, call); each runs after _seed
+CALLS = [
+    ("get_current_status", lambda s: s.get_current_status()),
+    ("update_status", lambda s: s.update_status("away", "Back soon")),
+    ("get_messages", lambda s: s.get_messages()),
+    ("get_messages(unread_only)", lambda s: s.get_messages(unread_only=True)),
+    ("get_unread_count", lambda s: s.get_unread_count()),
+    ("mark_message_read", lambda s: s.mark_message_read(1)),
+    ("delete_message", lambda s: s.delete_message(1)),
+    ("end_visit", lambda s: s.end_visit(1)),
+    ("get_recent_visits", lambda s: s.get_recent_visits()),
+    ("get_visit_stats", lambda s: s.get_visit_stats()),
+    ("get_pending_visitors", lambda s: s.get_pending_visitors()),
+    ("get_visitor_by_session", lambda s: s.get_visitor_by_session("session-b")),
+    ("approve_visitor", lambda s: s.approve_visitor(1)),
+    ("reject_visitor", lambda s: s.reject_visitor(2)),
+    ("get_dashboard", lambda s: s.get_dashboard()),
+    ("get_visitor_chat_messages", lambda s: s.get_visitor_chat_messages("v1")),
+    ("get_chat_messages", lambda s: s.get_chat_messages()),
+    ("get_chat_cursor", lambda s: s.get_chat_cursor()),
+    ("get_chat_changes", lambda s: s.get_chat_changes(0)),
+    ("get_chat_changes(visitor)", lambda s: s.get_chat_changes(0, "v1")),
+    ("delete_chat_message", lambda s: s.delete_chat_message(1)),
+    ("clear_all_chat_messages", lambda s: s.clear_all_chat_messages()),
+    ("get_connections", lambda s: s.get_connections()),
+    ("count_connections", lambda s: s.count_connections()),
+    ("count_visitors", lambda s: s.count_visitors()),
+    ("find_connections", lambda s: s.find_connections("v1")),
+    ("get_workers", lambda s: s.get_workers()),
+    ("remove_connection", lambda s: s.remove_connection("sid-1")),
+    ("remove_workers", lambda s: s.remove_workers(["worker-1"])),
+]
+
+
+@pytest.fixture(scope="module")
+def executed():
+    """{method: [SQL it executed, parameters bound in]} and the database"""
+    statements = []
+    configure = storage.pool.configure_connection
+
+    def traced(conn):
+        configure(conn)
+        conn.set_trace_callback(statements.append)
+
+    patch = pytest.MonkeyPatch()
+    patch.setattr(storage.pool, "configure_connection", traced)
+    database = os.path.join(tempfile.mkdtemp(), "plans.db")
+    # Caches off and writes inline, so every call reaches SQLite
+    s = SQLiteStorage(
+        database,
+        write_behind=False,
+        status_cache_ttl=0,
+        approval_cache_ttl=0,
+        dashboard_cache_ttl=0,
+        chat_history_buffer=0,
+    )
+    s.init()
+    _seed(s)
+    calls = {}
+    for name, call in CALLS:
+        del statements[:]
+        call(s)
+        calls[name] = list(statements)
+    s.close()
+    patch.undo()
+    yield calls, database
+
+
+def problems(conn, query):
+    """Plan steps of ``query`` that read a table without an index"""
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query)]
+    # Subqueries and CTEs are scanned from their own, already planned, rows
+    scans = [
+        step
+        for step in plan
+        if step.startswith("SCAN ")
+        and not step.startswith("SCAN (")
+        and step.split()[1] not in UNINDEXABLE
+    ]
+    bad = [step for step in scans if "INDEX" not in step]
+    # Sorting a bounded SEARCH result is fine, sorting a whole scan is not
+    if scans:
+        bad += [step for step in plan if "TEMP B-TREE" in step]
+    return bad
+
+
+@pytest.mark.parametrize("name", [name for name, _ in CALLS])
+def test_queries_use_an_index(executed, name):
+    calls, database = executed
+    queries = [
+        query
+        for query in calls[name]
+        if query.split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE")
+    ]
+    assert queries, f"{name} ran no queries"
+    conn = sqlite3.connect(database)
+    try:
+        for query in queries:
+            bad = problems(conn, query)
+            assert not bad, f"{name}: {query} -> {bad}"
+    finally:
+        conn.close()
@@ -0,0 +1,53 @@
+import pytest
+from flask import Flask
+
+import ratelimit
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    """A view allowing one request per IP, and a function calling it from an
+    address; the app's own limits are restored afterwards"""
+    monkeypatch.setattr(ratelimit, "_limits", {})
+    monkeypatch.setattr(ratelimit, "_settings", {})
+    monkeypatch.setattr(ratelimit, "stats", {})
+    app = Flask(__name__)
+    app.secret_key = "test"
+
+    @app.route("/")
+    @ratelimit.http_limit("view")
+    def view():
+        return "ok"
+
+    def call(address):
+        client = app.test_client()
+        return client.get("/", environ_base={"REMOTE_ADDR": address}).status_code
+
+    return call
+
+
+def configure(trusted_proxies):
+    ratelimit.configure(
+        {"view": {"ip": (0.01, 1)}}, max_delay=0, trusted_proxies=trusted_proxies
+    )
+
+
+def test_client_addresses_are_limited_one_by_one(limited):
+    configure(0)
+    assert limited("203.0.113.1") == 200
+    assert limited("203.0.113.1") == 429
+    assert limited("203.0.113.2") == 200
+
+
+def test_loopback_skips_ip_limits_without_trusted_proxies(limited, capsys):
+    configure(0)
+    # A proxy nobody told the app about: one bucket would limit the whole site
+    assert [limited("127.0.0.1") for _ in range(3)] == [200, 200, 200]
+    assert limited("::1") == 200
+    assert capsys.readouterr().out.count("TRUSTED_PROXIES") == 1
+
+
+def test_loopback_is_limited_with_trusted_proxies(limited):
+    configure(1)
+    assert limited("127.0.0.1") == 200
+    assert limited("127.0.0.1") == 429
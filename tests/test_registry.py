@@ -0,0 +1,47 @@
+from storage.memory import Connection, ConnectionRegistry
+
+
+def connection(sid, visitor_id, visit_id=None):
+    return Connection(sid, "worker", visitor_id, "Visitor", 0.0, visit_id)
+
+
+def test_tabs_are_grouped_by_visitor():
+    registry = ConnectionRegistry()
+    first = registry.add(connection("a", "v1", 1))
+    second = registry.add(connection("b", "v1", 2))
+    registry.add(connection("c", None))
+    registry.add(connection("d", None))
+    assert registry.by_visitor("v1") == [first, second]
+    # Sockets without a visitor id count as one visitor each
+    assert registry.visitor_count() == 3
+    registry.remove("a")
+    assert registry.by_visitor("v1") == [second]
+
+
+def test_lookup_by_visit_id():
+    registry = ConnectionRegistry()
+    tab = registry.add(connection("a", "v1", 7))
+    registry.add(connection("b", "v1"))
+    assert registry.by_visit(7) is tab
+    assert registry.by_visit(None) is None
+    registry.remove("b")
+    assert registry.by_visit(7) is tab
+    registry.remove("a")
+    assert registry.by_visit(7) is None
+
+
+def test_replacing_a_sid_reindexes_its_visit():
+    registry = ConnectionRegistry()
+    registry.add(connection("a", "v1", 7))
+    tab = registry.add(connection("a", "v1", 8))
+    assert registry.by_visit(7) is None
+    assert registry.by_visit(8) is tab
+    assert len(registry) == 1
+
+
+def test_remove_worker_unindexes_its_visits():
+    registry = ConnectionRegistry()
+    registry.add(connection("a", "v1", 7))
+    assert [c.sid for c in registry.remove_worker("worker")] == ["a"]
+    assert registry.by_visit(7) is None
+    assert registry.snapshot() == []
@@ -0,0 +1,22 @@
+import sqlite3
+
+
+def test_sigterm_commits_queued_writes(eventlet_script, tmp_path):
+    output = eventlet_script("""
+        import os, signal
+        import eventlet
+        import app, db
+
+        app.app.config["STORAGE_OPTIONS"] = {"write_batch_window": 0.5}
+        app.create_app()
+        visit_id = db.log_visit("Ann", "chat")
+        db.end_visit(visit_id)  # queued, committed by the next batch
+        os.kill(os.getpid(), signal.SIGTERM)
+        eventlet.sleep(5)
+        print("still running")
+        """)
+    assert "still running" not in output
+    conn = sqlite3.connect(tmp_path / "test.db")
+    ended = conn.execute("SELECT ended_at FROM visits").fetchall()
+    conn.close()
+    assert len(ended) == 1 and ended[0][0] is not None
@@ -0,0 +1,46 @@
+def test_publish_waits_off_the_hub_while_the_queue_is_locked(eventlet_script):
+    output = eventlet_script("""
+        import os, sqlite3, tempfile, threading, time
+        import eventlet
+        from eventlet import patcher
+        import serializer
+        from socketqueue import SQLiteQueueManager
+
+        database = os.path.join(tempfile.mkdtemp(), "queue.db")
+        manager = SQLiteQueueManager(f"sqlite:///{database}", json=serializer)
+        native_threading = patcher.original("threading")
+        locked = native_threading.Event()
+
+        def hold_write_lock():
+            conn = sqlite3.connect(database)
+            conn.execute("BEGIN IMMEDIATE")
+            locked.set()
+            patcher.original("time").sleep(0.5)
+            conn.rollback()
+            conn.close()
+
+        native_threading.Thread(target=hold_write_lock).start()
+        locked.wait()
+        delays = []
+        done = []
+
+        def pinger():
+            while not done:
+                start = time.perf_counter()
+                eventlet.sleep(0.01)
+                delays.append(time.perf_counter() - start - 0.01)
+
+        ping = eventlet.spawn(pinger)
+        start = time.perf_counter()
+        manager._publish({"method": "emit", "event": "hello"})
+        took = time.perf_counter() - start
+        done.append(True)
+        ping.wait()
+        conn = sqlite3.connect(database)
+        rows = conn.execute("SELECT COUNT(*) FROM socketio_queue").fetchone()[0]
+        print(took, max(delays, default=took), rows)
+        """)
+    took, delay, rows = output.split()
+    assert float(took) > 0.3  # it did wait for the lock
+    assert float(delay) < 0.1
+    assert rows == "1"